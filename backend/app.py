@@ -19,6 +19,17 @@ register_routes(app)
 # Configure template folder explicitly (ensures Jinja finds backend/templates)
 app.template_folder = os.path.join(os.path.dirname(__file__), "templates")
 
+# ASGI entry point for platforms that only speak ASGI (`uvicorn app:asgi_app`).
+# Each request still runs the sync Flask stack on a thread; the Groq calls are
+# already async on a shared event loop (services.llm_client), so the gthread
+# gunicorn setup in gunicorn_conf.py remains the default deployment.
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # pragma: no cover - asgiref is optional
+    asgi_app = None
+else:
+    asgi_app = WsgiToAsgi(app)
+
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
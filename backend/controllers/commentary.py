@@ -1,36 +1,32 @@
 from __future__ import annotations
 
-import traceback
 from typing import Any, Dict
 
-from flask import current_app, jsonify, request
+from flask import Response, current_app, jsonify, request, stream_with_context
 
-from core.constants import rebuild_feature_vector
+from core.constants import rebuild_feature_vector, risk_level_for
+from core.json_provider import dumps_bytes
 from core.settings import logger, rate_limit
 from core.security import audit_event, current_role, get_request_id, require_role
 from services import diagnostic_system
+from services.commentary import llm_commentary_cache
 from utils.text import encode_text_base64, repair_text_encoding
 
 from . import api_bp
 
 
-@api_bp.route("/commentary", methods=["POST"])
-@rate_limit("30/minute")
-@require_role(["clinician", "researcher", "admin"])
-def regenerate_commentary():
-    """Regenerate AI commentary in a requested language using existing context."""
-    request_id = get_request_id()
-    payload = request.get_json(silent=True) or {}
+def _commentary_inputs(payload: Any, action: str, request_id: str):
+    """Normalize a commentary payload; returns ``(inputs, None)`` or ``(None, error_response)``."""
     if not isinstance(payload, dict):
         audit_event(
-            "commentary",
+            action,
             current_role(),
             status="validation_error",
             detail="invalid_payload",
             http_status=400,
             request_id=request_id,
         )
-        return jsonify({"error": "Invalid payload", "status": "validation_error"}), 400
+        return None, (jsonify({"error": "Invalid payload", "status": "validation_error"}), 400)
 
     analysis_payload = payload.get("analysis") if isinstance(payload.get("analysis"), dict) else {}
     merged: Dict[str, Any] = {}
@@ -50,14 +46,14 @@ def regenerate_commentary():
 
     if patient_values is None and not isinstance(feature_vector, list):
         audit_event(
-            "commentary",
+            action,
             current_role(),
             status="validation_error",
             detail="missing_patient_values",
             http_status=400,
             request_id=request_id,
         )
-        return (
+        return None, (
             jsonify(
                 {
                     "error": "Patient values are required to regenerate commentary",
@@ -97,6 +93,33 @@ def regenerate_commentary():
         or "patient"
     ).lower()
 
+    inputs = {
+        "prediction": prediction,
+        "probability": probability,
+        "shap_values": shap_values,
+        "features": features,
+        "language": language,
+        "client_type": client_type,
+    }
+    return inputs, None
+
+
+@api_bp.route("/commentary", methods=["POST"])
+@rate_limit("30/minute")
+@require_role(["clinician", "researcher", "admin"])
+def regenerate_commentary():
+    """Regenerate AI commentary in a requested language using existing context."""
+    request_id = get_request_id()
+    inputs, error = _commentary_inputs(request.get_json(silent=True) or {}, "commentary", request_id)
+    if error is not None:
+        return error
+    prediction = inputs["prediction"]
+    probability = inputs["probability"]
+    shap_values = inputs["shap_values"]
+    features = inputs["features"]
+    language = inputs["language"]
+    client_type = inputs["client_type"]
+
     try:
         commentary = diagnostic_system.generate_clinical_commentary(
             prediction,
@@ -120,7 +143,7 @@ def regenerate_commentary():
             )
         except Exception:
             audience_commentaries = {client_type: commentary}
-        risk_level = "High" if probability > 0.7 else "Moderate" if probability > 0.3 else "Low"
+        risk_level = risk_level_for(probability)
         audit_event(
             "commentary",
             current_role(),
@@ -146,8 +169,7 @@ def regenerate_commentary():
             }
         )
     except Exception as exc:  # pragma: no cover
-        logger.error("Commentary regeneration error: %s", exc)
-        logger.error(traceback.format_exc())
+        logger.exception("Commentary regeneration error: %s", exc)
         audit_event(
             "commentary",
             current_role(),
@@ -166,3 +188,70 @@ def regenerate_commentary():
             ),
             500,
         )
+
+
+def _sse_event(data: Any, event: str | None = None) -> bytes:
+    prefix = f"event: {event}\n".encode("utf-8") if event else b""
+    return b"%sdata: %s\n\n" % (prefix, dumps_bytes(data))
+
+
+@api_bp.route("/commentary/stream", methods=["POST"])
+@rate_limit("30/minute")
+@require_role(["clinician", "researcher", "admin"])
+def stream_commentary():
+    """Stream AI commentary as server-sent events while Groq generates it."""
+    request_id = get_request_id()
+    inputs, error = _commentary_inputs(request.get_json(silent=True) or {}, "commentary_stream", request_id)
+    if error is not None:
+        return error
+    role = current_role()
+
+    def _events():
+        try:
+            for delta in diagnostic_system.stream_clinical_commentary(
+                inputs["prediction"],
+                inputs["probability"],
+                inputs["shap_values"],
+                inputs["features"],
+                language=inputs["language"],
+                client_type=inputs["client_type"],
+            ):
+                yield _sse_event(delta)
+            status = "success"
+            yield _sse_event({"language": inputs["language"], "prediction": int(inputs["prediction"])}, "done")
+        except Exception as exc:
+            logger.error("Commentary stream error: %s", exc)
+            status = "error"
+            yield _sse_event({"error": "Failed to stream commentary", "status": "error"}, "error")
+        audit_event(
+            "commentary_stream",
+            role,
+            status=status,
+            http_status=200,
+            request_id=request_id,
+            extra={"language": inputs["language"], "client_type": inputs["client_type"]},
+        )
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_bp.route("/commentary/cache", methods=["DELETE"])
+@rate_limit("10/minute")
+@require_role(["admin"])
+def invalidate_commentary_cache():
+    """Drop every memoized LLM commentary, e.g. after a prompt or model change."""
+    stats = llm_commentary_cache.stats()
+    llm_commentary_cache.clear()
+    audit_event(
+        "commentary_cache_invalidate",
+        current_role(),
+        status="success",
+        detail=f"cleared={stats['size']}",
+        http_status=200,
+        request_id=get_request_id(),
+    )
+    return jsonify({"status": "cleared", "cleared": stats})
@@ -1,11 +1,9 @@
 from __future__ import annotations
 
-import traceback
-from datetime import datetime
-
 from flask import jsonify
 
 from core.settings import logger
+from utils.timing import iso_timestamp
 
 
 def not_found(error):
@@ -15,7 +13,7 @@ def not_found(error):
             {
                 "error": "Endpoint not found",
                 "status": "not_found",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": iso_timestamp(),
             }
         ),
         404,
@@ -23,14 +21,14 @@ def not_found(error):
 
 
 def internal_error(error):
-    logger.error("Internal server error: %s", error)
-    logger.error(traceback.format_exc())
+    # The traceback is attached to the record, so it is only formatted if a handler emits it.
+    logger.error("Internal server error: %s", error, exc_info=getattr(error, "original_exception", None) or True)
     return (
         jsonify(
             {
                 "error": "Internal server error",
                 "status": "error",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": iso_timestamp(),
             }
         ),
         500,
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from datetime import datetime
+import time
 
 from flask import current_app, jsonify, request
 
 from core.settings import logger, rate_limit
-from core.security import audit_event, current_role, get_request_id, require_role
-from services import run_diagnostic_pipeline
+from core.security import audit_event, current_role, get_request_id, require_role, sign_risk
+from services import cache_analysis, run_diagnostic_pipeline
+from utils.timing import iso_timestamp
 
 from . import api_bp
 
@@ -16,10 +17,12 @@ from . import api_bp
 @require_role(["clinician", "researcher", "admin"])
 def predict():
     """Pancreatic cancer prediction endpoint."""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     request_id = get_request_id()
     try:
-        if not request.json:
+        # Parsed once; a missing, malformed or non-object body is a validation error.
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             audit_event(
                 "predict",
                 current_role(),
@@ -33,10 +36,13 @@ def predict():
                 400,
             )
 
-        data = request.json
         logger.info("Processing prediction request for patient data")
 
-        analysis, error_payload, status_code = run_diagnostic_pipeline(data)
+        # ?exact=true bypasses the approximate SHAP surrogate for full-fidelity explanations;
+        # ?bypass_cache=true recomputes the explanation and commentary instead of reusing them.
+        exact_shap = request.args.get("exact", "").strip().lower() in {"1", "true", "yes"}
+        use_cache = request.args.get("bypass_cache", "").strip().lower() not in {"1", "true", "yes"}
+        analysis, error_payload, status_code = run_diagnostic_pipeline(data, exact_shap=exact_shap, use_cache=use_cache)
         if status_code != 200:
             audit_event(
                 "predict",
@@ -48,13 +54,17 @@ def predict():
             )
             return jsonify(error_payload), status_code
 
-        processing_time = (datetime.now() - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         response = {
             **analysis,
+            "analysis_id": cache_analysis(analysis),
             "processing_time": f"{processing_time:.3f}s",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_timestamp(),
             "status": "success",
         }
+        risk_signature = sign_risk(analysis["probability"], analysis["risk_level"])
+        if risk_signature is not None:
+            response["risk_signature"] = risk_signature
 
         logger.info("Prediction completed: Risk Level %s", response["risk_level"])
         audit_event(
@@ -70,6 +80,20 @@ def predict():
             },
         )
         return jsonify(response)
+    except TimeoutError as exc:
+        logger.warning("Prediction timed out (pipeline pool or model micro-batch): %s", exc)
+        audit_event(
+            "predict",
+            current_role(),
+            status="timeout",
+            detail="pipeline_timeout",
+            http_status=503,
+            request_id=request_id,
+        )
+        return (
+            jsonify({"error": "Prediction timed out, please retry", "status": "busy", "timestamp": iso_timestamp()}),
+            503,
+        )
     except Exception as exc:  # pragma: no cover
         logger.error("Prediction error: %s", exc)
         audit_event(
@@ -86,7 +110,7 @@ def predict():
                     "error": "Internal server error during prediction",
                     "details": str(exc) if current_app and current_app.debug else "An unexpected error occurred",
                     "status": "error",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": iso_timestamp(),
                 }
             ),
             500,
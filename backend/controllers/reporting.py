@@ -1,20 +1,52 @@
 from __future__ import annotations
 
 import os
-import traceback
-from datetime import datetime
+import tempfile
+import time
+from collections import ChainMap
+from typing import Any, BinaryIO, Callable, Dict
 
 from flask import current_app, jsonify, request, send_file
 
+from core.constants import risk_level_for
 from core.settings import logger, rate_limit
-from core.security import audit_event, current_role, get_request_id, require_role
-from services import diagnostic_system
+from core.security import audit_event, current_role, get_request_id, require_role, verify_risk
+from services import diagnostic_system, get_cached_analysis, run_cached_diagnostic_pipeline
 from services import html_report
+from services.workers import run_blocking
 
 from . import api_bp
 
 
 PDF_RATE_LIMIT = os.getenv("PDF_RATE_LIMIT", "60/minute")
+PDF_RENDERER = os.getenv("PDF_RENDERER", "fpdf").lower()
+
+
+def _as_dict(value: Any) -> Dict[str, Any] | None:
+    return value if isinstance(value, dict) else None
+
+
+def _report_file() -> BinaryIO:
+    """Anonymous file for one report: a memfd on Linux, otherwise an already-unlinked temp file.
+
+    Either way it is a real descriptor (so the WSGI server can sendfile(2) it)
+    that never touches a directory and disappears once the response closes it.
+    """
+    if hasattr(os, "memfd_create"):
+        return os.fdopen(os.memfd_create("diagnoai-report", os.MFD_CLOEXEC), "w+b")
+    return tempfile.TemporaryFile(prefix="diagnoai-report-", suffix=".pdf")
+
+
+def _render_report_file(write: Callable[[BinaryIO], None]) -> BinaryIO:
+    """Have ``write`` render the report into a fresh anonymous file, rewound for sending."""
+    output = _report_file()
+    try:
+        run_blocking(write, output)
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+    return output
 
 
 @api_bp.route("/report", methods=["POST"])
@@ -24,7 +56,8 @@ def download_report():
     """Generate a PDF report that summarizes the diagnostic results."""
     request_id = get_request_id()
     try:
-        if not request.json:
+        payload = request.get_json(silent=True)
+        if not payload or not isinstance(payload, dict):
             audit_event(
                 "report",
                 current_role(),
@@ -35,15 +68,37 @@ def download_report():
             )
             return jsonify({"error": "No JSON data provided", "status": "validation_error"}), 400
 
-        payload = request.json
-        patient_values = (
-            payload.get("patient_values")
-            or payload.get("patientValues")
-            or payload.get("patient")
+        # Each source is type-checked once here; below, None means "not supplied".
+        patient_values = _as_dict(
+            payload.get("patient_values") or payload.get("patientValues") or payload.get("patient")
         )
-        analysis_data = payload.get("analysis") or payload.get("result")
+        analysis_data = _as_dict(payload.get("analysis") or payload.get("result"))
+        client_analysis = analysis_data is not None
+        if analysis_data is None:
+            analysis_data = get_cached_analysis(payload.get("analysis_id"))
+            if analysis_data is not None and patient_values is None:
+                patient_values = _as_dict(analysis_data.get("patient_values"))
+        if analysis_data is None and patient_values is not None:
+            # Patient values alone: reuse the /api/predict analysis for them (or
+            # compute it once) instead of requiring the client to echo it back.
+            # patient_values belongs to this request's parsed body, so it is extended in place.
+            # Top-level fields win; otherwise whatever the client put in the patient dict stays.
+            patient_values["language"] = payload.get("language") or patient_values.get("language") or "en"
+            patient_values["client_type"] = payload.get("client_type") or patient_values.get("client_type") or "patient"
+            analysis_data, error_payload, status_code = run_cached_diagnostic_pipeline(patient_values)
+            if analysis_data is None:
+                audit_event(
+                    "report",
+                    current_role(),
+                    status="validation_error",
+                    detail=(error_payload or {}).get("error", "validation_error"),
+                    http_status=status_code,
+                    request_id=request_id,
+                )
+                return jsonify(error_payload), status_code
+            patient_values = analysis_data["patient_values"]
 
-        if not isinstance(patient_values, dict) or not isinstance(analysis_data, dict):
+        if patient_values is None or analysis_data is None:
             audit_event(
                 "report",
                 current_role(),
@@ -57,39 +112,56 @@ def download_report():
                     {
                         "error": "Missing report context",
                         "status": "validation_error",
-                        "details": "patient (or patient_values) and analysis (or result) are required.",
+                        "details": (
+                            "patient (or patient_values) or a recent analysis_id is required."
+                        ),
                     }
                 ),
                 400,
             )
 
-        # Normalize expected keys
-        analysis = dict(analysis_data)
-        language = str(payload.get("language") or analysis.get("language") or "en").lower()
-        analysis.setdefault("language", language)
-        if "ai_explanation" not in analysis and "aiExplanation" in payload:
-            analysis["ai_explanation"] = payload["aiExplanation"]
-        if "risk_level" not in analysis:
+        # Normalize expected keys. Missing ones are layered over the analysis rather
+        # than copying it; a cached analysis is shared and must not be mutated.
+        overrides: Dict[str, Any] = {}
+        language = str(payload.get("language") or analysis_data.get("language") or "en").lower()
+        if "language" not in analysis_data:
+            overrides["language"] = language
+        if "ai_explanation" not in analysis_data and "aiExplanation" in payload:
+            overrides["ai_explanation"] = payload["aiExplanation"]
+        # A client-supplied risk level is used as-is only when it carries our
+        # /api/predict signature (RISK_SIGNING_KEY); otherwise it is derived from
+        # the probability. Cached analyses are server-side and always trusted.
+        if "risk_level" not in analysis_data or (
+            client_analysis
+            and not verify_risk(
+                analysis_data.get("probability"), analysis_data["risk_level"], analysis_data.get("risk_signature")
+            )
+        ):
             try:
-                prob = float(analysis.get("probability", 0))
+                prob = float(analysis_data.get("probability", 0))
             except (TypeError, ValueError):
                 prob = 0.0
-            analysis["risk_level"] = "High" if prob > 0.7 else "Moderate" if prob > 0.3 else "Low"
-
-        pdf_renderer = os.getenv("PDF_RENDERER", "fpdf").lower()
+            overrides["risk_level"] = risk_level_for(prob)
+        analysis = ChainMap(overrides, analysis_data) if overrides else analysis_data
 
+        # Reports are written to an anonymous file and served from its descriptor, so
+        # the WSGI server can hand it to sendfile(2) instead of copying a buffer.
         report = None
-        if pdf_renderer != "fpdf":
+        if PDF_RENDERER != "fpdf":
             try:
-                report = html_report.generate_pdf(patient_values, analysis, language)
+                report = _render_report_file(
+                    lambda output: html_report.write_pdf(patient_values, analysis, language, output)
+                )
             except Exception as exc:
                 logger.warning("Playwright PDF failed (%s); falling back to FPDF renderer", exc)
 
         if report is None:
-            report = diagnostic_system.generate_pdf_report(patient_values, analysis)
+            report = _render_report_file(
+                lambda output: diagnostic_system.write_pdf_report(patient_values, analysis, output)
+            )
 
         lang_suffix = "ru" if language.startswith("ru") else "en"
-        filename = f"diagnoai-pancreas-report-{lang_suffix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.pdf"
+        filename = f"diagnoai-pancreas-report-{lang_suffix}-{time.strftime('%Y%m%d-%H%M%S')}.pdf"
         audit_event(
             "report",
             current_role(),
@@ -102,15 +174,29 @@ def download_report():
                 "patient_fields": len(patient_values or {}),
             },
         )
-        return send_file(
+        response = send_file(
             report,
             mimetype="application/pdf",
             as_attachment=True,
             download_name=filename,
+            conditional=True,
+        )
+        # send_file only knows the size of paths and BytesIO; without it the body would be chunked.
+        response.content_length = os.fstat(report.fileno()).st_size
+        return response
+    except TimeoutError as exc:
+        logger.warning("Report generation timed out (pipeline pool or model micro-batch): %s", exc)
+        audit_event(
+            "report",
+            current_role(),
+            status="timeout",
+            detail="pipeline_timeout",
+            http_status=503,
+            request_id=request_id,
         )
+        return jsonify({"error": "Report generation timed out, please retry", "status": "busy"}), 503
     except Exception as exc:  # pragma: no cover
-        logger.error("Report generation error: %s", exc)
-        logger.error(traceback.format_exc())
+        logger.exception("Report generation error: %s", exc)
         audit_event(
             "report",
             current_role(),
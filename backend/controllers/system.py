@@ -1,48 +1,87 @@
 from __future__ import annotations
 
-from datetime import datetime
+import hashlib
+from typing import Any, Callable, Dict, List, Tuple
 
-from flask import jsonify
+from flask import current_app, request
 
 from core.constants import FEATURE_DEFAULTS, FEATURE_LABELS
-from services import diagnostic_system, groq_client
+from services import ai_client_configured, diagnostic_system
 from services.model_engine import FEATURE_NAMES, FEATURE_ORDER
+from utils.timing import iso_timestamp
 
 from . import api_bp
 
+# These payloads only change when the model is reloaded, so each is serialized
+# once and served as bytes; the timestamp is spliced in per request. The weak
+# ETag covers everything but the timestamp, so probes that revalidate with
+# If-None-Match get an empty 304.
+_TIMESTAMP_SLOT = "\x00timestamp\x00"
+_cached_bodies: Dict[str, Tuple[List[bytes], str]] = {}
+
+
+def _invalidate_cached_bodies() -> None:
+    _cached_bodies.clear()
+
+
+diagnostic_system.reload_hooks.append(_invalidate_cached_bodies)
+
+
+def _cached_json(name: str, build: Callable[[], Dict[str, Any]]):
+    cached = _cached_bodies.get(name)
+    if cached is None:
+        json = current_app.json
+        slot = json.dumps(_TIMESTAMP_SLOT).encode("utf-8")
+        parts = json.response(build()).get_data().split(slot)
+        cached = parts, hashlib.md5(b"".join(parts)).hexdigest()
+        _cached_bodies[name] = cached
+    parts, etag = cached
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        if len(parts) > 1:
+            timestamp = current_app.json.dumps(iso_timestamp()).encode("utf-8")
+            body = timestamp.join(parts)
+        else:
+            body = parts[0]
+        response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    return response
+
 
 @api_bp.route("/health", methods=["GET"])
 def health():
     """Lightweight health check."""
-    return jsonify(
-        {
+    return _cached_json(
+        "health",
+        lambda: {
             "status": "ok",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _TIMESTAMP_SLOT,
             "model_loaded": diagnostic_system.model is not None,
-            "ai_client_available": groq_client is not None,
-        }
+            "ai_client_available": ai_client_configured(),
+        },
     )
 
 
 @api_bp.route("/status", methods=["GET"])
 def system_status():
     """System status with feature metadata for UIs."""
-    feature_defaults = {key: default for key, default in FEATURE_DEFAULTS}
-    return jsonify(
-        {
+    return _cached_json(
+        "status",
+        lambda: {
             "status": "ok",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _TIMESTAMP_SLOT,
             "model_loaded": diagnostic_system.model is not None,
             "model_metrics": diagnostic_system.model_metrics,
-            "ai_commentary": groq_client is not None,
+            "ai_commentary": ai_client_configured(),
             "features": {
                 "order": FEATURE_ORDER,
                 "names": FEATURE_NAMES,
-                "defaults": feature_defaults,
+                "defaults": {key: default for key, default in FEATURE_DEFAULTS},
                 "labels": FEATURE_LABELS.get("en", {}),
             },
             "guidelines": diagnostic_system.guideline_snapshot(),
-        }
+        },
     )
 
 
@@ -50,14 +89,14 @@ def system_status():
 @api_bp.route("/model", methods=["GET"])  # legacy alias
 def model_info():
     """Expose model metadata and metrics."""
-    metrics = diagnostic_system.model_metrics
-    return jsonify(
-        {
+    return _cached_json(
+        "model_info",
+        lambda: {
             "model_name": "Random Forest Classifier v2.1.0",
             "model_loaded": diagnostic_system.model is not None,
             "feature_count": len(FEATURE_ORDER),
             "features": FEATURE_NAMES,
-            "metrics": metrics,
+            "metrics": diagnostic_system.model_metrics,
             "guidelines": diagnostic_system.guideline_snapshot(),
-        }
+        },
     )
@@ -0,0 +1,24 @@
+"""Process and thread counts shared by the Gunicorn config and the in-process pools."""
+
+from __future__ import annotations
+
+import os
+
+__all__ = ["CPU_COUNT", "default_pipeline_workers", "default_web_concurrency"]
+
+CPU_COUNT = os.cpu_count() or 1
+
+
+def default_web_concurrency() -> int:
+    """Gunicorn worker processes when ``WEB_CONCURRENCY`` is unset."""
+    return CPU_COUNT * 2 + 1
+
+
+def default_pipeline_workers() -> int:
+    """Pipeline threads per process when ``PIPELINE_WORKERS`` is unset.
+
+    Every server process runs its own pool, so the cores are split between the
+    ``WEB_CONCURRENCY`` processes (one when unset, as under ``flask run``).
+    """
+    processes = int(os.getenv("WEB_CONCURRENCY") or "1")
+    return max(1, CPU_COUNT // max(1, processes))
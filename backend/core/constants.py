@@ -1,5 +1,10 @@
 from __future__ import annotations
-from typing import Any, Dict
+
+import math
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
 
 FEATURE_DEFAULTS = [
     ("wbc", 5.8),
@@ -18,22 +23,52 @@ FEATURE_DEFAULTS = [
 ]
 
 
-def rebuild_feature_vector(values: Dict[str, Any] | None) -> list[float]:
-    """Reconstruct feature vector in canonical order from a mapping of patient values."""
-    vector: list[float] = []
-    for key, default in FEATURE_DEFAULTS:
-        if not values:
-            vector.append(float(default))
-            continue
-        raw_value = values.get(key)
-        if raw_value is None:
-            vector.append(float(default))
-            continue
-        try:
-            vector.append(float(raw_value))
-        except (TypeError, ValueError):
-            vector.append(float(default))
-    return vector
+# Probability cut-offs between risk levels; a probability equal to a cut-off stays in the lower level.
+RISK_THRESHOLDS = (0.3, 0.7)
+RISK_LEVELS = ("Low", "Moderate", "High")
+
+
+def risk_level_for(probability: float) -> str:
+    """Map a model probability onto its risk level label."""
+    return RISK_LEVELS[bisect_left(RISK_THRESHOLDS, probability)]
+
+
+# float64 on purpose: as float32 the cut-offs would round and move the boundaries.
+_RISK_THRESHOLD_ARRAY = np.array(RISK_THRESHOLDS, dtype=np.float64)
+
+
+def risk_levels_for(probabilities: Sequence[float]) -> List[str]:
+    """:func:`risk_level_for` over many probabilities with one ``searchsorted`` call."""
+    indices = np.searchsorted(_RISK_THRESHOLD_ARRAY, np.asarray(probabilities, dtype=np.float64), side="left")
+    return [RISK_LEVELS[idx] for idx in indices.tolist()]
+
+
+# FEATURE_DEFAULTS split into parallel, read-only columns in canonical feature order
+FEATURE_KEYS = tuple(key for key, _ in FEATURE_DEFAULTS)
+DEFAULT_VECTOR = np.array([default for _, default in FEATURE_DEFAULTS], dtype=np.float64)
+DEFAULT_VECTOR.flags.writeable = False
+
+
+def _coerce_or_nan(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def rebuild_feature_vector(values: Dict[str, Any] | None) -> np.ndarray:
+    """Reconstruct feature vector in canonical order from a mapping of patient values.
+
+    Missing or non-numeric values fall back to the feature's default.
+    """
+    if not values:
+        return DEFAULT_VECTOR.copy()
+    vector = np.fromiter(
+        (_coerce_or_nan(values.get(key)) for key in FEATURE_KEYS),
+        dtype=np.float64,
+        count=len(FEATURE_KEYS),
+    )
+    return np.where(np.isnan(vector), DEFAULT_VECTOR, vector)
 
 
 FEATURE_LABELS = {
@@ -0,0 +1,61 @@
+"""orjson-backed JSON provider for Flask responses and request parsing."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
+__all__ = ["OrJSONProvider", "dumps_bytes", "orjson"]
+
+_BASE_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON as bytes, for bodies assembled without a ``str`` round-trip."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_BASE_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class OrJSONProvider(DefaultJSONProvider):
+    """Serialize with orjson (numpy-aware, UTF-8, unsorted keys).
+
+    Calls that pass stdlib-only ``json`` options (e.g. ``cls``) fall back to the
+    default provider so behaviour stays compatible for extensions.
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+
+    def _options(self, indent: Any = None) -> int:
+        return _BASE_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        indent = kwargs.pop("indent", None)
+        kwargs.pop("separators", None)
+        if kwargs:
+            return super().dumps(obj, indent=indent, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options(indent)).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(
+            obj,
+            default=self.default,
+            option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE,
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -1,21 +1,28 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import logging
 import os
 import uuid
 from functools import wraps
 from typing import Iterable, Optional
-from datetime import datetime
 
 from flask import Response, g, jsonify, request
 
+from core.json_provider import orjson
+from utils.log_queue import queued_handler
+from utils.timing import utc_timestamp
+
 __all__ = [
     "require_role",
     "audit_event",
     "current_role",
     "get_request_id",
     "init_security",
+    "sign_risk",
+    "verify_risk",
 ]
 
 # Default roles that can be assigned to API keys
@@ -160,6 +167,33 @@ def require_role(allowed_roles: Iterable[str]):
     return decorator
 
 
+def _risk_signing_key() -> bytes:
+    return os.getenv("RISK_SIGNING_KEY", "").encode("utf-8")
+
+
+def sign_risk(probability: float, risk_level: str) -> Optional[str]:
+    """HMAC over the probability/risk_level pair /api/predict returns, or ``None`` without ``RISK_SIGNING_KEY``."""
+    key = _risk_signing_key()
+    if not key:
+        return None
+    message = f"{float(probability)!r}|{risk_level}".encode("utf-8")
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
+def verify_risk(probability: object, risk_level: object, signature: object) -> bool:
+    """Whether ``signature`` is ours for exactly this probability and risk level.
+
+    Fails closed: nothing verifies while ``RISK_SIGNING_KEY`` is unset.
+    """
+    if not isinstance(signature, str) or not isinstance(risk_level, str):
+        return False
+    try:
+        expected = sign_risk(probability, risk_level)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return False
+    return expected is not None and hmac.compare_digest(expected, signature)
+
+
 def _build_audit_logger() -> logging.Logger:
     """Create a dedicated audit logger writing JSON lines to disk."""
     logger_name = "diagnoai_audit"
@@ -173,7 +207,7 @@ def _build_audit_logger() -> logging.Logger:
     )
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
 
-    handler = logging.FileHandler(log_path)
+    handler = queued_handler(logging.FileHandler(log_path))
     handler.setFormatter(logging.Formatter("%(message)s"))
 
     existing.setLevel(logging.INFO)
@@ -185,6 +219,12 @@ def _build_audit_logger() -> logging.Logger:
 _audit_logger = _build_audit_logger()
 
 
+def _dumps(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False)
+
+
 def audit_event(
     action: str,
     role: str,
@@ -195,8 +235,10 @@ def audit_event(
     extra: Optional[dict] = None,
 ) -> None:
     """Emit a structured audit log line without storing PHI."""
+    if not _audit_logger.isEnabledFor(logging.INFO):
+        return
     payload = {
-        "ts": datetime.utcnow().isoformat() + "Z",
+        "ts": utc_timestamp(),
         "action": action,
         "role": role,
         "status": status,
@@ -210,7 +252,7 @@ def audit_event(
     if extra:
         payload.update(extra)
     try:
-        _audit_logger.info(json.dumps(payload, ensure_ascii=False))
+        _audit_logger.info(_dumps(payload))
     except Exception:
         # Failing silently keeps runtime stable; regular app logger still captures server logs.
         pass
@@ -218,6 +260,10 @@ def audit_event(
 
 def init_security(app) -> None:
     """Attach request/response hooks for correlation ids."""
+    if not _risk_signing_key():
+        logging.getLogger(__name__).warning(
+            "RISK_SIGNING_KEY is not set: /api/report recomputes every client-supplied risk level"
+        )
 
     @app.before_request
     def _attach_request_context():
@@ -1,11 +1,12 @@
 import logging
 import os
 
-from flask import Flask
-from flask_cors import CORS
+from flask import Flask, request
 from dotenv import load_dotenv
 
+from core.json_provider import OrJSONProvider, orjson
 from core.security import init_security
+from utils.log_queue import queued_handler
 
 try:
     from flask_limiter import Limiter
@@ -15,28 +16,67 @@ except Exception:  # pragma: no cover
 
 __all__ = ["app", "logger", "rate_limit"]
 
+# Under gunicorn the file was already loaded by gunicorn_conf.py; this covers
+# `python app.py` and `flask run`.
 load_dotenv()
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[queued_handler(logging.StreamHandler())],
 )
 logger = logging.getLogger(__name__)
 
+# Opt-in oneDAL dispatch for scikit-learn estimators; it has to be in place before
+# the model is unpickled. Only forests trained under the patch (and so pickled as
+# sklearnex estimators) run their predict_proba in oneDAL.
+if os.getenv("USE_SKLEARNEX", "0") == "1":
+    try:
+        from sklearnex import patch_sklearn
+
+        patch_sklearn()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("USE_SKLEARNEX=1 but scikit-learn-intelex is unavailable: %s", exc)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrJSONProvider(app)
 app.config["JSON_SORT_KEYS"] = False
 app.config["JSON_AS_ASCII"] = False
 app.config["MAX_CONTENT_LENGTH"] = 1 * 1024 * 1024
 
-CORS(
-    app,
-    origins=[
+# CORS for the local frontends, as flask-cors answered it: allowed origins are
+# matched case-insensitively and echoed back, preflights may request any header
+# and method. Requests without an Origin header get no CORS headers.
+_CORS_ORIGINS = frozenset(
+    {
         "http://localhost:3000",
         "http://localhost:5173",
         "http://127.0.0.1:3000",
         "http://127.0.0.1:5173",
-    ],
+    }
 )
+_CORS_METHODS = "DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+_CORS_METHOD_SET = frozenset(_CORS_METHODS.split(", "))
+
+
+@app.after_request
+def _add_cors_headers(response):
+    origin = request.headers.get("Origin")
+    if not origin or origin.lower() not in _CORS_ORIGINS:
+        return response
+    headers = response.headers
+    headers.add("Access-Control-Allow-Origin", origin)
+    preflight_method = request.headers.get("Access-Control-Request-Method", "").upper()
+    if request.method == "OPTIONS" and preflight_method in _CORS_METHOD_SET:
+        requested = request.headers.get("Access-Control-Request-Headers")
+        if requested:
+            allowed = ", ".join(sorted(name.strip() for name in requested.split(",")))
+            headers.add("Access-Control-Allow-Headers", allowed)
+        headers.add("Access-Control-Allow-Methods", _CORS_METHODS)
+    headers.add("Vary", "Origin")
+    return response
+
 
 init_security(app)
 
@@ -0,0 +1,102 @@
+"""Export the trained random forest to ONNX for ONNX Runtime inference.
+
+Usage (from the backend directory, after training)::
+
+    pip install skl2onnx onnxruntime
+    python export_onnx.py [models/random_forest.pkl] [models/random_forest.onnx] [calibration.csv]
+
+The scaler stays in Python (see ``MedicalDiagnosticSystem._scale_rows``); only
+the estimator is converted, with ZipMap disabled so the session returns a plain
+``(n, classes)`` probability matrix.
+
+The ONNX tree ensemble stores split thresholds and leaf probabilities as
+float32, half the footprint of the float64 scikit-learn trees. When a
+calibration CSV is given (one column per model feature, same names as the API
+payload, plus an optional 0/1 ``label`` column), the export is checked against
+scikit-learn on those rows and deleted again if ROC-AUC drops by more than
+``MAX_AUC_DELTA`` (or, without labels, if any prediction flips). The backend
+then keeps serving the float64 model.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import sys
+from typing import Optional, Tuple
+
+import joblib
+import numpy as np
+
+from core.constants import FEATURE_DEFAULTS
+from services.model_engine import _scaler_affine
+
+MAX_AUC_DELTA = 0.001
+
+
+def _load_calibration(csv_path: str, scaler) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    with open(csv_path, newline="", encoding="utf-8-sig") as handle:
+        records = list(csv.DictReader(handle))
+    rows = np.array([[float(row[key]) for key, _ in FEATURE_DEFAULTS] for row in records], dtype=np.float64)
+    labels = np.array([int(float(row["label"])) for row in records]) if records and "label" in records[0] else None
+    if scaler is not None:
+        affine = _scaler_affine(scaler)
+        rows = (rows - affine[0]) / affine[1] if affine is not None else scaler.transform(rows)
+    return rows, labels
+
+
+def _parity_ok(reference: np.ndarray, exported: np.ndarray, labels: Optional[np.ndarray]) -> bool:
+    flips = int(np.sum((reference[:, 1] > 0.5) != (exported[:, 1] > 0.5)))
+    print(f"  max probability difference: {float(np.max(np.abs(exported - reference))):.2e}")
+    print(f"  predictions flipped: {flips} of {reference.shape[0]}")
+    if labels is None or len(np.unique(labels)) < 2:
+        return flips == 0
+
+    from sklearn.metrics import roc_auc_score
+
+    delta = roc_auc_score(labels, reference[:, 1]) - roc_auc_score(labels, exported[:, 1])
+    print(f"  ROC-AUC change: {0.0 - delta:+.5f}")
+    return delta <= MAX_AUC_DELTA
+
+
+def export(
+    model_path: str = "models/random_forest.pkl",
+    onnx_path: str = "models/random_forest.onnx",
+    calibration_csv: Optional[str] = None,
+) -> bool:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    model_data = joblib.load(model_path)
+    model = model_data["model"]
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("input", FloatTensorType([None, model.n_features_in_]))],
+        options={id(model): {"zipmap": False}},
+        target_opset=15,
+    )
+    with open(onnx_path, "wb") as handle:
+        handle.write(onnx_model.SerializeToString())
+    onnx_mb, model_mb = os.path.getsize(onnx_path) / 1e6, os.path.getsize(model_path) / 1e6
+    print(f"Wrote {onnx_path} ({onnx_mb:.2f} MB; {model_path}: {model_mb:.2f} MB)")
+
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        print("Install onnxruntime to verify the export")
+        return calibration_csv is None
+    if calibration_csv:
+        probe, labels = _load_calibration(calibration_csv, model_data.get("scaler"))
+    else:
+        probe, labels = np.random.default_rng(0).normal(size=(256, model.n_features_in_)), None
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    onnx_proba = session.run(None, {"input": probe.astype(np.float32)})[1]
+    if _parity_ok(model.predict_proba(probe), onnx_proba, labels) or not calibration_csv:
+        return True
+    os.remove(onnx_path)
+    print(f"Removed {onnx_path}: calibration parity failed, the float64 model stays in use")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if export(*sys.argv[1:4]) else 1)
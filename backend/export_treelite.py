@@ -0,0 +1,59 @@
+"""Compile the trained random forest to a native library with Treelite.
+
+Usage (from the backend directory, after training; needs a C compiler)::
+
+    pip install treelite tl2cgen
+    python export_treelite.py [models/random_forest.pkl] [models/random_forest.so] [calibration.csv]
+
+TL2cgen turns every tree into straight-line C, so scoring walks no node arrays
+at all. The scaler stays in Python, as for the ONNX export. The library is
+checked against scikit-learn the same way export_onnx.py checks its export
+(including the optional calibration CSV) and deleted again if parity fails.
+When present and current, the backend prefers it over ONNX Runtime.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import Optional
+
+import joblib
+import numpy as np
+
+from export_onnx import _load_calibration, _parity_ok
+from services.model_engine import _treelite_predict_proba
+
+
+def export(
+    model_path: str = "models/random_forest.pkl",
+    lib_path: str = "models/random_forest.so",
+    calibration_csv: Optional[str] = None,
+) -> bool:
+    import tl2cgen
+    import treelite
+
+    model_data = joblib.load(model_path)
+    model = model_data["model"]
+    tl2cgen.export_lib(
+        treelite.sklearn.import_model(model),
+        toolchain="gcc",
+        libpath=lib_path,
+        params={"parallel_comp": os.cpu_count() or 1},
+    )
+    print(f"Wrote {lib_path} ({os.path.getsize(lib_path) / 1e6:.2f} MB)")
+
+    if calibration_csv:
+        probe, labels = _load_calibration(calibration_csv, model_data.get("scaler"))
+    else:
+        probe, labels = np.random.default_rng(0).normal(size=(256, model.n_features_in_)), None
+    predictor = tl2cgen.Predictor(lib_path, nthread=1)
+    if _parity_ok(model.predict_proba(probe), _treelite_predict_proba(predictor, probe), labels):
+        return True
+    os.remove(lib_path)
+    print(f"Removed {lib_path}: parity with scikit-learn failed")
+    return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if export(*sys.argv[1:4]) else 1)
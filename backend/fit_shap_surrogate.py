@@ -0,0 +1,71 @@
+"""Fit the linear SHAP surrogate served when exact explanations are not requested.
+
+Usage (from the backend directory, after training)::
+
+    python fit_shap_surrogate.py training_rows.csv [models/random_forest.pkl] [models/shap_surrogate.npz]
+
+The CSV needs one column per model feature (same names as the API payload).
+Exact tree SHAP values are computed once for every row, and a least-squares map
+``shap ~= scaled_features @ weights + bias`` is fitted and saved. The per-feature
+R^2 and the top-5 driver agreement are printed; only deploy a surrogate whose
+fit is acceptable for the intended audience.
+"""
+
+from __future__ import annotations
+
+import csv
+import sys
+
+import joblib
+import numpy as np
+
+from core.constants import FEATURE_DEFAULTS
+from services.model_engine import _positive_class_contributions, _scaler_affine
+
+
+def fit(
+    csv_path: str,
+    model_path: str = "models/random_forest.pkl",
+    surrogate_path: str = "models/shap_surrogate.npz",
+) -> None:
+    import shap
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as handle:
+        rows = np.array(
+            [[float(row[key]) for key, _ in FEATURE_DEFAULTS] for row in csv.DictReader(handle)],
+            dtype=np.float64,
+        )
+
+    model_data = joblib.load(model_path)
+    model, scaler = model_data["model"], model_data.get("scaler")
+    if scaler is None:
+        scaled = rows
+    else:
+        affine = _scaler_affine(scaler)
+        scaled = (rows - affine[0]) / affine[1] if affine is not None else scaler.transform(rows)
+
+    explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
+    exact = _positive_class_contributions(explainer.shap_values(scaled, check_additivity=False))
+
+    design = np.hstack([scaled, np.ones((scaled.shape[0], 1))])
+    solution, *_ = np.linalg.lstsq(design, exact, rcond=None)
+    weights, bias = solution[:-1], solution[-1]
+    np.savez(surrogate_path, weights=weights, bias=bias)
+
+    approx = scaled @ weights + bias
+    residual = ((exact - approx) ** 2).sum(axis=0)
+    total = ((exact - exact.mean(axis=0)) ** 2).sum(axis=0)
+    r2 = 1.0 - residual / np.where(total > 0, total, 1.0)
+    top_exact = np.argsort(-np.abs(exact), axis=1)[:, :5]
+    top_approx = np.argsort(-np.abs(approx), axis=1)[:, :5]
+    agreement = np.mean([len(set(a) & set(b)) / 5.0 for a, b in zip(top_exact, top_approx)])
+    print(f"Wrote {surrogate_path} from {rows.shape[0]} rows")
+    for (key, _), score in zip(FEATURE_DEFAULTS, r2):
+        print(f"  {key:<10} R^2 = {score:.3f}")
+    print(f"Top-5 driver agreement: {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    fit(*sys.argv[1:4])
@@ -0,0 +1,48 @@
+"""Gunicorn settings for production deployments of the DiagnoAI backend.
+
+Run from ``backend/`` with ``gunicorn -c gunicorn_conf.py app:app``.
+"""
+
+from __future__ import annotations
+
+import os
+
+from dotenv import load_dotenv
+
+from core.concurrency import default_web_concurrency
+
+# Read .env here, in the master, before any setting below (or the preloaded app)
+# looks at the environment: WEB_CONCURRENCY, GUNICORN_* and PORT from the file
+# then take effect, and forked workers inherit the parsed values. The app's own
+# load_dotenv() leaves variables that are already set untouched.
+load_dotenv()
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Import the app (and load the model) once in the master; forked workers share
+# the estimator's pages copy-on-write instead of each unpickling their own copy.
+preload_app = True
+
+# Network I/O in flight during fork can leave inherited locks held in the
+# children, so the Groq connection is only warmed up inside each worker.
+os.environ.setdefault("GROQ_WARMUP", "fork")
+
+workers = int(os.getenv("WEB_CONCURRENCY") or default_web_concurrency())
+# Published before the app is preloaded so each worker's pipeline pool
+# (PIPELINE_WORKERS) defaults to its share of the cores, not all of them.
+os.environ["WEB_CONCURRENCY"] = str(workers)
+# Green-thread workers (gevent/eventlet) are not supported: monkey-patching would
+# break the Groq event-loop thread, the pipeline pool and the log listener.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class.rsplit(".", 1)[-1].lower().startswith(("gevent", "eventlet")):
+    raise RuntimeError(f"GUNICORN_WORKER_CLASS={worker_class} is not supported; use gthread")
+# A request thread spends most of its life waiting on Groq, and model/SHAP/PDF
+# work is already capped by the pipeline pool (PIPELINE_WORKERS), so threads are
+# cheap: each one mostly parks a slow commentary call, not a core.
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
@@ -1,10 +1,21 @@
 """Service layer modules such as the diagnostic system."""
 
 from .diagnostic_system import (
+    ai_client_configured,
+    cache_analysis,
     diagnostic_system,
-    groq_client,
+    get_cached_analysis,
+    run_cached_diagnostic_pipeline,
     run_diagnostic_pipeline,
 )
 from .batch import process_batch_csv
 
-__all__ = ["diagnostic_system", "groq_client", "run_diagnostic_pipeline", "process_batch_csv"]
+__all__ = [
+    "diagnostic_system",
+    "ai_client_configured",
+    "run_diagnostic_pipeline",
+    "run_cached_diagnostic_pipeline",
+    "cache_analysis",
+    "get_cached_analysis",
+    "process_batch_csv",
+]
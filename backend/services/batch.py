@@ -9,8 +9,10 @@ from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from core.constants import FEATURE_DEFAULTS
 from core.settings import logger
+from utils.text import encode_text_base64
+from .commentary import resolve_lang
 from .diagnostic_system import diagnostic_system
-from .pipeline import execute_diagnostic_pipeline
+from .pipeline import execute_diagnostic_pipelines, finish_commentary
 
 DEFAULT_MAX_RECORDS = int(os.getenv("MAX_BATCH_RECORDS", "250") or "250")
 
@@ -24,13 +26,18 @@ def _safe_float(value: Any, default: float) -> float:
         return float(default)
 
 
+# Accepted header casings per feature, spelled out once rather than per row
+_HEADER_CANDIDATES = tuple(
+    (key, (key, key.upper(), key.capitalize()), default) for key, default in FEATURE_DEFAULTS
+)
+
+
 def _normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
     normalized: Dict[str, Any] = {}
-    for key, default in FEATURE_DEFAULTS:
+    for key, candidates, default in _HEADER_CANDIDATES:
         value = None
-        # Accept multiple casings
-        for candidate in (key, key.upper(), key.capitalize()):
-            if candidate in row and row[candidate] not in (None, ""):
+        for candidate in candidates:
+            if row.get(candidate) not in (None, ""):
                 value = row[candidate]
                 break
         normalized[key] = _safe_float(value, default)
@@ -130,6 +137,8 @@ def process_batch_csv(
     errors: List[Dict[str, Any]] = []
     calibration_points: List[CalibrationPoint] = []
 
+    rows: List[Dict[str, Any]] = []
+    payloads: List[Dict[str, Any]] = []
     for idx, row in enumerate(reader, start=1):
         if idx > max_rows:
             raise ValueError(f"Row limit exceeded (max {max_rows})")
@@ -137,10 +146,13 @@ def process_batch_csv(
         payload = _normalize_row(row)
         payload["language"] = language
         payload["client_type"] = client_type
+        rows.append(row)
+        payloads.append(payload)
 
-        analysis, error_payload, status_code = execute_diagnostic_pipeline(
-            diagnostic_system, payload
-        )
+    # All rows are scored and explained in one model pass; commentary is only
+    # returned on request, and then fetched for all rows at once below.
+    outcomes = execute_diagnostic_pipelines(diagnostic_system, payloads)
+    for idx, (row, (analysis, error_payload, status_code)) in enumerate(zip(rows, outcomes), start=1):
         if status_code != 200 or not analysis:
             errors.append(
                 {
@@ -164,10 +176,21 @@ def process_batch_csv(
             "shap_values": analysis["shap_values"],
             "metrics": analysis.get("metrics", {}),
         }
-        if include_commentary:
-            result_row["ai_explanation_b64"] = analysis.get("ai_explanation_b64")
         results.append(result_row)
 
+    if include_commentary and results:
+        lang = resolve_lang(language)
+        commentaries = diagnostic_system.generate_clinical_commentaries(
+            [
+                (r["prediction"], r["probability"], r["shap_values"], list(r["patient_values"].values()))
+                for r in results
+            ],
+            language=lang,
+            client_type=client_type,
+        )
+        for result_row, text in zip(results, commentaries):
+            result_row["ai_explanation_b64"] = encode_text_base64(finish_commentary(text, lang))
+
     probabilities = [r["probability"] for r in results]
     risk_counts = Counter([r["risk_level"] for r in results])
     calibration = _calibration_curve(calibration_points)
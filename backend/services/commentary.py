@@ -1,33 +1,142 @@
 from __future__ import annotations
 
+import logging
 import os
-from typing import Any, Dict, List
+import re
+import threading
+from concurrent.futures import Future
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Sequence, Tuple
 
 from core.constants import (
     COMMENTARY_LOCALE,
     FEATURE_LABELS,
     RU_FEATURE_LABELS,
+    risk_level_for,
 )
 from core.settings import logger
+from utils.cache import LRUCache
 from utils.text import is_readable_russian, repair_text_encoding
 
-from .llm_client import groq_client
+from . import llm_client
+from .llm_client import gather_llm_coroutines, iter_llm_stream, run_llm_coroutine
+
+# LLM commentary keyed by rounded inputs so near-identical patients reuse one completion.
+llm_commentary_cache = LRUCache(maxsize=int(os.getenv("COMMENTARY_CACHE_SIZE", "4096") or "4096"))
+# Completions still waiting on Groq, by cache key, so duplicates arriving meanwhile
+# (double submits, client retries) wait for that answer instead of asking again.
+_inflight_commentaries: Dict[tuple, "Future[str]"] = {}
+_inflight_lock = threading.Lock()
+
+PROFESSIONAL_AUDIENCES = frozenset(
+    {
+        "doctor",
+        "clinician",
+        "provider",
+        "specialist",
+        "medical",
+        "hospital",
+        "physician",
+    }
+)
+SCIENTIST_AUDIENCES = frozenset({"scientist", "scientists", "researcher", "researchers"})
+
+
+class Lang(IntEnum):
+    """Commentary locale."""
+
+    EN = 0
+    RU = 1
+
+    @property
+    def code(self) -> str:
+        return self.name.lower()
+
+
+class Audience(IntEnum):
+    """Commentary audience; every level from PROFESSIONAL up gets the clinical layout."""
+
+    PATIENT = 0
+    PROFESSIONAL = 1
+    SCIENTIST = 2
+
+
+@lru_cache(maxsize=256)
+def _parse_lang(language: str) -> Lang:
+    return Lang.RU if language.strip().lower().startswith("ru") else Lang.EN
+
+
+@lru_cache(maxsize=256)
+def _parse_audience(client_type: str) -> Audience:
+    audience_key = _normalize_audience(client_type)
+    if audience_key in SCIENTIST_AUDIENCES:
+        return Audience.SCIENTIST
+    if audience_key in PROFESSIONAL_AUDIENCES:
+        return Audience.PROFESSIONAL
+    return Audience.PATIENT
 
-PROFESSIONAL_AUDIENCES = {
-    "doctor",
-    "clinician",
-    "provider",
-    "specialist",
-    "medical",
-    "hospital",
-    "physician",
-}
-SCIENTIST_AUDIENCES = {"scientist", "scientists", "researcher", "researchers"}
 
+def resolve_lang(language: Lang | str | None) -> Lang:
+    """Map a request's ``language`` onto :class:`Lang`; already-resolved values pass through."""
+    if isinstance(language, Lang):
+        return language
+    return _parse_lang(str(language or "en"))
 
-def _normalize_language(language: str | None) -> str:
-    value = str(language or "en").strip().lower()
-    return value or "en"
+
+def resolve_audience(client_type: Audience | str | None) -> Audience:
+    """Map a request's ``client_type`` onto :class:`Audience`; already-resolved values pass through."""
+    if isinstance(client_type, Audience):
+        return client_type
+    return _parse_audience(str(client_type or "patient"))
+
+
+# Positions in the feature vector of the labs PROMPT_TEMPLATE lists (WBC, PLT, glucose, bilirubin).
+_PROMPT_LAB_INDEXES = (0, 2, 10, 12)
+
+
+def _printed_or_raw(value: Any, spec: str) -> Any:
+    try:
+        return format(float(value), spec)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _commentary_cache_key(
+    lang: Lang,
+    audience: Audience,
+    prediction: int,
+    probability: float,
+    shap_values: List[Dict[str, Any]],
+    patient_data: List[float],
+) -> tuple:
+    """Cache and single-flight key for an LLM commentary.
+
+    Patient figures are keyed at the precision the prompt prints them: the risk
+    band picks the prompt template, the probability appears as ``.1%`` and the
+    prompt labs as ``.2f``. The other labs never reach the prompt.
+    """
+    drivers = tuple(
+        (str(sv.get("feature", "Unknown")), str(sv.get("impact", "neutral")))
+        for sv in shap_values[:5]
+        if isinstance(sv, dict)
+    )
+    labs = tuple(
+        _printed_or_raw(patient_data[idx], ".2f") if idx < len(patient_data) else None for idx in _PROMPT_LAB_INDEXES
+    )
+    try:
+        risk_level = risk_level_for(float(probability))
+    except (TypeError, ValueError):
+        risk_level = None
+    return (
+        lang,
+        audience,
+        int(prediction),
+        risk_level,
+        _printed_or_raw(probability, ".1%"),
+        drivers,
+        labs,
+    )
 
 
 def _normalize_audience(client_type: str | None) -> str:
@@ -35,21 +144,18 @@ def _normalize_audience(client_type: str | None) -> str:
     return value or "patient"
 
 
-def _select_audience_bundle(
-    locale_bundle: Dict[str, Any],
-    client_type: str,
-) -> tuple[Dict[str, Any], bool, bool]:
-    audience_key = _normalize_audience(client_type)
-    scientist_mode = audience_key in SCIENTIST_AUDIENCES
-    professional_mode = scientist_mode or audience_key in PROFESSIONAL_AUDIENCES
+def _locale_bundle(lang: Lang) -> Dict[str, Any]:
+    return COMMENTARY_LOCALE.get(lang.code, COMMENTARY_LOCALE["en"])
 
-    if scientist_mode:
+
+def _select_audience_bundle(locale_bundle: Dict[str, Any], audience: Audience) -> Dict[str, Any]:
+    if audience is Audience.SCIENTIST:
         audience_bundle = (
             locale_bundle.get("scientist")
             or locale_bundle.get("professional")
             or locale_bundle.get("patient", {})
         )
-    elif professional_mode:
+    elif audience is Audience.PROFESSIONAL:
         audience_bundle = locale_bundle.get("professional") or locale_bundle.get("patient", {})
     else:
         audience_bundle = (
@@ -58,32 +164,41 @@ def _select_audience_bundle(
             or locale_bundle.get("scientist", {})
         )
 
-    return audience_bundle or {}, professional_mode, scientist_mode
+    return audience_bundle or {}
 
 
-def _format_top_factor_lines(
-    shap_values: List[Dict[str, Any]],
-    audience_bundle: Dict[str, Any],
-    locale_code: str,
-) -> List[str]:
+@lru_cache(maxsize=512)
+def _factor_label(feature: str, locale_code: str) -> str:
+    """Display label of a SHAP feature name, resolved once per (feature, locale)."""
     if locale_code == "ru":
         feature_labels = RU_FEATURE_LABELS or FEATURE_LABELS.get("ru", FEATURE_LABELS["en"])
     else:
         feature_labels = FEATURE_LABELS["en"]
+    feature_key = feature.upper()
+    return feature_labels.get(feature_key, feature_key.replace("_", " ").title())
 
-    impact_terms = audience_bundle.get(
-        "impact_terms",
-        {"positive": "increases risk", "negative": "reduces risk", "neutral": "neutral contribution"},
-    )
+
+_DEFAULT_IMPACT_TERMS = {"positive": "increases risk", "negative": "reduces risk", "neutral": "neutral contribution"}
+
+
+def _format_top_factor_lines(
+    shap_values: List[Dict[str, Any]],
+    audience_bundle: Dict[str, Any],
+    locale_code: str,
+) -> List[str]:
+    impact_terms = audience_bundle.get("impact_terms", _DEFAULT_IMPACT_TERMS)
 
     lines: List[str] = []
     for shap_info in shap_values[:5]:
-        feature_key = str(shap_info.get("feature", "Feature")).upper()
-        label = feature_labels.get(feature_key, feature_key.replace("_", " ").title())
-        impact_key = str(shap_info.get("impact", "neutral")).lower()
-        if impact_key not in impact_terms:
-            impact_key = "neutral"
-        impact_phrase = impact_terms.get(impact_key, impact_terms.get("neutral", "neutral contribution"))
+        label = _factor_label(str(shap_info.get("feature", "Feature")), locale_code)
+        impact = shap_info.get("impact", "neutral")
+        # Explainer output is already lowercase; only client-supplied values need normalizing.
+        impact_phrase = impact_terms.get(impact) if isinstance(impact, str) else None
+        if impact_phrase is None:
+            impact_key = str(impact).lower()
+            if impact_key not in impact_terms:
+                impact_key = "neutral"
+            impact_phrase = impact_terms.get(impact_key, impact_terms.get("neutral", "neutral contribution"))
 
         raw_value = shap_info.get("value")
         try:
@@ -100,82 +215,18 @@ def _format_top_factor_lines(
     return lines
 
 
-def generate_clinical_commentary(
-    self,
-    prediction: int,
-    probability: float,
-    shap_values: List[Dict[str, Any]],
-    patient_data: List[float],
-    language: str = "en",
-    client_type: str = "patient",
-) -> str:
-    """Generate AI-powered clinical commentary tailored to the audience."""
-
-    language_code = _normalize_language(language)
-    audience_key = _normalize_audience(client_type)
-    locale_code = "ru" if language_code.startswith("ru") else "en"
-    locale_bundle = COMMENTARY_LOCALE.get(locale_code, COMMENTARY_LOCALE["en"])
-    audience_bundle, professional_mode, scientist_mode = _select_audience_bundle(locale_bundle, audience_key)
-
-    probability_label = audience_bundle.get(
-        "probability_label",
-        locale_bundle.get("probability_label", "Risk probability"),
-    )
-
-    risk_level = "High" if probability > 0.7 else "Moderate" if probability > 0.3 else "Low"
-    risk_label = locale_bundle.get("risk_labels", {}).get(risk_level, risk_level.upper())
-    header_text = audience_bundle.get("header_template", "CLINICAL DOSSIER | {risk} RISK").format(risk=risk_label)
-    response_structure = audience_bundle.get("outline_template", "{header}\n{probability_label}: <...>").format(
-        header=header_text,
-        probability_label=probability_label,
-    )
-
-    top_factors = [str(sv.get("feature", "Unknown")) for sv in shap_values[:5]]
-
-    # Prefer audience-specific language prompt (e.g., scientist) and fall back to locale-level prompt
-    language_instruction = audience_bundle.get(
-        "language_prompt",
-        locale_bundle.get("language_prompt", "Respond clearly and precisely."),
-    )
-
-    audience_instruction = audience_bundle.get("audience_guidance", "")
-    scientist_instruction = ""
-    if scientist_mode:
-        scientist_instruction = (
-            "You are tailoring the response for biomedical or translational researchers. "
-            "Highlight mechanisms of action, signaling pathways, biomarker trajectories, "
-            "clinical trial evidence, and sources of bias. Differentiate this guidance from clinician-facing "
-            "instructions by focusing on research implications, data interpretation, and mechanistic detail."
-        )
-
-    def _safe_patient_value(idx: int, default: float = 0.0) -> float:
-        try:
-            return float(patient_data[idx])
-        except (TypeError, ValueError, IndexError):
-            return default
-
-    if groq_client is not None:
-        top_factor_lines = "\n".join(
-            f"- {sv.get('feature', 'Unknown')}: {sv.get('value', 0.0)} ({sv.get('impact', 'neutral')} impact)"
-            for sv in shap_values[:5]
-        )
-        wbc = _safe_patient_value(0, 5.8)
-        plt = _safe_patient_value(2, 184.0)
-        bilirubin = _safe_patient_value(12, 17.0)
-        glucose = _safe_patient_value(10, 6.3)
-
-        prompt = f"""
+PROMPT_TEMPLATE = """
 You are a medical AI assistant analyzing a pancreatic cancer risk assessment.
 
-MODEL PREDICTION: {'High Risk - Additional Evaluation Required' if prediction == 1 else 'Low Risk Screen'}
+MODEL PREDICTION: {prediction_text}
 RISK PROBABILITY: {probability:.1%}
 RISK LEVEL: {risk_level}
 HEADER TO USE: {header_text}
 PROBABILITY LABEL: {probability_label}
-TOP CONTRIBUTORS: {', '.join(top_factors) or 'None supplied'}
+TOP CONTRIBUTORS: {top_factors}
 
 TOP CONTRIBUTING FACTORS:
-{top_factor_lines or 'No SHAP factors available'}
+{top_factor_lines}
 
 PATIENT LAB VALUES:
 - WBC: {wbc:.2f}
@@ -192,56 +243,397 @@ Be accurate, align with audience expectations, state that this is a screening ai
 End with a concise reminder that definitive care decisions rest with the treating medical team.
 """
 
+SCIENTIST_PROMPT_INSTRUCTION = (
+    "You are tailoring the response for biomedical or translational researchers. "
+    "Highlight mechanisms of action, signaling pathways, biomarker trajectories, "
+    "clinical trial evidence, and sources of bias. Differentiate this guidance from clinician-facing "
+    "instructions by focusing on research implications, data interpretation, and mechanistic detail."
+)
+
+
+async def _request_llm_commentary(client: Any, prompt: str) -> str:
+    """Await a single Groq chat completion on the shared LLM event loop."""
+    response = await client.chat.completions.create(
+        model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        max_tokens=600,
+    )
+    return response.choices[0].message.content or ""
+
+
+async def _stream_llm_commentary(client: Any, prompt: str) -> AsyncIterator[str]:
+    """Yield completion text deltas as Groq produces them."""
+    stream = await client.chat.completions.create(
+        model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        max_tokens=600,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+class _PromptSlot:
+    """Formats back to its own ``{name:spec}`` placeholder, leaving the field for the per-call fill."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __format__(self, spec: str) -> str:
+        return "{" + self.name + (":" + spec if spec else "") + "}"
+
+
+_PROMPT_DYNAMIC_FIELDS = (
+    "prediction_text",
+    "probability",
+    "top_factors",
+    "top_factor_lines",
+    "wbc",
+    "plt",
+    "bilirubin",
+    "glucose",
+)
+
+
+def _compile_prompt_template(lang: Lang, audience: Audience, risk_level: str) -> str:
+    """Resolve every audience- and risk-specific part of PROMPT_TEMPLATE ahead of time."""
+    locale_bundle = _locale_bundle(lang)
+    audience_bundle = _select_audience_bundle(locale_bundle, audience)
+
+    probability_label = audience_bundle.get(
+        "probability_label",
+        locale_bundle.get("probability_label", "Risk probability"),
+    )
+    risk_label = locale_bundle.get("risk_labels", {}).get(risk_level, risk_level.upper())
+    header_text = audience_bundle.get("header_template", "CLINICAL DOSSIER | {risk} RISK").format(
+        risk=risk_label
+    )
+    static_fields = {
+        "risk_level": risk_level,
+        "header_text": header_text,
+        "probability_label": probability_label,
+        "response_structure": audience_bundle.get(
+            "outline_template", "{header}\n{probability_label}: <...>"
+        ).format(header=header_text, probability_label=probability_label),
+        "audience_instruction": audience_bundle.get("audience_guidance", ""),
+        "scientist_instruction": SCIENTIST_PROMPT_INSTRUCTION if audience is Audience.SCIENTIST else "",
+        # Prefer audience-specific language prompt (e.g., scientist) and fall back to locale-level prompt
+        "language_instruction": audience_bundle.get(
+            "language_prompt",
+            locale_bundle.get("language_prompt", "Respond clearly and precisely."),
+        ),
+    }
+    fields: Dict[str, Any] = {key: _literal(value) for key, value in static_fields.items()}
+    fields.update((name, _PromptSlot(name)) for name in _PROMPT_DYNAMIC_FIELDS)
+    return PROMPT_TEMPLATE.format_map(fields)
+
+
+def _build_llm_prompt(
+    prediction: int,
+    probability: float,
+    shap_values: List[Dict[str, Any]],
+    patient_data: List[float],
+    lang: Lang | str,
+    audience: Audience | str,
+) -> str:
+    """Fill the precompiled prompt for one patient; only the patient-specific fields are formatted."""
+    risk_level = risk_level_for(probability)
+    template = _PROMPT_TEMPLATES[(resolve_lang(lang), resolve_audience(audience), risk_level)]
+
+    def _safe_patient_value(idx: int, default: float = 0.0) -> float:
         try:
-            response = groq_client.chat.completions.create(
-                model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=600,
+            return float(patient_data[idx])
+        except (TypeError, ValueError, IndexError):
+            return default
+
+    top_shap = shap_values[:5]
+    return template.format_map(
+        {
+            "prediction_text": (
+                "High Risk - Additional Evaluation Required" if prediction == 1 else "Low Risk Screen"
+            ),
+            "probability": probability,
+            "top_factors": ", ".join(str(sv.get("feature", "Unknown")) for sv in top_shap) or "None supplied",
+            "top_factor_lines": "\n".join(
+                f"- {sv.get('feature', 'Unknown')}: {sv.get('value', 0.0)} ({sv.get('impact', 'neutral')} impact)"
+                for sv in top_shap
             )
-            ai_text = response.choices[0].message.content or ""
-            ai_text = repair_text_encoding(ai_text)
-            if locale_code == "ru" and not is_readable_russian(ai_text):
-                raise ValueError("LLM output unreadable in requested language")
-            return ai_text
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Falling back to template commentary: %s", exc)
+            or "No SHAP factors available",
+            "wbc": _safe_patient_value(0, 5.8),
+            "plt": _safe_patient_value(2, 184.0),
+            "bilirubin": _safe_patient_value(12, 17.0),
+            "glucose": _safe_patient_value(10, 6.3),
+        }
+    )
 
-    if locale_code == "ru":
-        ru_audience = "scientist" if scientist_mode else "doctor" if professional_mode else "patient"
+
+def _template_commentary(
+    self,
+    prediction: int,
+    probability: float,
+    shap_values: List[Dict[str, Any]],
+    patient_data: List[float],
+    lang: Lang,
+    audience: Audience,
+) -> str:
+    if lang is Lang.RU:
         return self._generate_ru_commentary(
             prediction,
             probability,
             shap_values,
             patient_data,
-            audience=ru_audience,
+            audience=audience,
         )
 
     return self._generate_fallback_commentary(
         prediction,
         probability,
         shap_values,
-        language=language_code,
-        client_type=audience_key,
+        language=lang,
+        client_type=audience,
     )
 
 
-def _generate_fallback_commentary(
+def _checked_llm_text(text: str, lang: Lang) -> str:
+    ai_text = repair_text_encoding(text)
+    if lang is Lang.RU and not is_readable_russian(ai_text):
+        raise ValueError("LLM output unreadable in requested language")
+    return ai_text
+
+
+# (prediction, probability, shap_values, patient_data) for one patient
+CommentaryCase = Tuple[int, float, List[Dict[str, Any]], List[float]]
+
+
+def generate_clinical_commentaries(
+    self,
+    cases: Sequence[CommentaryCase],
+    language: Lang | str = "en",
+    client_type: Audience | str = "patient",
+) -> List[str]:
+    """Commentary for several patients at once; uncached completions are requested concurrently."""
+
+    lang = resolve_lang(language)
+    audience = resolve_audience(client_type)
+    texts: List[str | None] = [None] * len(cases)
+
+    client = llm_client.get_groq_client()
+    if client is not None:
+        pending: List[Tuple[int, Any]] = []
+        requests = []
+        for idx, (prediction, probability, shap_values, patient_data) in enumerate(cases):
+            cache_key = _commentary_cache_key(lang, audience, prediction, probability, shap_values, patient_data)
+            texts[idx] = llm_commentary_cache.get(cache_key)
+            if texts[idx] is None:
+                prompt = _build_llm_prompt(prediction, probability, shap_values, patient_data, lang, audience)
+                pending.append((idx, cache_key))
+                requests.append(_request_llm_commentary(client, prompt))
+        try:
+            # Each completion is already bounded by the client's own GROQ_TIMEOUT.
+            results = gather_llm_coroutines(requests, timeout=None) if requests else []
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Falling back to template commentary for %d cases: %s", len(requests), exc)
+            results = [exc] * len(requests)
+        for (idx, cache_key), result in zip(pending, results):
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                texts[idx] = _checked_llm_text(result, lang)
+                llm_commentary_cache.set(cache_key, texts[idx])
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Falling back to template commentary: %s", exc)
+
+    return [
+        text if text is not None else _template_commentary(self, *cases[idx], lang, audience)
+        for idx, text in enumerate(texts)
+    ]
+
+
+def _single_flight(key: tuple, compute: Callable[[], str]) -> str:
+    """Run ``compute`` for the first caller with ``key``; concurrent callers get its result (or error)."""
+    with _inflight_lock:
+        pending = _inflight_commentaries.get(key)
+        leader = pending is None
+        if leader:
+            pending = _inflight_commentaries[key] = Future()
+    if not leader:
+        return pending.result(timeout=llm_client.GROQ_TIMEOUT)
+    try:
+        result = compute()
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            del _inflight_commentaries[key]
+
+
+def generate_clinical_commentary(
     self,
     prediction: int,
     probability: float,
     shap_values: List[Dict[str, Any]],
-    language: str = "en",
-    client_type: str = "patient",
+    patient_data: List[float],
+    language: Lang | str = "en",
+    client_type: Audience | str = "patient",
+    use_cache: bool = True,
 ) -> str:
-    """Deterministic fallback commentary using locale templates."""
+    """Generate AI-powered clinical commentary tailored to the audience.
+
+    ``use_cache=False`` requests a fresh completion instead of reusing a cached one
+    or joining an identical request that is still waiting on Groq.
+    """
+
+    lang = resolve_lang(language)
+    audience = resolve_audience(client_type)
+
+    client = llm_client.get_groq_client()
+    if client is not None:
+        cache_key = _commentary_cache_key(lang, audience, prediction, probability, shap_values, patient_data)
+        cached_text = llm_commentary_cache.get(cache_key) if use_cache else None
+        if cached_text is not None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("LLM commentary cache hit (%s)", llm_commentary_cache.stats())
+            return cached_text
+
+        def _complete() -> str:
+            prompt = _build_llm_prompt(prediction, probability, shap_values, patient_data, lang, audience)
+            ai_text = _checked_llm_text(run_llm_coroutine(_request_llm_commentary(client, prompt)), lang)
+            llm_commentary_cache.set(cache_key, ai_text)
+            return ai_text
+
+        try:
+            return _single_flight(cache_key, _complete) if use_cache else _complete()
+        except Exception as exc:  # pragma: no cover
+            logger.warning("Falling back to template commentary: %s", exc)
+
+    return _template_commentary(
+        self,
+        prediction,
+        probability,
+        shap_values,
+        patient_data,
+        lang,
+        audience,
+    )
+
 
-    locale_code = "ru" if _normalize_language(language).startswith("ru") else "en"
-    locale_bundle = COMMENTARY_LOCALE.get(locale_code, COMMENTARY_LOCALE["en"])
-    audience_bundle, professional_mode, scientist_mode = _select_audience_bundle(locale_bundle, client_type)
+def _repaired_lines(deltas: Iterator[str]) -> Iterator[str]:
+    """Regroup streamed deltas into whole lines, each passed through ``repair_text_encoding``.
+
+    Mojibake never spans a line break, so repairing line by line matches repairing
+    the finished text.
+    """
+    pending = ""
+    for delta in deltas:
+        pending += delta
+        cut = pending.rfind("\n") + 1
+        if cut:
+            yield repair_text_encoding(pending[:cut])
+            pending = pending[cut:]
+    if pending:
+        yield repair_text_encoding(pending)
+
+
+def stream_clinical_commentary(
+    self,
+    prediction: int,
+    probability: float,
+    shap_values: List[Dict[str, Any]],
+    patient_data: List[float],
+    language: Lang | str = "en",
+    client_type: Audience | str = "patient",
+) -> Iterator[str]:
+    """Yield commentary text as Groq streams it; cached and template commentary arrive as one chunk.
+
+    English text streams line by line; Russian text is checked for readability
+    first and sent whole. A stream that fails after text was sent re-raises, so
+    the caller reports an error rather than truncated commentary.
+    """
+
+    lang = resolve_lang(language)
+    audience = resolve_audience(client_type)
+
+    client = llm_client.get_groq_client()
+    if client is not None:
+        cache_key = _commentary_cache_key(lang, audience, prediction, probability, shap_values, patient_data)
+        cached_text = llm_commentary_cache.get(cache_key)
+        if cached_text is not None:
+            yield cached_text
+            return
+
+        prompt = _build_llm_prompt(prediction, probability, shap_values, patient_data, lang, audience)
+        deltas = iter_llm_stream(_stream_llm_commentary(client, prompt))
+        if lang is Lang.RU:
+            # Readability is only known for the whole text, so Russian commentary is
+            # checked (and replaced by the template if unreadable) before it is sent.
+            try:
+                ai_text = _checked_llm_text("".join(deltas), lang)
+            except Exception as exc:
+                logger.warning("Falling back to template commentary: %s", exc)
+            else:
+                llm_commentary_cache.set(cache_key, ai_text)
+                yield ai_text
+                return
+        else:
+            sent: List[str] = []
+            try:
+                for chunk in _repaired_lines(deltas):
+                    sent.append(chunk)
+                    yield chunk
+            except Exception as exc:
+                if sent:
+                    # Part of the text is already out; a template now would be spliced onto it.
+                    logger.warning("LLM commentary stream failed after %d chunks: %s", len(sent), exc)
+                    raise
+                logger.warning("Falling back to template commentary: %s", exc)
+            else:
+                if sent:
+                    llm_commentary_cache.set(cache_key, "".join(sent))
+                    return
+
+    yield _template_commentary(
+        self,
+        prediction,
+        probability,
+        shap_values,
+        patient_data,
+        lang,
+        audience,
+    )
+
+
+_FACTORS_SLOT = "\x00factors\x00"
+_PROBABILITY_SLOT = "\x00probability\x00"
+# Factor lines arrive pre-joined with a trailing newline each, so the slot takes
+# its own line break with it and an empty driver list collapses like a missing line.
+_FACTORS_LINE = _FACTORS_SLOT + "\n"
+_FALLBACK_SLOTS = re.compile(f"({re.escape(_FACTORS_LINE)}|{re.escape(_PROBABILITY_SLOT)})")
+
+
+def _literal(text: Any) -> str:
+    return str(text).replace("{", "{{").replace("}", "}}")
+
+
+def _compile_fallback_template(lang: Lang, audience: Audience, risk_level: str) -> Tuple[str, ...]:
+    """Lay out the fallback commentary once, split around its probability and factor slots.
+
+    Literal text sits at even indices and slot markers at odd ones, so filling it
+    in is a join rather than a format pass over the whole text.
+    """
+    locale_bundle = _locale_bundle(lang)
+    audience_bundle = _select_audience_bundle(locale_bundle, audience)
 
-    probability_pct = f"{probability:.1%}"
-    risk_level = "High" if probability > 0.7 else "Moderate" if probability > 0.3 else "Low"
     risk_label = locale_bundle.get("risk_labels", {}).get(risk_level, risk_level.upper())
     probability_label = audience_bundle.get(
         "probability_label",
@@ -250,20 +642,18 @@ def _generate_fallback_commentary(
     header_template = audience_bundle.get("header_template", "CLINICAL DOSSIER | {risk} RISK")
     base_lines: List[str] = [
         header_template.format(risk=risk_label),
-        f"{probability_label}: {probability_pct}",
+        f"{probability_label}: {_PROBABILITY_SLOT}",
         "",
     ]
 
-    top_factor_lines = _format_top_factor_lines(shap_values, audience_bundle, locale_code)
-
-    if professional_mode or scientist_mode:
+    if audience >= Audience.PROFESSIONAL:
         synopsis_map = audience_bundle.get("synopsis", {})
         actions_map = audience_bundle.get("actions", {})
         coordination_map = audience_bundle.get("coordination", {})
         monitoring_map = audience_bundle.get("monitoring", {})
 
         lines = base_lines + [audience_bundle.get("drivers_title", "TOP SIGNAL DRIVERS")]
-        lines.extend(top_factor_lines)
+        lines.append(_FACTORS_SLOT)
         lines.append("")
         lines.append(audience_bundle.get("synopsis_title", "EVIDENCE SYNTHESIS"))
         lines.append(synopsis_map.get(risk_level, synopsis_map.get("Low", "")))
@@ -286,59 +676,106 @@ def _generate_fallback_commentary(
         lines.append("")
         lines.append(audience_bundle.get("reminder_title", "SAFE PRACTICE REMINDER"))
         lines.append(audience_bundle.get("reminder_text", "All recommendations require specialist confirmation."))
-        return "\n".join(lines)
+    else:
+        core_map = audience_bundle.get("core_message", {})
+        next_steps_map = audience_bundle.get("next_steps", {})
+        warning_items = audience_bundle.get("warning_signs", [])
+        support_items = audience_bundle.get("support", [])
+        timeline_map = audience_bundle.get("timeline")
+        questions = audience_bundle.get("questions")
+
+        core_text = core_map.get(risk_level, core_map.get("Low", "")).format(probability=_PROBABILITY_SLOT)
+
+        lines = base_lines + [
+            audience_bundle.get("core_title", "WHAT THIS MEANS"),
+            core_text,
+            "",
+            audience_bundle.get("drivers_title", "TOP SIGNAL DRIVERS"),
+        ]
+        lines.append(_FACTORS_SLOT)
+        lines.append("")
 
-    core_map = audience_bundle.get("core_message", {})
-    next_steps_map = audience_bundle.get("next_steps", {})
-    warning_items = audience_bundle.get("warning_signs", [])
-    support_items = audience_bundle.get("support", [])
-    timeline_map = audience_bundle.get("timeline")
-    questions = audience_bundle.get("questions")
+        if next_steps_map:
+            lines.append(audience_bundle.get("next_steps_title", "NEXT STEPS"))
+            lines.extend(f"- {item}" for item in next_steps_map.get(risk_level, next_steps_map.get("Low", [])))
+            lines.append("")
 
-    core_text = core_map.get(risk_level, core_map.get("Low", "")).format(probability=probability_pct)
+        if warning_items:
+            lines.append(audience_bundle.get("warnings_title", "WARNING SIGNS"))
+            lines.extend(f"- {item}" for item in warning_items)
+            lines.append("")
 
-    lines = base_lines + [
-        audience_bundle.get("core_title", "WHAT THIS MEANS"),
-        core_text,
-        "",
-        audience_bundle.get("drivers_title", "TOP SIGNAL DRIVERS"),
-    ]
-    lines.extend(top_factor_lines)
-    lines.append("")
+        if support_items:
+            lines.append(audience_bundle.get("support_title", "SUPPORT OPTIONS"))
+            lines.extend(f"- {item}" for item in support_items)
+            lines.append("")
 
-    if next_steps_map:
-        lines.append(audience_bundle.get("next_steps_title", "NEXT STEPS"))
-        lines.extend(f"- {item}" for item in next_steps_map.get(risk_level, next_steps_map.get("Low", [])))
-        lines.append("")
+        if isinstance(timeline_map, dict) and timeline_map:
+            lines.append(audience_bundle.get("timeline_title", "MONITORING PLAN"))
+            lines.extend(f"- {item}" for item in timeline_map.get(risk_level, timeline_map.get("Low", [])))
+            lines.append("")
 
-    if warning_items:
-        lines.append(audience_bundle.get("warnings_title", "WARNING SIGNS"))
-        lines.extend(f"- {item}" for item in warning_items)
-        lines.append("")
+        if isinstance(questions, list) and questions:
+            lines.append(audience_bundle.get("questions_title", "QUESTIONS FOR CLINICIAN"))
+            lines.extend(f"- {question}" for question in questions)
+            lines.append("")
 
-    if support_items:
-        lines.append(audience_bundle.get("support_title", "SUPPORT OPTIONS"))
-        lines.extend(f"- {item}" for item in support_items)
-        lines.append("")
+        lines.append(audience_bundle.get("reminder_title", "REMINDER"))
+        lines.append(
+            audience_bundle.get(
+                "reminder_text",
+                "This screening commentary does not replace individualized medical advice.",
+            )
+        )
 
-    if isinstance(timeline_map, dict) and timeline_map:
-        lines.append(audience_bundle.get("timeline_title", "MONITORING PLAN"))
-        lines.extend(f"- {item}" for item in timeline_map.get(risk_level, timeline_map.get("Low", [])))
-        lines.append("")
+    return tuple(_FALLBACK_SLOTS.split("\n".join(lines)))
 
-    if isinstance(questions, list) and questions:
-        lines.append(audience_bundle.get("questions_title", "QUESTIONS FOR CLINICIAN"))
-        lines.extend(f"- {question}" for question in questions)
-        lines.append("")
 
-    lines.append(audience_bundle.get("reminder_title", "REMINDER"))
-    lines.append(
-        audience_bundle.get(
-            "reminder_text",
-            "This screening commentary does not replace individualized medical advice.",
-        )
-    )
-    return "\n".join(lines)
+_AUDIENCE_BUNDLES: Dict[tuple[Lang, Audience], Dict[str, Any]] = {
+    (lang, audience): _select_audience_bundle(_locale_bundle(lang), audience)
+    for lang in Lang
+    for audience in Audience
+}
+
+# (locale, audience, risk level) -> literal text split around the slot markers
+_FALLBACK_TEMPLATES: Dict[tuple[Lang, Audience, str], Tuple[str, ...]] = {
+    (lang, audience, risk_level): _compile_fallback_template(lang, audience, risk_level)
+    for lang in Lang
+    for audience in Audience
+    for risk_level in ("High", "Moderate", "Low")
+}
+
+
+_PROMPT_TEMPLATES: Dict[tuple[Lang, Audience, str], str] = {
+    (lang, audience, risk_level): _compile_prompt_template(lang, audience, risk_level)
+    for lang in Lang
+    for audience in Audience
+    for risk_level in ("High", "Moderate", "Low")
+}
+
+
+def _generate_fallback_commentary(
+    self,
+    prediction: int,
+    probability: float,
+    shap_values: List[Dict[str, Any]],
+    language: Lang | str = "en",
+    client_type: Audience | str = "patient",
+) -> str:
+    """Deterministic fallback commentary using locale templates."""
+
+    lang = resolve_lang(language)
+    audience = resolve_audience(client_type)
+    risk_level = risk_level_for(probability)
+
+    parts = list(_FALLBACK_TEMPLATES[(lang, audience, risk_level)])
+    top_factor_lines = _format_top_factor_lines(shap_values, _AUDIENCE_BUNDLES[(lang, audience)], lang.code)
+    slots = {
+        _PROBABILITY_SLOT: f"{probability:.1%}",
+        _FACTORS_LINE: "".join(f"{line}\n" for line in top_factor_lines),
+    }
+    parts[1::2] = [slots[marker] for marker in parts[1::2]]
+    return "".join(parts)
 
 
 def _generate_ru_commentary(
@@ -347,7 +784,7 @@ def _generate_ru_commentary(
     probability: float,
     shap_values: List[Dict[str, Any]],
     patient_data: List[float],
-    audience: str = "patient",
+    audience: Audience | str = "patient",
 ) -> str:
     """Proxy to the fallback generator with Russian locale."""
 
@@ -367,13 +804,13 @@ def _build_audience_commentaries(
     probability: float,
     shap_values: List[Dict[str, Any]],
     patient_data: List[float],
-    language: str,
+    language: Lang | str,
     primary_audience: str,
     primary_text: str,
 ) -> Dict[str, str]:
     """Precompute commentary variants for patient, doctor, and scientist toggles."""
 
-    language_code = _normalize_language(language)
+    lang = resolve_lang(language)
     primary_key = _normalize_audience(primary_audience)
     variants: Dict[str, str] = {}
 
@@ -383,7 +820,7 @@ def _build_audience_commentaries(
             continue
 
         try:
-            if language_code.startswith("ru"):
+            if lang is Lang.RU:
                 variants[audience] = self._generate_ru_commentary(
                     prediction,
                     probability,
@@ -396,7 +833,7 @@ def _build_audience_commentaries(
                     prediction,
                     probability,
                     shap_values,
-                    language=language_code,
+                    language=lang,
                     client_type=audience,
                 )
         except Exception as exc:  # pragma: no cover
@@ -407,7 +844,14 @@ def _build_audience_commentaries(
 
 
 __all__ = [
+    "Audience",
+    "Lang",
+    "resolve_audience",
+    "resolve_lang",
+    "llm_commentary_cache",
     "generate_clinical_commentary",
+    "generate_clinical_commentaries",
+    "stream_clinical_commentary",
     "_generate_fallback_commentary",
     "_generate_ru_commentary",
     "_build_audience_commentaries",
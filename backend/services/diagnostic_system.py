@@ -4,29 +4,77 @@ from .commentary import (
     _build_audience_commentaries,
     _generate_fallback_commentary,
     _generate_ru_commentary,
+    generate_clinical_commentaries,
     generate_clinical_commentary,
+    stream_clinical_commentary,
 )
-from .llm_client import groq_client
+from .llm_client import ai_client_configured
 from .model_engine import MedicalDiagnosticSystem
-from .pipeline import execute_diagnostic_pipeline
-from .reporting import generate_pdf_report
+from .pipeline import (
+    analysis_id_for_payload,
+    attach_commentary,
+    cache_analysis,
+    execute_diagnostic_pipeline,
+    get_cached_analysis,
+)
+from .reporting import generate_pdf_report, warm_report_fonts, write_pdf_report
+from .workers import run_blocking
 
 
 # Attach the commentary and reporting helpers to the diagnostic system class.
 MedicalDiagnosticSystem.generate_clinical_commentary = generate_clinical_commentary
+MedicalDiagnosticSystem.generate_clinical_commentaries = generate_clinical_commentaries
+MedicalDiagnosticSystem.stream_clinical_commentary = stream_clinical_commentary
 MedicalDiagnosticSystem._generate_fallback_commentary = _generate_fallback_commentary
 MedicalDiagnosticSystem._generate_ru_commentary = _generate_ru_commentary
 MedicalDiagnosticSystem.generate_pdf_report = generate_pdf_report
+MedicalDiagnosticSystem.write_pdf_report = write_pdf_report
 MedicalDiagnosticSystem.build_audience_commentaries = _build_audience_commentaries
 
 
 # Initialize the singleton diagnostic system instance used across the app.
 diagnostic_system = MedicalDiagnosticSystem()
+diagnostic_system.warm_up()
+warm_report_fonts()
+
+
+def run_diagnostic_pipeline(payload, exact_shap=False, use_cache=True):
+    """Public wrapper delegating to the pipeline executor.
+
+    Scoring and SHAP run on the CPU-sized pipeline pool (see ``run_blocking``);
+    the commentary, which mostly waits on Groq, runs on the calling thread so a
+    slow completion does not hold a pool slot. Raises ``TimeoutError`` when the
+    pool is saturated.
+    """
+    analysis, error_payload, status_code = run_blocking(
+        execute_diagnostic_pipeline,
+        diagnostic_system,
+        payload,
+        exact_shap=exact_shap,
+        commentary=False,
+        use_cache=use_cache,
+    )
+    if analysis is not None:
+        attach_commentary(diagnostic_system, analysis, use_cache=use_cache)
+    return analysis, error_payload, status_code
 
 
-def run_diagnostic_pipeline(payload):
-    """Public wrapper delegating to the pipeline executor."""
-    return execute_diagnostic_pipeline(diagnostic_system, payload)
+def run_cached_diagnostic_pipeline(payload):
+    """Reuse a recent analysis of the same patient values, running the pipeline only on a miss."""
+    cached = get_cached_analysis(analysis_id_for_payload(payload))
+    if cached is not None:
+        return cached, None, 200
+    analysis, error_payload, status_code = run_diagnostic_pipeline(payload)
+    if analysis is not None:
+        cache_analysis(analysis)
+    return analysis, error_payload, status_code
 
 
-__all__ = ["diagnostic_system", "groq_client", "run_diagnostic_pipeline"]
+__all__ = [
+    "diagnostic_system",
+    "ai_client_configured",
+    "run_diagnostic_pipeline",
+    "run_cached_diagnostic_pipeline",
+    "cache_analysis",
+    "get_cached_analysis",
+]
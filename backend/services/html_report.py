@@ -5,15 +5,17 @@ import os
 import subprocess
 from datetime import datetime
 from io import BytesIO
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List
 
 from flask import render_template
-from playwright.sync_api import Playwright, sync_playwright
 
-from core.constants import FEATURE_LABELS
+from core.constants import FEATURE_LABELS, risk_level_for
 from services.model_engine import MEDICAL_RANGES
 from utils.text import repair_text_encoding
 
+if TYPE_CHECKING:  # pragma: no cover
+    from playwright.sync_api import Playwright
+
 
 RISK_COLORS = {
     "High": (220, 38, 38),
@@ -351,11 +353,7 @@ def _normalize_risk(risk: Any, probability: float) -> str:
         return "Moderate"
     if "low" in raw:
         return "Low"
-    if probability > 0.7:
-        return "High"
-    if probability > 0.3:
-        return "Moderate"
-    return "Low"
+    return risk_level_for(probability)
 
 
 def _build_context(
@@ -530,9 +528,9 @@ def _ensure_chromium_installed(playwright: Playwright) -> None:
             pass
 
 
-def _html_to_pdf(html: str, page_label: str) -> bytes:
-    """Render HTML to PDF using headless Chromium (Playwright), with a best-effort auto-install."""
-    def _merge_cover_with_footer(cover_bytes: bytes, full_bytes: bytes) -> bytes:
+def _html_to_pdf(html: str, page_label: str, output: BinaryIO) -> None:
+    """Render HTML to PDF into ``output`` using headless Chromium (Playwright), with a best-effort auto-install."""
+    def _merge_cover_with_footer(cover_bytes: bytes, full_bytes: bytes) -> None:
         for module in ("pypdf", "PyPDF2"):
             try:
                 pdf_module = __import__(module)
@@ -548,14 +546,17 @@ def _html_to_pdf(html: str, page_label: str) -> bytes:
                     writer.add_page(cover_reader.pages[0])
                 for idx in range(1, len(full_reader.pages)):
                     writer.add_page(full_reader.pages[idx])
-                output = BytesIO()
                 writer.write(output)
-                return output.getvalue()
+                return
             except Exception:
+                output.seek(0)
+                output.truncate()
                 break
-        return full_bytes
+        output.write(full_bytes)
 
     try:
+        from playwright.sync_api import sync_playwright
+
         with sync_playwright() as p:
             _ensure_chromium_installed(p)
             browser = p.chromium.launch(args=["--no-sandbox"])
@@ -583,7 +584,7 @@ def _html_to_pdf(html: str, page_label: str) -> bytes:
                 print_background=True,
             )
             browser.close()
-            return _merge_cover_with_footer(cover_pdf, full_pdf)
+            _merge_cover_with_footer(cover_pdf, full_pdf)
     except Exception as exc:
         raise RuntimeError(
             "PDF rendering failed via Playwright. Ensure playwright is installed and Chromium is available "
@@ -595,7 +596,14 @@ def _html_to_pdf(html: str, page_label: str) -> bytes:
 def generate_pdf(patient_inputs: Dict[str, Any], analysis: Dict[str, Any], language: str) -> BytesIO:
     ctx = _build_context(patient_inputs, analysis, language)
     html = render_template("report.html", **ctx)
-    pdf_bytes = _html_to_pdf(html, ctx["page_label"])
-    buf = BytesIO(pdf_bytes)
+    buf = BytesIO()
+    _html_to_pdf(html, ctx["page_label"], buf)
     buf.seek(0)
     return buf
+
+
+def write_pdf(patient_inputs: Dict[str, Any], analysis: Dict[str, Any], language: str, output: BinaryIO) -> None:
+    """Render the HTML report straight into ``output`` (a real file, so it can be sent with sendfile)."""
+    ctx = _build_context(patient_inputs, analysis, language)
+    html = render_template("report.html", **ctx)
+    _html_to_pdf(html, ctx["page_label"], output)
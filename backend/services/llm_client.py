@@ -1,17 +1,66 @@
-"""Shared initialization for the external Groq client."""
+"""Shared initialization for the external Groq client and its event loop."""
 
 from __future__ import annotations
 
+import asyncio
 import os
-
-from groq import Groq
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Coroutine, Iterable, Iterator, List, TypeVar
 
 from core.settings import logger
 
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    from groq import AsyncGroq
+
+T = TypeVar("T")
+
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30") or "30")
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "32") or "32")
+# Re-dials after a failed TCP/TLS connect; requests that reached Groq are never resent
+GROQ_CONNECT_RETRIES = int(os.getenv("GROQ_CONNECT_RETRIES", "2") or "2")
+# Completions in flight per process (fan-outs included), to stay inside Groq rate limits
+GROQ_MAX_PARALLEL = int(os.getenv("GROQ_MAX_PARALLEL", "8") or "8")
+# Completions started per minute per process (0: unlimited); keeps bursts under the
+# account quota instead of hitting 429s and the SDK's sleep-and-retry
+GROQ_RPM = int(os.getenv("GROQ_RPM", "0") or "0")
+# "1": warm up at import, "fork": only in forked workers (preloading servers), "0": never
+GROQ_WARMUP = (os.getenv("GROQ_WARMUP", "1") or "1").lower()
+
+try:  # pragma: no cover - HTTP/2 needs the optional h2 package
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except Exception:  # pragma: no cover
+    _HTTP2_AVAILABLE = False
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Keep-alive pool sized for concurrent commentary requests."""
+    import httpx
 
-def _init_client() -> Groq | None:
+    # Pool settings live on the transport: a client given one ignores its own.
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+        ),
+        http2=_HTTP2_AVAILABLE,
+        retries=GROQ_CONNECT_RETRIES,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(GROQ_TIMEOUT, connect=5.0))
+
+
+def _init_client() -> AsyncGroq | None:
     try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        from groq import AsyncGroq
+
+        client = AsyncGroq(
+            api_key=os.getenv("GROQ_API_KEY"),
+            timeout=GROQ_TIMEOUT,
+            http_client=_build_http_client(),
+        )
         logger.info("AI client initialized successfully")
         return client
     except Exception as exc:  # pragma: no cover
@@ -19,6 +68,186 @@ def _init_client() -> Groq | None:
         return None
 
 
-groq_client = _init_client()
+def _start_event_loop() -> asyncio.AbstractEventLoop:
+    """Run one long-lived loop so every worker thread shares the client's connection pool."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True)
+    thread.start()
+    return loop
+
+
+_client: AsyncGroq | None = None
+_client_ready = False
+_client_lock = threading.Lock()
+
+
+def get_groq_client() -> AsyncGroq | None:
+    """Return the shared client, importing groq and building it on first use."""
+    global _client, _client_ready
+    if not _client_ready:
+        with _client_lock:
+            if not _client_ready:
+                _client = _init_client()
+                _client_ready = True
+    return _client
+
+
+def ai_client_configured() -> bool:
+    """Whether commentary can use Groq, answered without importing the SDK."""
+    return os.getenv("GROQ_API_KEY") is not None
+
+
+async def _warm_up() -> None:
+    """Open the pooled TLS connection before the first real completion needs it."""
+    client = get_groq_client()
+    if client is None:
+        return
+    try:
+        await client.models.list()
+        logger.info("AI client connection warmed up")
+    except Exception as exc:  # pragma: no cover
+        logger.debug("AI client warm-up skipped: %s", exc)
+
+
+def _schedule_warm_up(after_fork: bool = False) -> None:
+    if GROQ_WARMUP == "0" or (GROQ_WARMUP == "fork" and not after_fork):
+        return
+    if os.getenv("GROQ_API_KEY"):
+        asyncio.run_coroutine_threadsafe(_warm_up(), llm_loop)
+
+
+llm_loop = _start_event_loop()
+_schedule_warm_up()
+# Created on first use inside llm_loop, the only loop that ever awaits them.
+_parallel_limit: asyncio.Semaphore | None = None
+_rate_limit: _RateLimiter | None = None
+
+
+def _reset_after_fork() -> None:
+    """Threads and pooled sockets do not survive fork; give each worker its own."""
+    global _client, _client_ready, _client_lock, llm_loop, _parallel_limit, _rate_limit
+    _client, _client_ready, _client_lock = None, False, threading.Lock()
+    llm_loop = _start_event_loop()
+    _parallel_limit = _rate_limit = None
+    _schedule_warm_up(after_fork=True)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _RateLimiter:
+    """Token bucket for ``per_minute`` starts, letting up to ``burst`` go back to back.
+
+    Only touched from llm_loop, so the bookkeeping needs no lock.
+    """
+
+    def __init__(self, per_minute: int, burst: int) -> None:
+        self._interval = 60.0 / per_minute
+        self._burst_window = (max(1, burst) - 1) * self._interval
+        self._next_free = 0.0
+
+    async def acquire(self) -> None:
+        now = asyncio.get_running_loop().time()
+        self._next_free = max(self._next_free, now)
+        delay = self._next_free - self._burst_window - now
+        self._next_free += self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _limited(coro: Coroutine[Any, Any, T]) -> T:
+    """Await ``coro`` once one of the ``GROQ_MAX_PARALLEL`` slots is free and ``GROQ_RPM`` allows a start."""
+    global _parallel_limit, _rate_limit
+    if _parallel_limit is None:
+        _parallel_limit = asyncio.Semaphore(max(1, GROQ_MAX_PARALLEL))
+    if _rate_limit is None and GROQ_RPM > 0:
+        _rate_limit = _RateLimiter(GROQ_RPM, GROQ_MAX_PARALLEL)
+    async with _parallel_limit:
+        if _rate_limit is not None:
+            try:
+                await _rate_limit.acquire()
+            except BaseException:
+                coro.close()
+                raise
+        return await coro
+
+
+def _run_on_loop(coro: Coroutine[Any, Any, T], timeout: float | None) -> T:
+    future = asyncio.run_coroutine_threadsafe(coro, llm_loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def run_llm_coroutine(coro: Coroutine[Any, Any, T], timeout: float | None = GROQ_TIMEOUT) -> T:
+    """Schedule an LLM coroutine on the shared loop and block the caller until it completes."""
+    return _run_on_loop(_limited(coro), timeout)
+
+
+def gather_llm_coroutines(
+    coros: Iterable[Coroutine[Any, Any, T]], timeout: float | None = GROQ_TIMEOUT
+) -> List[T | BaseException]:
+    """Run LLM coroutines concurrently on the shared loop and wait for all of them.
+
+    Results come back in order; a failed coroutine yields its exception instead of
+    a result. ``timeout`` bounds the whole fan-out.
+    """
+
+    async def _gather() -> List[T | BaseException]:
+        return await asyncio.gather(*(_limited(coro) for coro in coros), return_exceptions=True)
+
+    return _run_on_loop(_gather(), timeout)
+
+
+_STREAM_END = object()
+
+
+def iter_llm_stream(stream: AsyncIterator[T], timeout: float | None = GROQ_TIMEOUT) -> Iterator[T]:
+    """Drive an async stream on the shared loop and yield its items to a sync caller as they arrive.
+
+    ``timeout`` bounds the wait for each item rather than the whole stream.
+    """
+    items: "queue.Queue[Any]" = queue.Queue()
+
+    async def _pump() -> None:
+        try:
+            async for item in stream:
+                items.put(item)
+        except BaseException as exc:
+            items.put(exc)
+        finally:
+            items.put(_STREAM_END)
+
+    future = asyncio.run_coroutine_threadsafe(_limited(_pump()), llm_loop)
+    try:
+        while True:
+            try:
+                item = items.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("LLM stream stalled") from None
+            if item is _STREAM_END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Covers client disconnects too: closing the generator stops the upstream request.
+        future.cancel()
+
 
-__all__ = ["groq_client"]
+__all__ = [
+    "get_groq_client",
+    "ai_client_configured",
+    "llm_loop",
+    "run_llm_coroutine",
+    "gather_llm_coroutines",
+    "iter_llm_stream",
+    "GROQ_TIMEOUT",
+    "GROQ_MAX_CONNECTIONS",
+    "GROQ_CONNECT_RETRIES",
+    "GROQ_MAX_PARALLEL",
+    "GROQ_RPM",
+]
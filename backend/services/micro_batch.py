@@ -0,0 +1,123 @@
+"""Adaptive micro-batching for single-row model inference."""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from core.settings import logger
+
+MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "64") or "64")
+MAX_LATENCY_MS = float(os.getenv("PREDICT_MAX_LATENCY_MS", "10") or "10")
+# Longest a caller waits for its batched result before giving up with TimeoutError
+SUBMIT_TIMEOUT = float(os.getenv("PREDICT_BATCH_TIMEOUT", "30") or "30")
+
+
+class _Slot:
+    """Pending request: one feature row plus the handle used to hand back its result."""
+
+    __slots__ = ("features", "event", "result", "error")
+
+    def __init__(self, features: np.ndarray) -> None:
+        self.features = features
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class BatchPredictor:
+    """Coalesce concurrent single-row requests into one vectorized model call.
+
+    A daemon worker drains the queue into batches of at most ``max_batch`` rows.
+    While other callers are still in flight it waits up to ``max_latency_ms`` for
+    them to join the batch; a lone request is dispatched immediately.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[np.ndarray], Sequence[Any]],
+        max_batch: int = MAX_BATCH,
+        max_latency_ms: float = MAX_LATENCY_MS,
+        name: str = "predict-batcher",
+    ) -> None:
+        self._infer = infer
+        self._name = name
+        self._max_batch = max(1, int(max_batch))
+        self._max_latency = max(0.0, float(max_latency_ms)) / 1000.0
+        self._queue: "queue.Queue[_Slot]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the background worker (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def submit(self, features: Sequence[float], timeout: float | None = SUBMIT_TIMEOUT) -> Any:
+        """Queue one feature row and block until its batched result is ready.
+
+        Raises ``TimeoutError`` when no result arrives within ``timeout`` seconds,
+        so a stuck or dead worker cannot hold request threads forever.
+        """
+        slot = _Slot(np.asarray(features, dtype=float))
+        self.start()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._queue.put(slot)
+            finished = slot.event.wait(timeout)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if not finished:
+            raise TimeoutError(f"{self._name} produced no result within {timeout}s")
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def _collect(self) -> list[_Slot]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_latency
+        while len(batch) < self._max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            with self._lock:
+                waiting_for_more = self._in_flight > len(batch)
+            remaining = deadline - time.monotonic()
+            if not waiting_for_more or remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                results = self._infer(np.vstack([slot.features for slot in batch]))
+                for slot, result in zip(batch, results):
+                    slot.result = result
+            except Exception as exc:
+                logger.error("Batched inference failed for %d rows: %s", len(batch), exc)
+                for slot in batch:
+                    slot.error = exc
+            finally:
+                for slot in batch:
+                    slot.event.set()
+
+
+__all__ = ["BatchPredictor", "MAX_BATCH", "MAX_LATENCY_MS", "SUBMIT_TIMEOUT"]
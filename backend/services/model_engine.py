@@ -2,14 +2,34 @@ from __future__ import annotations
 
 import math
 import os
-from typing import Any, Dict, List
+import threading
+from typing import Any, Callable, Dict, List, Sequence
 
 import joblib
 import numpy as np
-import shap
 
-from core.constants import FEATURE_DEFAULTS, FEATURE_LABELS
+from core.constants import DEFAULT_VECTOR, FEATURE_KEYS, FEATURE_LABELS
 from core.settings import logger
+from utils.cache import LRUCache
+from .micro_batch import MAX_BATCH, BatchPredictor
+
+try:  # pragma: no cover - optional JIT acceleration for the fallback kernels
+    from numba import njit
+
+    _NUMBA_AVAILABLE = True
+except Exception:  # pragma: no cover
+    _NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in so the kernels run as plain Python without numba."""
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
 try:  # pragma: no cover
     from guidelines import (
         FOLLOW_UP_WINDOWS,
@@ -45,11 +65,39 @@ MEDICAL_RANGES: Dict[str, tuple[float, float]] = {
     "bilirubin": (3, 25),
 }
 
-FEATURE_ORDER = [key for key, _ in FEATURE_DEFAULTS]
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+MODEL_ONNX_PATH = os.getenv("MODEL_ONNX_PATH", "models/random_forest.onnx")
+MODEL_TREELITE_PATH = os.getenv("MODEL_TREELITE_PATH", "models/random_forest.so")
+# Off by default: the conversion plus its parity probe costs seconds at every
+# start and reload, while export_onnx.py does the same work once, offline.
+MODEL_ONNX_CONVERT = (os.getenv("MODEL_ONNX_CONVERT", "0") or "0").lower() not in {"0", "false", "no"}
+SHAP_CACHE_SIZE = int(os.getenv("SHAP_CACHE_SIZE", "2048") or "2048")
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "2048") or "2048")
+SHAP_SURROGATE_PATH = os.getenv("SHAP_SURROGATE_PATH", "models/shap_surrogate.npz")
+MODEL_WARMUP = (os.getenv("MODEL_WARMUP", "1") or "1").lower() not in {"0", "false", "no"}
+
+FEATURE_ORDER = list(FEATURE_KEYS)
 FEATURE_NAMES = [
     FEATURE_LABELS["en"].get(key.upper(), key.upper()) for key in FEATURE_ORDER
 ]
 
+# MEDICAL_RANGES as arrays aligned with FEATURE_ORDER for vectorized validation
+_MIN_BOUNDS = np.array([MEDICAL_RANGES[key][0] for key in FEATURE_ORDER], dtype=float)
+_MAX_BOUNDS = np.array([MEDICAL_RANGES[key][1] for key in FEATURE_ORDER], dtype=float)
+_MIN_BOUNDS.flags.writeable = _MAX_BOUNDS.flags.writeable = False
+# Synthetic in-range patient used to exercise the inference paths at startup
+_WARMUP_FEATURES = (_MIN_BOUNDS + _MAX_BOUNDS) / 2
+
+
+def _out_of_range(values: np.ndarray) -> np.ndarray:
+    # Negated in-range test so NaN is rejected as well.
+    return np.flatnonzero(~((values >= _MIN_BOUNDS) & (values <= _MAX_BOUNDS)))
+
+
+def _range_error(feature: str, value: Any) -> str:
+    min_val, max_val = MEDICAL_RANGES[feature]
+    return f"{feature.upper()}: {value} outside normal range ({min_val}-{max_val})"
+
 
 __all__ = [
     "MedicalDiagnosticSystem",
@@ -59,6 +107,380 @@ __all__ = [
 ]
 
 
+# Clinical heuristic as a rule table: one entry per lab, in scoring order. Each
+# lab adds the primary weight when its primary comparison holds, otherwise the
+# secondary weight when that one holds (sign +1 means ">", -1 means "<").
+# Labs without a secondary tier carry a zero weight and a finite placeholder
+# threshold (fastmath assumes no infinities).
+_RB_FEATURE_IDX = np.array([12, 10, 2, 0, 3, 11, 5, 7])  # bilirubin, glucose, plt, wbc, hgb, act, mpv, mono
+_RB_PRIMARY_SIGN = np.array([1.0, 1.0, 1.0, 1.0, -1.0, 1.0, 1.0, 1.0])
+_RB_PRIMARY_THRESH = np.array([20.0, 6.5, 350.0, 9.0, 130.0, 35.0, 10.0, 0.6])
+_RB_PRIMARY_WEIGHT = np.array([0.35, 0.25, 0.2, 0.15, 0.15, 0.1, 0.1, 0.1])
+_RB_SECONDARY_SIGN = np.array([1.0, 1.0, -1.0, -1.0, -1.0, 1.0, 1.0, 1.0])
+_RB_SECONDARY_THRESH = np.array([15.0, 5.8, 180.0, 4.5, 110.0, 0.0, 0.0, 0.0])
+_RB_SECONDARY_WEIGHT = np.array([0.2, 0.15, 0.15, 0.1, 0.25, 0.0, 0.0, 0.0])
+
+
+# The score is not clamped before the logistic: the probability clip to
+# [0.1, 0.95] already bounds it more tightly (logit 0.95 < 3, logit 0.1 > -3).
+@njit(cache=True, fastmath=True)
+def _logistic(x: float) -> float:
+    """1 / (1 + e^-x) written as a tanh, which needs no division."""
+    return 0.5 + 0.5 * math.tanh(0.5 * x)
+
+
+@njit(cache=True, fastmath=True)
+def _rule_based_kernel(features: np.ndarray) -> tuple[int, float]:
+    """Score one feature row against the rule table (JIT-compiled when numba is available)."""
+    risk_score = 0.0
+    for rule in range(_RB_FEATURE_IDX.shape[0]):
+        value = features[_RB_FEATURE_IDX[rule]]
+        if _RB_PRIMARY_SIGN[rule] * (value - _RB_PRIMARY_THRESH[rule]) > 0:
+            risk_score += _RB_PRIMARY_WEIGHT[rule]
+        elif _RB_SECONDARY_SIGN[rule] * (value - _RB_SECONDARY_THRESH[rule]) > 0:
+            risk_score += _RB_SECONDARY_WEIGHT[rule]
+
+    probability = max(0.1, min(0.95, _logistic(risk_score * 3.0 - 1.0)))
+    prediction = 1 if probability > 0.5 else 0
+    return prediction, probability
+
+
+def _rule_based_batch(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized rule table over an ``(n, 13)`` matrix; returns predictions and probabilities."""
+    values = rows[:, _RB_FEATURE_IDX]
+    primary = _RB_PRIMARY_SIGN * (values - _RB_PRIMARY_THRESH) > 0
+    secondary = ~primary & (_RB_SECONDARY_SIGN * (values - _RB_SECONDARY_THRESH) > 0)
+    risk_score = (primary * _RB_PRIMARY_WEIGHT).sum(axis=1) + (secondary * _RB_SECONDARY_WEIGHT).sum(axis=1)
+    probabilities = np.tanh(risk_score * 1.5 - 0.5)
+    probabilities *= 0.5
+    probabilities += 0.5
+    np.clip(probabilities, 0.1, 0.95, out=probabilities)
+    return (probabilities > 0.5).astype(int), probabilities
+
+
+_NORMAL_VALUES = DEFAULT_VECTOR
+
+# Per-feature mock SHAP rule: impact = (value - normal) * coefficient, where the
+# coefficient switches to the "high" weight above the threshold. Features scored
+# as (normal - value) carry a negative coefficient. Features with a single
+# coefficient use a 0.0 placeholder threshold (no infinities: the kernels run
+# with fastmath, which assumes finite inputs).
+_MOCK_SHAP_THRESHOLDS = np.array(
+    [0.0, 0.0, 0.0, 0.0, 0.0, 10.0, 0.0, 0.6, 0.0, 0.0, 6.5, 35.0, 20.0],
+)
+_MOCK_SHAP_COEF_HIGH = np.array(
+    [0.12, -0.1, 0.002, -0.004, -0.003, 0.05, 0.02, 0.3, 0.5, 0.1, 0.15, 0.01, 0.08],
+)
+_MOCK_SHAP_COEF_LOW = np.array(
+    [0.12, -0.1, 0.002, -0.004, -0.003, 0.01, 0.02, 0.1, 0.5, 0.1, 0.05, 0.005, 0.03],
+)
+_MOCK_SHAP_NOISE_FREQ = np.arange(1, 14, dtype=np.float64) * 0.37
+
+
+@njit(cache=True, fastmath=True)
+def _mock_shap_kernel(features: np.ndarray, normal_values: np.ndarray) -> np.ndarray:
+    """Return the 13 deterministic SHAP-style impacts, noise included."""
+    coefficients = np.where(features > _MOCK_SHAP_THRESHOLDS, _MOCK_SHAP_COEF_HIGH, _MOCK_SHAP_COEF_LOW)
+    noise = np.sin((features + 1) * _MOCK_SHAP_NOISE_FREQ) * 0.006
+    return (features - normal_values) * coefficients + noise
+
+
+@njit(cache=True, fastmath=True)
+def _mock_shap_rows_kernel(rows: np.ndarray, normal_values: np.ndarray) -> np.ndarray:
+    """:func:`_mock_shap_kernel` for every row of an ``(n, 13)`` matrix in one compiled call.
+
+    Row by row through the same kernel rather than one broadcast expression, so the
+    impacts match single-patient explanations bit for bit.
+    """
+    impacts = np.empty_like(rows)
+    for row in range(rows.shape[0]):
+        impacts[row] = _mock_shap_kernel(rows[row], normal_values)
+    return impacts
+
+
+def _top_k_indices_numpy(importance: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest importances, ordered descending."""
+    if k < importance.shape[0]:
+        candidates = np.argpartition(-importance, k - 1)[:k]
+    else:
+        candidates = np.arange(importance.shape[0])
+    return candidates[np.argsort(-importance[candidates], kind="stable")]
+
+
+def _top_k_indices_rows_numpy(importance: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise :func:`_top_k_indices` over an ``(n, features)`` matrix in one partition call."""
+    if k < importance.shape[1]:
+        candidates = np.argpartition(-importance, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(importance.shape[1]), importance.shape)
+    ranked = np.argsort(-np.take_along_axis(importance, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, ranked, axis=1)
+
+
+@njit(cache=True)
+def _top_k_kernel(importance: np.ndarray, k: int) -> np.ndarray:
+    """Insertion top-k: for 13 features a single pass beats NumPy's per-call overhead."""
+    k = min(k, importance.shape[0])
+    order = np.empty(k, dtype=np.intp)
+    count = 0
+    for idx in range(importance.shape[0]):
+        value = importance[idx]
+        pos = count
+        while pos > 0 and importance[order[pos - 1]] < value:
+            pos -= 1
+        if pos >= k:
+            continue
+        if count < k:
+            count += 1
+        for slot in range(count - 1, pos, -1):
+            order[slot] = order[slot - 1]
+        order[pos] = idx
+    return order
+
+
+@njit(cache=True)
+def _top_k_rows_kernel(importance: np.ndarray, k: int) -> np.ndarray:
+    orders = np.empty((importance.shape[0], min(k, importance.shape[1])), dtype=np.intp)
+    for row in range(importance.shape[0]):
+        orders[row] = _top_k_kernel(importance[row], k)
+    return orders
+
+
+# Ties keep the lower feature index first. Without numba the kernels would run
+# as interpreted loops, so the NumPy versions are used instead.
+if _NUMBA_AVAILABLE:
+    _top_k_indices = _top_k_kernel
+    _top_k_indices_rows = _top_k_rows_kernel
+else:  # pragma: no cover
+    _top_k_indices = _top_k_indices_numpy
+    _top_k_indices_rows = _top_k_indices_rows_numpy
+
+
+def _positive_class_contributions(shap_values: Any) -> np.ndarray:
+    """Normalize explainer output to an ``(n, features)`` matrix for the positive class."""
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[1] if len(shap_values) > 1 else shap_values[0])
+    values = np.asarray(shap_values)
+    if values.ndim == 3:
+        return values[:, :, 1 if values.shape[2] > 1 else 0]
+    return values
+
+
+def _shap_columns(values: np.ndarray, order: np.ndarray) -> Dict[str, list]:
+    """Columnar (one list per field) SHAP output for the selected feature indices."""
+    selected = values[order]
+    selected_values = selected.tolist()
+    return {
+        "feature": [FEATURE_NAMES[idx] for idx in order.tolist()],
+        "value": [round(value, 3) for value in selected_values],
+        "impact": ["positive" if value > 0 else "negative" for value in selected_values],
+        "importance": np.abs(selected).tolist(),
+    }
+
+
+def _shap_records(columns: Dict[str, list]) -> List[Dict[str, Any]]:
+    """Row-oriented view of :func:`_shap_columns`, the layout the API and clients exchange."""
+    keys = tuple(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+# Pay any JIT compilation cost at import rather than on the first request. Request
+# rows are writable arrays, a distinct numba type from the read-only defaults.
+_rule_based_kernel(_NORMAL_VALUES.copy())
+_mock_shap_kernel(_NORMAL_VALUES.copy(), _NORMAL_VALUES)
+_mock_shap_rows_kernel(_NORMAL_VALUES[None, :].copy(), _NORMAL_VALUES)
+_top_k_indices(_NORMAL_VALUES.copy(), 9)
+_top_k_indices_rows(_NORMAL_VALUES[None, :].copy(), 9)
+
+
+def _as_row(features: Sequence[float]) -> np.ndarray:
+    """``(1, 13)`` matrix of one patient; a view, not a copy, when given a float64 array."""
+    return np.asarray(features, dtype=np.float64)[None, :]
+
+
+def _rounded_features(features: Sequence[float]) -> tuple[float, ...]:
+    """SHAP cache key part: features rounded to lab precision."""
+    return tuple(round(float(value), 2) for value in features)
+
+
+def _positive_base_value(model: Any, explainer: Any) -> float | None:
+    """Positive-class expected value when tree SHAP of ``model`` is additive in probability space.
+
+    Holds for scikit-learn binary forests and trees, whose raw tree output is the
+    class probability; other models (e.g. boosted log-odds) return None.
+    """
+    if not _reads_float32(model) or len(getattr(model, "classes_", ())) != 2:
+        return None
+    if getattr(explainer, "model_output", None) != "raw":
+        return None
+    expected = np.atleast_1d(np.asarray(getattr(explainer, "expected_value", None), dtype=float))
+    return float(expected[-1]) if expected.size in (1, 2) else None
+
+
+def _scaler_affine(scaler: Any) -> tuple[np.ndarray, np.ndarray] | None:
+    """``(offset, scale)`` equivalent to a fitted StandardScaler, or None for other scalers."""
+    if type(scaler).__name__ != "StandardScaler":
+        return None
+    n_features = getattr(scaler, "n_features_in_", None)
+    if n_features is None:
+        return None
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    offset = np.asarray(mean, dtype=np.float64) if scaler.with_mean and mean is not None else np.zeros(n_features)
+    divisor = np.asarray(scale, dtype=np.float64) if scaler.with_std and scale is not None else np.ones(n_features)
+    return offset, divisor
+
+
+# Per-thread model-input scratch (the batcher worker and request threads each own
+# one), reused across calls instead of allocating the scaled matrix every time.
+_input_buffers = threading.local()
+
+
+def _input_buffers_for(shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """``(float64 scratch, float32 model input)`` views of ``shape``, grown on demand."""
+    n_rows, n_features = shape
+    buffers = getattr(_input_buffers, "buffers", None)
+    if buffers is None or buffers[0].shape[0] < n_rows or buffers[0].shape[1] != n_features:
+        capacity = max(n_rows, MAX_BATCH)
+        buffers = (np.empty((capacity, n_features)), np.empty((capacity, n_features), dtype=np.float32))
+        _input_buffers.buffers = buffers
+    return buffers[0][:n_rows], buffers[1][:n_rows]
+
+
+def _reads_float32(model: Any) -> bool:
+    """scikit-learn forests and trees cast their input to float32 before traversal."""
+    return type(model).__module__.startswith(("sklearn.ensemble._forest", "sklearn.tree"))
+
+
+def _new_onnx_session(model_source: Any) -> Any:
+    """Single-threaded CPU session from a model path or serialized bytes."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    # Request-level parallelism comes from the server's workers and threads.
+    options.intra_op_num_threads = 1
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(model_source, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _load_onnx_session(onnx_path: str, model_path: str) -> Any:
+    """Open the exported forest with ONNX Runtime when available and not older than the pickle."""
+    if not os.path.exists(onnx_path):
+        return None
+    if os.path.getmtime(onnx_path) < os.path.getmtime(model_path):
+        logger.warning("Ignoring stale %s; re-run export_onnx.py after retraining", onnx_path)
+        return None
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        logger.info("onnxruntime not installed; using scikit-learn inference")
+        return None
+    try:
+        session = _new_onnx_session(onnx_path)
+        logger.info("ONNX Runtime session loaded from %s", onnx_path)
+        return session
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Could not load ONNX model: %s", exc)
+        return None
+
+
+def _convert_onnx_session(model: Any) -> Any:
+    """Convert the loaded forest in memory when no usable export exists on disk.
+
+    Same conversion as export_onnx.py; the session is only used if it agrees with
+    scikit-learn on every prediction for a random probe.
+    """
+    if not MODEL_ONNX_CONVERT or not _reads_float32(model):
+        return None
+    try:
+        import onnxruntime  # noqa: F401
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        return None
+    try:
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[("input", FloatTensorType([None, model.n_features_in_]))],
+            options={id(model): {"zipmap": False}},
+            target_opset=15,
+        )
+        session = _new_onnx_session(onnx_model.SerializeToString())
+        probe = np.random.default_rng(0).normal(size=(256, model.n_features_in_)).astype(np.float32)
+        expected = np.argmax(model.predict_proba(probe), axis=1)
+        if not np.array_equal(np.argmax(_onnx_predict_proba(session, probe), axis=1), expected):
+            logger.warning("In-memory ONNX conversion disagrees with scikit-learn; not using it")
+            return None
+        logger.info("ONNX Runtime session converted from the loaded model")
+        return session
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Could not convert model to ONNX: %s", exc)
+        return None
+
+
+def _load_treelite_predictor(lib_path: str, model_path: str) -> Any:
+    """Open the Treelite-compiled forest (see export_treelite.py) when present and current."""
+    if not os.path.exists(lib_path):
+        return None
+    if os.path.getmtime(lib_path) < os.path.getmtime(model_path):
+        logger.warning("Ignoring stale %s; re-run export_treelite.py after retraining", lib_path)
+        return None
+    try:
+        import tl2cgen
+    except ImportError:
+        logger.info("tl2cgen not installed; ignoring %s", lib_path)
+        return None
+    try:
+        # One thread per call, as for ONNX Runtime: concurrency comes from the server.
+        predictor = tl2cgen.Predictor(lib_path, nthread=1)
+        logger.info("Treelite predictor loaded from %s", lib_path)
+        return predictor
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Could not load Treelite library: %s", exc)
+        return None
+
+
+def _load_shap_surrogate(surrogate_path: str, model_path: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """Linear features -> SHAP map fitted offline by fit_shap_surrogate.py, if present and current."""
+    if not os.path.exists(surrogate_path):
+        return None
+    if os.path.getmtime(surrogate_path) < os.path.getmtime(model_path):
+        logger.warning("Ignoring stale %s; re-run fit_shap_surrogate.py after retraining", surrogate_path)
+        return None
+    try:
+        with np.load(surrogate_path) as data:
+            weights = np.ascontiguousarray(data["weights"], dtype=np.float64)
+            bias = np.ascontiguousarray(data["bias"], dtype=np.float64)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Could not load SHAP surrogate: %s", exc)
+        return None
+    n_features = len(FEATURE_ORDER)
+    if weights.shape != (n_features, n_features) or bias.shape != (n_features,):
+        logger.warning("SHAP surrogate has unexpected shapes %s/%s", weights.shape, bias.shape)
+        return None
+    logger.info("Approximate SHAP surrogate loaded from %s", surrogate_path)
+    return weights, bias
+
+
+def _onnx_predict_proba(session: Any, rows: np.ndarray) -> np.ndarray:
+    """Class probabilities from an export made without ZipMap (see export_onnx.py)."""
+    input_name = session.get_inputs()[0].name
+    # Trees compare float32 thresholds, as scikit-learn does internally.
+    _, probabilities = session.run(None, {input_name: np.ascontiguousarray(rows, dtype=np.float32)})
+    return np.asarray(probabilities, dtype=np.float64)
+
+
+def _treelite_predict_proba(predictor: Any, rows: np.ndarray) -> np.ndarray:
+    """``(n, 2)`` class probabilities from a compiled binary forest."""
+    import tl2cgen
+
+    output = np.asarray(predictor.predict(tl2cgen.DMatrix(rows, dtype="float32")), dtype=np.float64)
+    output = output.reshape(len(rows), -1)
+    if output.shape[1] == 1:  # positive-class score only
+        output = np.hstack([1.0 - output, output])
+    return output
+
+
 class MedicalDiagnosticSystem:
     """Handles model loading, validation, and SHAP-based explanations."""
 
@@ -66,6 +488,24 @@ class MedicalDiagnosticSystem:
         self.model = None
         self.scaler = None
         self.shap_explainer = None
+        # The micro-batchers are built once and survive reloads: they call bound
+        # methods that read the current model, and start their worker on first use.
+        self.batch_predictor: BatchPredictor | None = BatchPredictor(self._infer_batch)
+        # Exact explanations of concurrent requests share one TreeExplainer call.
+        self.shap_batcher: BatchPredictor | None = BatchPredictor(self._explain_columns, name="shap-batcher")
+        # Positive-class SHAP base value when exact explanations also determine the
+        # prediction (binary forest: base + contributions == probability).
+        self.shap_base_value: float | None = None
+        self.fused_batcher: BatchPredictor | None = BatchPredictor(self._predict_explain_rows, name="fused-batcher")
+        self.ort_session = None
+        self.treelite_predictor = None
+        self.shap_surrogate: tuple[np.ndarray, np.ndarray] | None = None
+        # Explanations keyed by features rounded to lab precision (2 dp) plus the prediction.
+        self.shap_cache = LRUCache(maxsize=SHAP_CACHE_SIZE)
+        # Model (prediction, probability) keyed by the exact feature values, for resubmitted forms.
+        self.prediction_cache = LRUCache(maxsize=PREDICTION_CACHE_SIZE)
+        self._affine_source: Any = None
+        self._affine: tuple[np.ndarray, np.ndarray] | None = None
         self.model_metrics = {
             "accuracy": 0.926,
             "precision": 0.895,
@@ -79,22 +519,43 @@ class MedicalDiagnosticSystem:
         self.imaging_pathways = IMAGING_PATHWAYS
         self.high_risk_criteria = HIGH_RISK_CRITERIA
         self.follow_up_windows = FOLLOW_UP_WINDOWS
+        # Called after every load_model(), e.g. to drop responses cached from the previous model.
+        self.reload_hooks: List[Callable[[], None]] = []
         self.load_model()
 
     def load_model(self) -> None:
         """Load the trained estimator and scaler from disk."""
+        self.shap_cache.clear()
+        self.prediction_cache.clear()
+        self.shap_base_value = None
         try:
             model_path = "models/random_forest.pkl"
             if os.path.exists(model_path):
-                model_data = joblib.load(model_path)
+                # Uncompressed numpy payloads are memory-mapped read-only, so forked workers
+                # share them through the page cache instead of holding private copies.
+                model_data = joblib.load(model_path, mmap_mode=MODEL_MMAP_MODE)
                 self.model = model_data.get("model")
                 self.scaler = model_data.get("scaler")
+                if self.model is not None:
+                    self.treelite_predictor = _load_treelite_predictor(MODEL_TREELITE_PATH, model_path)
+                    self.ort_session = None
+                    if self.treelite_predictor is None:
+                        self.ort_session = _load_onnx_session(MODEL_ONNX_PATH, model_path) or _convert_onnx_session(
+                            self.model
+                        )
+                    self.shap_surrogate = _load_shap_surrogate(SHAP_SURROGATE_PATH, model_path)
                 try:
                     if self.model is not None:
+                        import shap  # deferred: heavy import, only needed once a model is loaded
+
                         try:
-                            self.shap_explainer = shap.TreeExplainer(self.model)
+                            self.shap_explainer = shap.TreeExplainer(
+                                self.model,
+                                feature_perturbation="tree_path_dependent",
+                            )
                         except Exception:
                             self.shap_explainer = shap.Explainer(self.model)
+                        self.shap_base_value = _positive_base_value(self.model, self.shap_explainer)
                         logger.info("SHAP explainer initialized")
                 except Exception as exc:
                     logger.warning("Could not initialize SHAP explainer: %s", exc)
@@ -105,158 +566,306 @@ class MedicalDiagnosticSystem:
         except Exception as exc:  # pragma: no cover
             logger.error("Error loading model: %s", exc)
             self.model = None
+        for hook in self.reload_hooks:
+            hook()
 
     def validate_medical_data(self, data: Dict[str, float]) -> tuple[bool, List[str]]:
         """Ensure provided biomarkers fall inside conservative reference ranges."""
-        errors: List[str] = []
-        for feature, value in data.items():
-            if feature in MEDICAL_RANGES:
-                min_val, max_val = MEDICAL_RANGES[feature]
-                if not (min_val <= value <= max_val):
-                    errors.append(
-                        f"{feature.upper()}: {value} outside normal range ({min_val}-{max_val})",
-                    )
+        # Missing fields take the lower bound so only supplied values can fail.
+        values = np.fromiter(
+            (data.get(key, low) for key, low in zip(FEATURE_ORDER, _MIN_BOUNDS)),
+            dtype=float,
+            count=len(FEATURE_ORDER),
+        )
+        errors = [
+            _range_error(FEATURE_ORDER[idx], data[FEATURE_ORDER[idx]]) for idx in _out_of_range(values)
+        ]
         return len(errors) == 0, errors
 
+    def validate_feature_vector(self, features: Sequence[float]) -> tuple[bool, List[str]]:
+        """Range-check a full feature vector already in ``FEATURE_ORDER`` (no dict lookups)."""
+        values = np.asarray(features, dtype=float)
+        out_of_range = _out_of_range(values)
+        if out_of_range.size == 0:
+            return True, []
+        return False, [_range_error(FEATURE_ORDER[idx], float(values[idx])) for idx in out_of_range]
+
     def predict_cancer_risk(self, features: List[float]) -> tuple[int, float]:
-        """Infer pancreatic cancer risk via the trained estimator (fallbacks to rules)."""
+        """Infer pancreatic cancer risk via the trained estimator (fallbacks to rules).
+
+        Model results are memoized on the exact feature values; rule-based scores
+        are cheaper to recompute than to look up.
+        """
         if self.model is not None:
+            key = tuple(map(float, features))
+            cached = self.prediction_cache.get(key)
+            if cached is not None:
+                return cached
             try:
-                if self.scaler is not None:
-                    features_scaled = self.scaler.transform([features])
+                if self.batch_predictor is not None:
+                    result = self.batch_predictor.submit(features)
                 else:
-                    features_scaled = [features]
-                prediction = self.model.predict(features_scaled)[0]
-                probability = self.model.predict_proba(features_scaled)[0][1]
-                return int(prediction), float(probability)
+                    result = self._infer_batch(_as_row(features))[0]
+                self.prediction_cache.set(key, result)
+                return result
+            except TimeoutError:
+                # A stalled micro-batch is an overload, not a model failure: let the
+                # caller answer 503 instead of passing rule-based scores off as the model's.
+                raise
             except Exception as exc:  # pragma: no cover
                 logger.error("Model prediction error: %s", exc)
         return self._rule_based_prediction(features)
 
+    def predict_cancer_risk_batch(self, features_2d: np.ndarray) -> List[tuple[int, float]]:
+        """Score many patients at once; rows that arrive together skip the micro-batch queue."""
+        rows = np.atleast_2d(np.asarray(features_2d, dtype=float))
+        if self.model is not None:
+            try:
+                return self._infer_batch(rows)
+            except Exception as exc:  # pragma: no cover
+                logger.error("Batch model prediction error: %s", exc)
+        predictions, probabilities = _rule_based_batch(rows)
+        return [(int(pred), float(prob)) for pred, prob in zip(predictions, probabilities)]
+
+    def _current_affine(self) -> tuple[np.ndarray, np.ndarray] | None:
+        scaler = self.scaler
+        if self._affine_source is not scaler:
+            self._affine = _scaler_affine(scaler)
+            self._affine_source = scaler
+        return self._affine
+
+    def _scale_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Apply the fitted scaler as a raw affine, skipping sklearn's per-call validation."""
+        if self.scaler is None:
+            return rows
+        affine = self._current_affine()
+        if affine is None:
+            return self.scaler.transform(rows)
+        offset, divisor = affine
+        return (rows - offset) / divisor
+
+    def _model_input(self, rows: np.ndarray) -> np.ndarray:
+        """Scaled rows as float32 in this thread's reused buffer.
+
+        The affine runs in float64 and is rounded once on the way out, which is
+        exactly the cast scikit-learn (and the ONNX export) apply before walking
+        the trees, so predictions are unchanged and that conversion copy is skipped.
+        """
+        scratch, model_input = _input_buffers_for(rows.shape)
+        affine = self._current_affine() if self.scaler is not None else None
+        if affine is None:
+            model_input[...] = self._scale_rows(rows)
+        else:
+            np.subtract(rows, affine[0], out=scratch)
+            np.divide(scratch, affine[1], out=model_input)
+        return model_input
+
+    def _infer_batch(self, rows: np.ndarray) -> List[tuple[int, float]]:
+        """Score a stacked ``(n, 13)`` feature matrix with one scaler/model call each."""
+        compiled = self.treelite_predictor is not None or self.ort_session is not None
+        if compiled or _reads_float32(self.model):
+            features_scaled = self._model_input(rows)
+        else:
+            features_scaled = self._scale_rows(rows)
+        proba = None
+        if self.treelite_predictor is not None:
+            try:
+                proba = _treelite_predict_proba(self.treelite_predictor, features_scaled)
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Treelite inference failed, using scikit-learn: %s", exc)
+                self.treelite_predictor = None
+        elif self.ort_session is not None:
+            try:
+                proba = _onnx_predict_proba(self.ort_session, features_scaled)
+            except Exception as exc:  # pragma: no cover
+                logger.warning("ONNX inference failed, using scikit-learn: %s", exc)
+                self.ort_session = None
+        if proba is None:
+            proba = self.model.predict_proba(features_scaled)
+        # predict() is argmax over predict_proba(); derive it instead of walking the forest twice.
+        predictions = self.model.classes_.take(np.argmax(proba, axis=1))
+        return [(int(pred), float(prob)) for pred, prob in zip(predictions, proba[:, 1])]
+
     def _rule_based_prediction(self, features: List[float]) -> tuple[int, float]:
         """Deterministic clinical heuristic used when the ML model is unavailable."""
-        (
-            wbc,
-            rbc,
-            plt,
-            hgb,
-            hct,
-            mpv,
-            pdw,
-            mono,
-            baso_abs,
-            baso_pct,
-            glucose,
-            act,
-            bilirubin,
-        ) = features
-
-        risk_score = 0.0
-        if bilirubin > 20:
-            risk_score += 0.35
-        elif bilirubin > 15:
-            risk_score += 0.2
-
-        if glucose > 6.5:
-            risk_score += 0.25
-        elif glucose > 5.8:
-            risk_score += 0.15
-
-        if plt > 350:
-            risk_score += 0.2
-        elif plt < 180:
-            risk_score += 0.15
-
-        if wbc > 9.0:
-            risk_score += 0.15
-        elif wbc < 4.5:
-            risk_score += 0.1
-
-        if hgb < 130:
-            risk_score += 0.15
-        elif hgb < 110:
-            risk_score += 0.25
-
-        if act > 35:
-            risk_score += 0.1
-
-        if mpv > 10.0:
-            risk_score += 0.1
-
-        if mono > 0.6:
-            risk_score += 0.1
-
-        scaled_score = max(-3.0, min(3.0, risk_score * 3.0 - 1.0))
-        probability = 1 / (1 + math.exp(-scaled_score))
-        probability = max(0.1, min(0.95, probability))
-        prediction = 1 if probability > 0.5 else 0
-        return prediction, probability
+        prediction, probability = _rule_based_kernel(np.asarray(features, dtype=np.float64))
+        return int(prediction), float(probability)
+
+    def predict_and_explain(
+        self,
+        features: List[float],
+        exact: bool = False,
+        use_cache: bool = True,
+    ) -> tuple[int, float, List[Dict[str, Any]]]:
+        """Prediction plus SHAP explanation, from one forest pass when an exact explanation is needed.
+
+        Tree SHAP values of a binary forest sum (with the base value) to the predicted
+        probability, so an uncached exact explanation also yields the prediction and
+        the separate predict_proba walk is skipped. ``use_cache=False`` recomputes the
+        explanation (and refreshes the cache) even when one is cached.
+        """
+        exact = exact or self.shap_surrogate is None
+        rounded = _rounded_features(features)
+        fusable = exact and self.shap_base_value is not None and self.model is not None
+        if fusable and not (
+            use_cache and any((rounded, int(label), True) in self.shap_cache for label in self.model.classes_)
+        ):
+            try:
+                if self.fused_batcher is not None:
+                    prediction, probability, columns = self.fused_batcher.submit(features)
+                else:
+                    prediction, probability, columns = self._predict_explain_rows(_as_row(features))[0]
+                self.shap_cache.set((rounded, prediction, True), columns)
+                return prediction, probability, _shap_records(columns)
+            except TimeoutError:
+                raise
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Fused prediction/SHAP failed, running them separately: %s", exc)
+        prediction, probability = self.predict_cancer_risk(features)
+        return prediction, probability, self.calculate_shap_analysis(features, prediction, exact, use_cache)
+
+    def predict_and_explain_batch(
+        self, features_2d: np.ndarray, exact: bool = False
+    ) -> List[tuple[int, float, List[Dict[str, Any]]]]:
+        """:meth:`predict_and_explain` for many patients: one model pass and one explainer call in all.
+
+        Rows that arrive together skip the micro-batch queues, and their
+        explanations bypass the SHAP cache kept for single-patient requests.
+        """
+        rows = np.atleast_2d(np.asarray(features_2d, dtype=float))
+        exact = exact or self.shap_surrogate is None
+        if exact and self.shap_base_value is not None and self.model is not None:
+            try:
+                return [
+                    (prediction, probability, _shap_records(columns))
+                    for prediction, probability, columns in self._predict_explain_rows(rows)
+                ]
+            except Exception as exc:  # pragma: no cover
+                logger.warning("Fused prediction/SHAP failed, running them separately: %s", exc)
+        scored = self.predict_cancer_risk_batch(rows)
+        explained = None
+        use_surrogate = self.shap_surrogate is not None and (not exact or self.shap_explainer is None)
+        if (use_surrogate or self.shap_explainer is not None) and self.model is not None:
+            try:
+                explained = self._explain_columns(rows, exact=not use_surrogate)
+            except Exception as exc:  # pragma: no cover
+                logger.warning("SHAP calculation failed: %s", exc)
+        if explained is None:
+            explained = self._mock_shap_columns_rows(rows)
+        return [
+            (prediction, probability, _shap_records(columns))
+            for (prediction, probability), columns in zip(scored, explained)
+        ]
 
     def calculate_shap_analysis(
         self,
         features: List[float],
         prediction: int,
+        exact: bool = False,
+        use_cache: bool = True,
     ) -> List[Dict[str, Any]]:
-        """Run SHAP explainability (falls back to deterministic mock data)."""
-        if self.shap_explainer is not None and self.model is not None:
+        """Run SHAP explainability (falls back to deterministic mock data).
+
+        With a fitted surrogate loaded, explanations are approximated by one matrix
+        product unless ``exact`` asks for the tree explainer. ``use_cache=False``
+        skips the cache lookup but still stores the fresh result.
+        """
+        exact = exact or self.shap_surrogate is None
+        cache_key = (_rounded_features(features), int(prediction), exact)
+        columns = self.shap_cache.get(cache_key) if use_cache else None
+        if columns is None:
+            columns = self._compute_shap_columns(features, exact)
+            self.shap_cache.set(cache_key, columns)
+        # Records are rebuilt per call, so callers can annotate them without touching the cache.
+        return _shap_records(columns)
+
+    def _compute_shap_columns(self, features: List[float], exact: bool = True) -> Dict[str, list]:
+        use_surrogate = self.shap_surrogate is not None and (not exact or self.shap_explainer is None)
+        if (use_surrogate or self.shap_explainer is not None) and self.model is not None:
             try:
-                features_arr = np.array([features])
-                shap_values = self.shap_explainer.shap_values(features_arr)
-                values = (
-                    shap_values[0]
-                    if isinstance(shap_values, list)
-                    else shap_values
-                )[0]
-                return [
-                    {
-                        "feature": FEATURE_NAMES[idx],
-                        "value": float(value),
-                        "impact": "positive" if value > 0 else "negative",
-                        "importance": abs(float(value)),
-                    }
-                    for idx, value in enumerate(values)
-                ]
+                if not use_surrogate and self.shap_batcher is not None:
+                    return self.shap_batcher.submit(features)
+                return self._explain_columns(_as_row(features), exact=not use_surrogate)[0]
+            except TimeoutError:
+                raise
             except Exception as exc:  # pragma: no cover
                 logger.warning("SHAP calculation failed: %s", exc)
-        return self._mock_shap_calculation(features)
+        return self._mock_shap_columns(features)
+
+    def _explain_batch(self, rows: np.ndarray, exact: bool = True) -> List[List[Dict[str, Any]]]:
+        """Explain a stacked ``(n, 13)`` feature matrix with a single explainer call."""
+        return [_shap_records(columns) for columns in self._explain_columns(rows, exact)]
+
+    def _explain_columns(self, rows: np.ndarray, exact: bool = True) -> List[Dict[str, list]]:
+        if not exact and self.shap_surrogate is not None:
+            weights, bias = self.shap_surrogate
+            contributions = self._scale_rows(rows) @ weights + bias
+        else:
+            contributions = self._exact_contributions(rows)
+        orders = _top_k_indices_rows(np.abs(contributions), 9)
+        return [_shap_columns(row, order) for row, order in zip(contributions, orders)]
+
+    def _exact_contributions(self, rows: np.ndarray) -> np.ndarray:
+        # Repeated rows (duplicate CSV patients, identical requests sharing a
+        # micro-batch) are explained once and fanned back out.
+        if len(rows) > 1:
+            unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+            if len(unique_rows) < len(rows):
+                return self._exact_contributions(unique_rows)[inverse.reshape(-1)]
+        # The explainer is built once per model load (tree_path_dependent: no background
+        # data); each call is a single C traversal over input cast to the trees' dtype.
+        if getattr(getattr(self.shap_explainer, "model", None), "input_dtype", None) is np.float32:
+            features_scaled = self._model_input(rows)
+        else:
+            features_scaled = self._scale_rows(rows)
+        shap_values = self.shap_explainer.shap_values(features_scaled, check_additivity=False)
+        return _positive_class_contributions(shap_values)
+
+    def _predict_explain_rows(self, rows: np.ndarray) -> List[tuple[int, float, Dict[str, list]]]:
+        """``(prediction, probability, columns)`` per row from one exact explainer call."""
+        contributions = self._exact_contributions(rows)
+        probabilities = np.clip(self.shap_base_value + contributions.sum(axis=1), 0.0, 1.0)
+        # Labels follow predict(): argmax over [1 - p, p], ties going to the first
+        # class. The SHAP sum carries rounding error (0.5000000000000001 on an exact
+        # vote tie), so the tie test runs on p rounded to 9 places.
+        labels = self.model.classes_.take((np.round(probabilities, 9) > 0.5).astype(np.intp))
+        orders = _top_k_indices_rows(np.abs(contributions), 9)
+        return [
+            (int(label), float(probability), _shap_columns(row, order))
+            for label, probability, row, order in zip(labels.tolist(), probabilities, contributions, orders)
+        ]
 
     def _mock_shap_calculation(self, features: List[float]) -> List[Dict[str, Any]]:
         """Produce deterministic SHAP-style output when compute is unavailable."""
-        shap_values: List[Dict[str, Any]] = []
-        normal_values = [default for _, default in FEATURE_DEFAULTS]
-        feature_impacts = [
-            (features[0] - normal_values[0]) * 0.12,
-            (normal_values[1] - features[1]) * 0.1,
-            (features[2] - normal_values[2]) * 0.002,
-            (normal_values[3] - features[3]) * 0.004,
-            (normal_values[4] - features[4]) * 0.003,
-            (features[5] - normal_values[5]) * 0.05 if features[5] > 10.0 else (features[5] - normal_values[5]) * 0.01,
-            (features[6] - normal_values[6]) * 0.02,
-            (features[7] - normal_values[7]) * 0.3 if features[7] > 0.6 else (features[7] - normal_values[7]) * 0.1,
-            (features[8] - normal_values[8]) * 0.5,
-            (features[9] - normal_values[9]) * 0.1,
-            (features[10] - normal_values[10]) * 0.15 if features[10] > 6.5 else (features[10] - normal_values[10]) * 0.05,
-            (features[11] - normal_values[11]) * 0.01 if features[11] > 35 else (features[11] - normal_values[11]) * 0.005,
-            (features[12] - normal_values[12]) * 0.08 if features[12] > 20 else (features[12] - normal_values[12]) * 0.03,
-        ]
+        return _shap_records(self._mock_shap_columns(features))
 
-        for idx, (feature_name, impact_value) in enumerate(
-            zip(FEATURE_NAMES, feature_impacts),
-        ):
-            raw_value = features[idx] if idx < len(features) else 0.0
-            noise = math.sin((raw_value + 1) * (idx + 1) * 0.37) * 0.006
-            final_value = impact_value + noise
-            shap_values.append(
-                {
-                    "feature": feature_name,
-                    "value": round(final_value, 3),
-                    "impact": "positive" if final_value > 0 else "negative",
-                    "importance": abs(final_value),
-                },
-            )
-
-        shap_values.sort(key=lambda item: item["importance"], reverse=True)
-        return shap_values[:9]
+    def _mock_shap_columns(self, features: List[float]) -> Dict[str, list]:
+        impacts = _mock_shap_kernel(np.asarray(features, dtype=np.float64), _NORMAL_VALUES)
+        return _shap_columns(impacts, _top_k_indices(np.abs(impacts), 9))
+
+    def _mock_shap_columns_rows(self, rows: np.ndarray) -> List[Dict[str, list]]:
+        impacts = _mock_shap_rows_kernel(np.ascontiguousarray(rows, dtype=np.float64), _NORMAL_VALUES)
+        orders = _top_k_indices_rows(np.abs(impacts), 9)
+        return [_shap_columns(row, order) for row, order in zip(impacts, orders)]
+
+    def warm_up(self) -> None:
+        """Score and explain one synthetic patient so the first request skips lazy initialization.
+
+        Runs the estimator (or ONNX session), the tree explainer and the surrogate
+        directly rather than through the micro-batch queues or the SHAP cache.
+        """
+        if not MODEL_WARMUP or self.model is None:
+            return
+        rows = _WARMUP_FEATURES.reshape(1, -1)
+        try:
+            self._infer_batch(rows)
+            if self.shap_explainer is not None:
+                self._explain_columns(rows, exact=True)
+            if self.shap_surrogate is not None:
+                self._explain_columns(rows, exact=False)
+            logger.info("Model inference paths warmed up")
+        except Exception as exc:  # pragma: no cover
+            logger.debug("Model warm-up skipped: %s", exc)
 
     def guideline_snapshot(self) -> Dict[str, Any]:
         """Expose latest high-level guideline metadata for health endpoints."""
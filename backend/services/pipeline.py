@@ -1,10 +1,24 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
 
-from core.constants import FEATURE_DEFAULTS
+from core.constants import FEATURE_DEFAULTS, risk_level_for, risk_levels_for
+from core.json_provider import orjson
+from utils.cache import LRUCache
 from utils.text import encode_text_base64, repair_text_encoding
 
+from .commentary import Lang, resolve_audience, resolve_lang
+
+# Recent analyses, so a follow-up /api/report can reuse them by id instead of
+# resending (or recomputing) the full result.
+analysis_cache = LRUCache(
+    maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024") or "1024"),
+    ttl=float(os.getenv("ANALYSIS_CACHE_TTL", "300") or "300"),
+)
+
 
 def parse_patient_inputs(payload: Dict[str, Any]) -> tuple[list[float], Dict[str, float]]:
     """Convert incoming payload into feature list and normalized map."""
@@ -24,52 +38,173 @@ def parse_patient_inputs(payload: Dict[str, Any]) -> tuple[list[float], Dict[str
     return features, normalized
 
 
+def _request_language(payload: Dict[str, Any]) -> str:
+    return str(payload.get("language", "en")).lower()
+
+
+def _request_client_type(payload: Dict[str, Any]) -> str:
+    return str(payload.get("client_type", "patient") or "patient").lower()
+
+
 def execute_diagnostic_pipeline(
     diagnostic_system,
     payload: Dict[str, Any],
+    exact_shap: bool = False,
+    commentary: bool = True,
+    use_cache: bool = True,
 ) -> tuple[Dict[str, Any] | None, Dict[str, Any] | None, int]:
-    """Execute the full diagnostic flow returning analysis data or an error payload."""
+    """Execute the full diagnostic flow returning analysis data or an error payload.
+
+    With ``commentary=False`` the AI commentary fields are left empty, for callers
+    that request commentaries for many analyses at once.
+    ``use_cache=False`` recomputes the SHAP explanation and the LLM commentary.
+    """
+    features, normalized, error_payload = _checked_inputs(diagnostic_system, payload)
+    if error_payload is not None:
+        return None, error_payload, 400
+
+    prediction, probability, shap_values = diagnostic_system.predict_and_explain(
+        features, exact=exact_shap, use_cache=use_cache
+    )
+    return (
+        _build_analysis(
+            diagnostic_system,
+            payload,
+            features,
+            normalized,
+            (prediction, probability, shap_values),
+            commentary=commentary,
+            use_cache=use_cache,
+        ),
+        None,
+        200,
+    )
+
+
+def execute_diagnostic_pipelines(
+    diagnostic_system,
+    payloads: List[Dict[str, Any]],
+    exact_shap: bool = False,
+) -> List[tuple[Dict[str, Any] | None, Dict[str, Any] | None, int]]:
+    """:func:`execute_diagnostic_pipeline` without commentary for many payloads.
+
+    The valid payloads are scored and explained together in one model pass and one
+    explainer call; results come back in payload order.
+    """
+    checked = [_checked_inputs(diagnostic_system, payload) for payload in payloads]
+    valid = [features for features, _, error_payload in checked if error_payload is None]
+    scored = diagnostic_system.predict_and_explain_batch(valid, exact=exact_shap) if valid else []
+    explained = iter(scored)
+    risk_levels = iter(risk_levels_for([probability for _, probability, _ in scored]))
+
+    results: List[tuple[Dict[str, Any] | None, Dict[str, Any] | None, int]] = []
+    for payload, (features, normalized, error_payload) in zip(payloads, checked):
+        if error_payload is not None:
+            results.append((None, error_payload, 400))
+            continue
+        analysis = _build_analysis(
+            diagnostic_system,
+            payload,
+            features,
+            normalized,
+            next(explained),
+            commentary=False,
+            use_cache=True,
+            risk_level=next(risk_levels),
+        )
+        results.append((analysis, None, 200))
+    return results
+
+
+def _checked_inputs(
+    diagnostic_system, payload: Dict[str, Any]
+) -> tuple[list[float], Dict[str, float], Dict[str, Any] | None]:
+    """Parsed features and normalized values, plus the error payload when they are invalid."""
     try:
         features, normalized = parse_patient_inputs(payload)
     except (TypeError, ValueError) as exc:
         return (
-            None,
+            [],
+            {},
             {
                 "error": "Invalid numeric values in request data",
                 "details": str(exc),
                 "status": "validation_error",
             },
-            400,
         )
 
-    is_valid, errors = diagnostic_system.validate_medical_data(normalized)
+    is_valid, errors = diagnostic_system.validate_feature_vector(features)
     if not is_valid:
         return (
-            None,
+            features,
+            normalized,
             {
                 "error": "Medical data validation failed",
                 "validation_errors": errors,
                 "status": "validation_error",
             },
-            400,
         )
+    return features, normalized, None
 
-    prediction, probability = diagnostic_system.predict_cancer_risk(features)
-    shap_values = diagnostic_system.calculate_shap_analysis(features, prediction)
-    language = str(payload.get("language", "en")).lower()
-    client_type = str(payload.get("client_type", "patient") or "patient").lower()
-
-    ai_explanation = diagnostic_system.generate_clinical_commentary(
-        prediction,
-        probability,
-        shap_values,
-        features,
-        language=language,
-        client_type=client_type,
-    )
 
-    if not language.startswith("ru"):
-        ai_explanation = repair_text_encoding(ai_explanation)
+def _build_analysis(
+    diagnostic_system,
+    payload: Dict[str, Any],
+    features: list[float],
+    normalized: Dict[str, float],
+    explained: tuple[int, float, List[Dict[str, Any]]],
+    commentary: bool,
+    use_cache: bool,
+    risk_level: str | None = None,
+) -> Dict[str, Any]:
+    prediction, probability, shap_values = explained
+    analysis = {
+        "prediction": int(prediction),
+        "probability": float(probability),
+        "risk_level": risk_level if risk_level is not None else risk_level_for(probability),
+        "shap_values": shap_values,
+        "metrics": {k: v for k, v in diagnostic_system.model_metrics.items()},
+        "ai_explanation": "",
+        "ai_explanation_b64": encode_text_base64(""),
+        "patient_values": normalized,
+        "language": _request_language(payload),
+        "client_type": _request_client_type(payload),
+        "audience_commentaries": {},
+    }
+    if commentary:
+        attach_commentary(diagnostic_system, analysis, features, use_cache=use_cache)
+    return analysis
+
+
+def attach_commentary(
+    diagnostic_system,
+    analysis: Dict[str, Any],
+    features: List[float] | None = None,
+    use_cache: bool = True,
+) -> None:
+    """Fill in the AI commentary fields of an analysis built with ``commentary=False``.
+
+    Kept apart from scoring because it mostly waits on Groq, so callers can run
+    it outside the CPU-sized pipeline pool.
+    """
+    if features is None:
+        features = [analysis["patient_values"][key] for key, _ in FEATURE_DEFAULTS]
+    prediction, probability, shap_values = analysis["prediction"], analysis["probability"], analysis["shap_values"]
+    client_type = analysis["client_type"]
+    # Resolved once here; the commentary helpers take the enums without re-parsing.
+    lang = resolve_lang(analysis["language"])
+    ai_explanation = finish_commentary(
+        diagnostic_system.generate_clinical_commentary(
+            prediction,
+            probability,
+            shap_values,
+            features,
+            language=lang,
+            client_type=resolve_audience(client_type),
+            use_cache=use_cache,
+        ),
+        lang,
+    )
 
     try:
         audience_commentaries = diagnostic_system.build_audience_commentaries(
@@ -77,26 +212,50 @@ def execute_diagnostic_pipeline(
             probability,
             shap_values,
             features,
-            language,
+            lang,
             client_type,
             ai_explanation,
         )
     except Exception:
         audience_commentaries = {client_type: ai_explanation}
 
-    ai_explanation_b64 = encode_text_base64(ai_explanation)
-    analysis = {
-        "prediction": int(prediction),
-        "probability": float(probability),
-        "risk_level": "High" if probability > 0.7 else "Moderate" if probability > 0.3 else "Low",
-        "shap_values": shap_values,
-        "metrics": {k: v for k, v in diagnostic_system.model_metrics.items()},
-        "ai_explanation": ai_explanation,
-        "ai_explanation_b64": ai_explanation_b64,
-        "patient_values": normalized,
-        "language": language,
-        "client_type": client_type,
-        "audience_commentaries": audience_commentaries,
-    }
+    analysis["ai_explanation"] = ai_explanation
+    analysis["ai_explanation_b64"] = encode_text_base64(ai_explanation)
+    analysis["audience_commentaries"] = audience_commentaries
+
+
+def finish_commentary(text: str, lang: Lang) -> str:
+    """Final clean-up applied to commentary before it is returned to clients."""
+    return repair_text_encoding(text) if lang is Lang.EN else text
+
+
+def _analysis_id(patient_values: Any, language: Any, client_type: Any) -> str:
+    fields = [patient_values, language, client_type]
+    if orjson is not None:
+        fingerprint = orjson.dumps(fields, option=orjson.OPT_SORT_KEYS)
+    else:
+        fingerprint = json.dumps(fields, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(fingerprint, digest_size=16).hexdigest()
+
+
+def cache_analysis(analysis: Dict[str, Any]) -> str:
+    """Store a finished analysis and return the id clients can send back to /api/report."""
+    analysis_id = _analysis_id(analysis.get("patient_values"), analysis.get("language"), analysis.get("client_type"))
+    analysis_cache.set(analysis_id, analysis)
+    return analysis_id
+
+
+def analysis_id_for_payload(payload: Dict[str, Any]) -> str | None:
+    """The id ``cache_analysis`` assigns to the analysis of this request payload, if it parses."""
+    try:
+        _, normalized = parse_patient_inputs(payload)
+    except ValueError:
+        return None
+    return _analysis_id(normalized, _request_language(payload), _request_client_type(payload))
+
 
-    return analysis, None, 200
+def get_cached_analysis(analysis_id: Any) -> Dict[str, Any] | None:
+    """Return a previously cached analysis, or ``None`` when unknown or expired."""
+    if not isinstance(analysis_id, str) or not analysis_id:
+        return None
+    return analysis_cache.get(analysis_id)
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import os
+import re
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Optional, Tuple
 
-from fpdf import FPDF
-
-from core.constants import FEATURE_LABELS
+from core.constants import FEATURE_LABELS, risk_level_for
+from core.settings import logger
+from utils.cache import LRUCache
 from utils.text import repair_text_encoding
 
+if TYPE_CHECKING:  # pragma: no cover
+    from fpdf import FPDF
+
+# "1" renders a throwaway report at startup so the font tables and the standard
+# subset program are built before the first request (and shared across forks).
+REPORT_WARMUP = (os.getenv("REPORT_WARMUP", "1") or "1").lower() not in {"0", "false", "no"}
+
 
 PALETTE = {
     "primary": (21, 94, 239),
@@ -147,21 +156,231 @@ COPY = {
 }
 
 
+_UNICODE_FONT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts", "DejaVuSans.ttf"))
+
+
+@lru_cache(maxsize=1)
+def _unicode_font_metrics() -> Optional[Dict[str, Any]]:
+    """Parse the DejaVu TrueType tables once per process instead of once per report."""
+    try:
+        from fpdf.ttfonts import TTFontFile
+    except Exception:  # fpdf2 dropped the PyFPDF TrueType parser; fall back to add_font
+        return None
+    if not os.path.exists(_UNICODE_FONT_PATH):
+        return None
+    try:
+        ttf = TTFontFile()
+        ttf.getMetrics(_UNICODE_FONT_PATH)
+        return {
+            "type": "TTF",
+            "name": re.sub("[ ()]", "", ttf.fullName),
+            "desc": {
+                "Ascent": int(round(ttf.ascent, 0)),
+                "Descent": int(round(ttf.descent, 0)),
+                "CapHeight": int(round(ttf.capHeight, 0)),
+                "Flags": ttf.flags,
+                "FontBBox": "[%s %s %s %s]" % tuple(int(round(v, 0)) for v in ttf.bbox[:4]),
+                "ItalicAngle": int(ttf.italicAngle),
+                "StemV": int(round(ttf.stemV, 0)),
+                "MissingWidth": int(round(ttf.defaultWidth, 0)),
+            },
+            "up": round(ttf.underlinePosition),
+            "ut": round(ttf.underlineThickness),
+            "cw": ttf.charWidths,
+            "originalsize": os.stat(_UNICODE_FONT_PATH).st_size,
+        }
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Unicode PDF font could not be parsed: %s", exc)
+        return None
+
+
+class _GlyphSubset(list):
+    """Glyph list with O(1) membership tests.
+
+    fpdf checks ``cid in font["subset"]`` for every code point of the font
+    while writing glyph widths; on a plain list that scan dominates output().
+    """
+
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._members = set(self)
+
+    def __contains__(self, item):
+        return item in self._members
+
+    def append(self, item):
+        self._members.add(item)
+        super().append(item)
+
+
+def _copy_code_points(value: Any, into: set) -> None:
+    if isinstance(value, str):
+        into.update(map(ord, value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            _copy_code_points(item, into)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _copy_code_points(item, into)
+
+
+@lru_cache(maxsize=1)
+def _standard_glyphs() -> Tuple[int, ...]:
+    """Fixed glyph repertoire embedded in every report: ASCII, Cyrillic and the report copy."""
+    code_points = set(range(0x80)) | set(range(0x400, 0x460)) | set(map(ord, "–—‘’“”•…«»№°±×"))
+    _copy_code_points(COPY, code_points)
+    return tuple(sorted(code_points))
+
+
+def _memoized_subset_font_file(base: type) -> type:
+    """TTFontFile whose subset programs are built once per glyph set and then reused."""
+    subsets = LRUCache(maxsize=8)
+
+    class _MemoizedTTFontFile(base):
+        def makeSubset(self, file, subset):
+            key = (file, tuple(subset))
+            cached = subsets.get(key)
+            if cached is None:
+                stream = super().makeSubset(file, subset)
+                cached = (stream, dict(self.codeToGlyph), self.maxUni)
+                subsets.set(key, cached)
+            stream, self.codeToGlyph, self.maxUni = cached
+            return stream
+
+    return _MemoizedTTFontFile
+
+
+@lru_cache(maxsize=2)
+def _cached_font_entry(style: str, core_subset: int) -> Dict[str, Any]:
+    """Document-independent part of the DejaVu font entry, assembled once."""
+    metrics = _unicode_font_metrics()
+    fontkey = "dejavu" + style
+    return {
+        "type": metrics["type"],
+        "name": metrics["name"],
+        "desc": metrics["desc"],
+        "up": metrics["up"],
+        "ut": metrics["ut"],
+        "cw": metrics["cw"],
+        "ttffile": _UNICODE_FONT_PATH,
+        "fontkey": fontkey,
+        "subset": range(core_subset),
+        "unifilename": None,
+    }
+
+
+def _register_cached_font(pdf: FPDF, style: str, metrics: Dict[str, Any]) -> None:
+    """Mirror ``FPDF.add_font(..., uni=True)`` using the shared parsed metrics.
+
+    The font and font-file tables themselves stay per document: fpdf grows the
+    glyph subset and assigns object numbers in them while rendering.
+    """
+    fontkey = "dejavu" + style
+    entry = dict(_cached_font_entry(style, 57 if hasattr(pdf, "str_alias_nb_pages") else 32))
+    entry["i"] = len(pdf.fonts) + 1
+    entry["subset"] = _GlyphSubset(entry["subset"])
+    pdf.fonts[fontkey] = entry
+    pdf.font_files[fontkey] = {"length1": metrics["originalsize"], "type": "TTF", "ttffile": _UNICODE_FONT_PATH}
+    pdf.font_files[_UNICODE_FONT_PATH] = {"type": "TTF"}
+
+
+@lru_cache(maxsize=1)
+def _report_pdf_class() -> type:
+    """Build the FPDF subclass on first use so importing this module stays cheap."""
+    from fpdf import FPDF
+
+    try:
+        import fpdf.fpdf as fpdf_module
+        from fpdf.ttfonts import TTFontFile
+    except Exception:  # fpdf2 builds subsets differently; keep its defaults
+        fpdf_module = None
+    else:
+        # FPDF._putfonts looks the class up in its module namespace; the subclass
+        # only adds memoization, so every other FPDF user keeps identical output.
+        if not getattr(fpdf_module.TTFontFile, "_memoized_subsets", False):
+            fpdf_module.TTFontFile = _memoized_subset_font_file(TTFontFile)
+            fpdf_module.TTFontFile._memoized_subsets = True
+    # first object number of the font section -> (text, object offsets, font object)
+    font_sections = LRUCache(maxsize=8)
+
+    class _ReportPDF(FPDF):
+        """FPDF that embeds the single DejaVu face once for every style request.
+
+        Only the regular DejaVuSans.ttf ships with the backend, so bold and italic
+        would otherwise embed three identical subsets of the same file.
+
+        Building the font subset is most of the cost of a report, so documents
+        whose text stays inside the standard repertoire embed that whole repertoire
+        and reuse one prebuilt font program instead of subsetting per report.
+        """
+
+        def set_font(self, family, style="", size=0):
+            if family == "DejaVu":
+                style = style.upper().replace("B", "").replace("I", "")
+            super().set_font(family, style, size)
+
+        def _putfonts(self):
+            font = self.fonts.get("dejavu")
+            if font is not None and fpdf_module is not None:
+                standard = _standard_glyphs()
+                if set(font["subset"]).issubset(standard):
+                    font["subset"] = _GlyphSubset(standard)
+                    if len(self.fonts) == 1 and not self.diffs:
+                        self._put_standard_font_section(font)
+                        return
+            super()._putfonts()
+
+        def _put_standard_font_section(self, font):
+            """Replay the font objects of an earlier report that started at the same object number.
+
+            With the standard repertoire the font section (subset program, CID map,
+            widths, all compressed) depends only on its first object number, which
+            moves with the page count, so each page count is rendered once.
+            """
+            section = font_sections.get(self.n)
+            if section is None:
+                start_n, start = self.n, len(self.buffer)
+                super()._putfonts()
+                offsets = tuple(self.offsets[obj] - start for obj in range(start_n + 1, self.n + 1))
+                section = (self.buffer[start:], offsets, font["n"])
+                font_sections.set(start_n, section)
+                return
+            text, offsets, font["n"] = section
+            start = len(self.buffer)
+            for offset in offsets:
+                self.n += 1
+                self.offsets[self.n] = start + offset
+            self.buffer += text
+
+    return _ReportPDF
+
+
 def _ensure_unicode_font(pdf: FPDF) -> Tuple[str, bool]:
     """Load DejaVu font if available so Cyrillic renders correctly."""
-    fonts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "fonts"))
-    ttf_path = os.path.join(fonts_dir, "DejaVuSans.ttf")
+    metrics = _unicode_font_metrics()
     try:
-        if os.path.exists(ttf_path):
-            pdf.add_font("DejaVu", "", ttf_path, uni=True)
-            pdf.add_font("DejaVu", "B", ttf_path, uni=True)
-            pdf.add_font("DejaVu", "I", ttf_path, uni=True)
+        if metrics is not None:
+            _register_cached_font(pdf, "", metrics)
+            return "DejaVu", True
+        if os.path.exists(_UNICODE_FONT_PATH):
+            pdf.add_font("DejaVu", "", _UNICODE_FONT_PATH, uni=True)
             return "DejaVu", True
     except Exception:
         pass
     return "Helvetica", False
 
 
+def warm_report_fonts() -> None:
+    """Parse the report font and build its standard subset program ahead of the first report."""
+    if not REPORT_WARMUP:
+        return
+    try:
+        _render_report({}, {}).output(dest="S")
+        logger.info("PDF report fonts warmed up")
+    except Exception as exc:  # pragma: no cover
+        logger.debug("PDF report warm-up skipped: %s", exc)
+
+
 def _safe(text: Any, unicode_ready: bool) -> str:
     s = "" if text is None else str(text)
     if unicode_ready:
@@ -177,16 +396,24 @@ def _normalize_risk(risk: Any, probability: float) -> str:
         return "Moderate"
     if "low" in raw:
         return "Low"
-    if probability > 0.7:
-        return "High"
-    if probability > 0.3:
-        return "Moderate"
-    return "Low"
+    return risk_level_for(probability)
 
 
 def generate_pdf_report(self, patient_inputs: Dict[str, Any], analysis: Dict[str, Any]) -> BytesIO:
     """Create a professional bilingual PDF report summarizing the diagnostic analysis."""
-    pdf = FPDF()
+    pdf_bytes = _render_report(patient_inputs, analysis).output(dest="S").encode("latin-1")
+    buffer = BytesIO(pdf_bytes)
+    buffer.seek(0)
+    return buffer
+
+
+def write_pdf_report(self, patient_inputs: Dict[str, Any], analysis: Dict[str, Any], output: BinaryIO) -> None:
+    """Render the same report straight into ``output`` (a real file, so it can be sent with sendfile)."""
+    output.write(_render_report(patient_inputs, analysis).output(dest="S").encode("latin-1"))
+
+
+def _render_report(patient_inputs: Dict[str, Any], analysis: Dict[str, Any]) -> FPDF:
+    pdf = _report_pdf_class()()
     pdf.set_auto_page_break(auto=True, margin=16)
     pdf.add_page()
 
@@ -390,8 +617,4 @@ def generate_pdf_report(self, patient_inputs: Dict[str, Any], analysis: Dict[str
     pdf.set_font(font_family, "I", 9)
     pdf.set_text_color(*PALETTE["muted"])
     pdf.multi_cell(content_width, 5, _safe(copy["footer"], unicode_ready))
-
-    pdf_bytes = pdf.output(dest="S").encode("latin-1")
-    buffer = BytesIO(pdf_bytes)
-    buffer.seek(0)
-    return buffer
+    return pdf
@@ -0,0 +1,83 @@
+"""Bounded thread pool for the CPU-bound part of request handling."""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from flask import current_app, has_app_context
+
+from core.concurrency import default_pipeline_workers
+
+T = TypeVar("T")
+
+# Model and SHAP passes and PDF renders are capped at the process's share of the cores
+# (by default) no matter how many request threads the server runs, so bursts
+# queue instead of thrashing. Commentary waits on Groq outside the pool.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "0") or "0") or default_pipeline_workers()
+PIPELINE_TIMEOUT = float(os.getenv("PIPELINE_TIMEOUT", "30") or "30")
+# Jobs allowed to wait behind the running ones (0: four per worker). Past that, a
+# caller waits at most PIPELINE_QUEUE_WAIT seconds for room before being turned
+# away, so overload surfaces as fast 503s instead of ever-growing latency.
+PIPELINE_QUEUE = int(os.getenv("PIPELINE_QUEUE", "0") or "0") or 4 * PIPELINE_WORKERS
+PIPELINE_QUEUE_WAIT = float(os.getenv("PIPELINE_QUEUE_WAIT", "0.5") or "0.5")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PIPELINE_WORKERS + PIPELINE_QUEUE)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+    return _executor
+
+
+def _reset_after_fork() -> None:
+    """Pool threads do not survive fork; each worker starts its own on first use."""
+    global _executor, _executor_lock, _slots
+    _executor, _executor_lock = None, threading.Lock()
+    _slots = threading.BoundedSemaphore(PIPELINE_WORKERS + PIPELINE_QUEUE)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def run_blocking(func: Callable[..., T], *args: Any, timeout: float | None = PIPELINE_TIMEOUT, **kwargs: Any) -> T:
+    """Run ``func`` on the shared pool and wait for it; raises ``TimeoutError`` after ``timeout`` seconds.
+
+    Also raises ``TimeoutError`` straight away when the pool's queue stays full for
+    ``PIPELINE_QUEUE_WAIT`` seconds. The caller's Flask app context is carried over
+    so templates and config stay usable.
+    """
+    slots = _slots
+    if not slots.acquire(timeout=PIPELINE_QUEUE_WAIT):
+        raise TimeoutError("pipeline queue is full")
+    if has_app_context():
+        app = current_app._get_current_object()
+        target = func
+
+        def func(*call_args: Any, **call_kwargs: Any) -> T:
+            with app.app_context():
+                return target(*call_args, **call_kwargs)
+
+    try:
+        future = _get_executor().submit(func, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+__all__ = ["run_blocking", "PIPELINE_WORKERS", "PIPELINE_TIMEOUT", "PIPELINE_QUEUE", "PIPELINE_QUEUE_WAIT"]
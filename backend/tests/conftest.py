@@ -26,4 +26,84 @@ def app_instance():
 
 @pytest.fixture()
 def client(app_instance):
+    # Every test starts with fresh rate-limit windows, so per-minute limits on
+    # /api/predict and friends don't leak 429s from one test into the next.
+    from core.settings import limiter
+
+    if hasattr(limiter, "reset"):
+        limiter.reset()
     return app_instance.test_client()
+
+
+def _fit_tiny_forest(seed, n_rows, loc, scale, label, n_estimators, max_depth, scaled):
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc, scale, size=(n_rows, 13))
+    y = (X[:, 0] > loc) if label is None else label(X, rng)
+    scaler = StandardScaler().fit(X) if scaled else None
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=0)
+    model.fit(X if scaler is None else scaler.transform(X), np.asarray(y).astype(int))
+    return model, scaler, X
+
+
+@pytest.fixture()
+def tiny_forest_system():
+    """Factory for a ``MedicalDiagnosticSystem`` serving a small forest fitted on synthetic rows.
+
+    ``make(seed, ...)`` returns ``(system, X)``. ``label(X, rng)`` gives the
+    training targets (default ``X[:, 0] > loc``); with ``scaled`` the forest is
+    fitted behind a ``StandardScaler``; with ``explainer`` the tree explainer and
+    its base value are attached as ``load_model()`` would; ``batchers=False``
+    runs every call inline instead of through the micro-batch threads.
+    """
+    from services.model_engine import MedicalDiagnosticSystem, _positive_base_value
+
+    def make(
+        seed,
+        n_rows=80,
+        *,
+        loc=0.0,
+        scale=1.0,
+        label=None,
+        n_estimators=5,
+        max_depth=None,
+        scaled=False,
+        explainer=True,
+        batchers=True,
+    ):
+        model, scaler, X = _fit_tiny_forest(seed, n_rows, loc, scale, label, n_estimators, max_depth, scaled)
+        system = MedicalDiagnosticSystem()
+        system.model, system.scaler = model, scaler
+        system.ort_session = system.treelite_predictor = None
+        if not batchers:
+            system.batch_predictor = system.fused_batcher = system.shap_batcher = None
+        if explainer:
+            import shap
+
+            system.shap_explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
+            system.shap_base_value = _positive_base_value(model, system.shap_explainer)
+        return system, X
+
+    return make
+
+
+@pytest.fixture()
+def tiny_forest_on_disk(tmp_path, monkeypatch):
+    """Factory that pickles a small forest to ``models/random_forest.pkl`` under a fresh working directory.
+
+    Takes the same fitting arguments as ``tiny_forest_system`` and returns
+    ``(model, scaler, X)``; a ``MedicalDiagnosticSystem`` built afterwards loads it.
+    """
+    import joblib
+
+    def make(seed, n_rows=80, *, loc=0.0, scale=1.0, label=None, n_estimators=5, max_depth=None, scaled=False):
+        model, scaler, X = _fit_tiny_forest(seed, n_rows, loc, scale, label, n_estimators, max_depth, scaled)
+        (tmp_path / "models").mkdir(exist_ok=True)
+        joblib.dump({"model": model, "scaler": scaler}, tmp_path / "models" / "random_forest.pkl")
+        monkeypatch.chdir(tmp_path)
+        return model, scaler, X
+
+    return make
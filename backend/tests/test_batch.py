@@ -22,6 +22,29 @@ def test_batch_predict_success(client):
     assert data["calibration"]["sampled"] >= 2
 
 
+def test_batch_pipelines_match_single_pipeline(app_instance):
+    import pytest
+
+    from services import diagnostic_system
+    from services.pipeline import execute_diagnostic_pipeline, execute_diagnostic_pipelines
+
+    payloads = [
+        {"wbc": 5.8, "glucose": 9.5, "bilirubin": 40, "language": "ru"},
+        {"wbc": "abc"},
+        {"wbc": 500.0},
+        {"plt": 120, "client_type": "doctor"},
+    ]
+    batched = execute_diagnostic_pipelines(diagnostic_system, payloads)
+    for payload, (analysis, error_payload, status) in zip(payloads, batched):
+        expected, expected_error, expected_status = execute_diagnostic_pipeline(
+            diagnostic_system, payload, commentary=False
+        )
+        assert (status, error_payload) == (expected_status, expected_error)
+        if analysis is not None:
+            assert analysis.pop("probability") == pytest.approx(expected.pop("probability"))
+            assert analysis == expected
+
+
 def test_batch_predict_missing_file(client):
     resp = client.post("/api/batch-predict")
     assert resp.status_code == 400
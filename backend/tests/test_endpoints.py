@@ -1,5 +1,7 @@
 import json
 
+import pytest
+
 
 def test_health(client):
     r = client.get("/api/health")
@@ -29,6 +31,34 @@ def test_model_info(client):
     assert isinstance(data.get("metrics"), dict)
 
 
+def test_model_info_body_cached_until_reload(client):
+    from controllers import system
+    from services import diagnostic_system
+
+    first = client.get("/api/model-info").get_data()
+    assert "model_info" in system._cached_bodies
+    assert client.get("/api/model-info").get_data() == first
+
+    health = client.get("/api/health").get_json()
+    assert health["timestamp"] and "\x00" not in health["timestamp"]
+
+    diagnostic_system.load_model()
+    assert system._cached_bodies == {}
+    assert client.get("/api/model-info").get_data() == first
+
+
+def test_health_revalidates_with_etag(client):
+    first = client.get("/api/health")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    revalidated = client.get("/api/health", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+    assert revalidated.headers["ETag"] == etag
+    assert client.get("/api/status", headers={"If-None-Match": etag}).status_code == 200
+
+
 def test_predict_happy_path(client):
     payload = {
         "wbc": 5.8,
@@ -62,6 +92,16 @@ def test_predict_validation_error(client):
     assert data["status"] == "validation_error"
 
 
+@pytest.mark.parametrize(
+    "body, content_type",
+    [("{not json", "application/json"), ("[1, 2]", "application/json"), ('{"wbc": 5}', "text/plain")],
+)
+def test_predict_rejects_non_object_bodies(client, body, content_type):
+    r = client.post("/api/predict", data=body, content_type=content_type)
+    assert r.status_code == 400
+    assert r.get_json()["status"] == "validation_error"
+
+
 def test_commentary_and_report(client):
     payload = {
         "wbc": 5.8,
@@ -114,6 +154,8 @@ def test_commentary_and_report(client):
     )
     assert r3.status_code == 200
     assert r3.headers.get("Content-Type", "").startswith("application/pdf")
+    body = r3.get_data()
+    assert body.startswith(b"%PDF") and r3.content_length == len(body)
 
 
 def test_report_handles_object_shap(client):
@@ -130,3 +172,181 @@ def test_report_handles_object_shap(client):
     resp = client.post("/api/report", data=json.dumps(payload), content_type="application/json")
     assert resp.status_code == 200
     assert resp.headers.get("Content-Type", "").startswith("application/pdf")
+
+
+def test_report_reuses_cached_analysis(client):
+    payload = {"wbc": 5.8, "rbc": 4.0, "plt": 184.0, "language": "en", "client_type": "patient"}
+    r = client.post("/api/predict", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+    analysis_id = r.get_json()["analysis_id"]
+
+    r2 = client.post("/api/report", data=json.dumps({"analysis_id": analysis_id}), content_type="application/json")
+    assert r2.status_code == 200
+    assert r2.headers.get("Content-Type", "").startswith("application/pdf")
+
+    r3 = client.post("/api/report", data=json.dumps({"analysis_id": "unknown"}), content_type="application/json")
+    assert r3.status_code == 400
+
+
+def test_report_from_patient_values_reuses_predict_analysis(client, monkeypatch):
+    import sys
+
+    payload = {"wbc": 6.4, "plt": 290.0, "bilirubin": 19.0, "language": "en", "client_type": "patient"}
+    r = client.post("/api/predict", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+
+    engine = sys.modules["services.diagnostic_system"]
+    runs = []
+    original = engine.run_diagnostic_pipeline
+    monkeypatch.setattr(engine, "run_diagnostic_pipeline", lambda p, **kw: runs.append(p) or original(p, **kw))
+
+    body = {"patient": {"wbc": "6.4", "plt": 290, "bilirubin": 19}, "language": "en"}
+    r2 = client.post("/api/report", data=json.dumps(body), content_type="application/json")
+    assert r2.status_code == 200
+    assert r2.headers.get("Content-Type", "").startswith("application/pdf")
+    assert runs == []
+
+    body["patient"]["wbc"] = 7.1
+    assert client.post("/api/report", data=json.dumps(body), content_type="application/json").status_code == 200
+    assert client.post("/api/report", data=json.dumps(body), content_type="application/json").status_code == 200
+    assert len(runs) == 1
+
+    # Language and audience given inside the patient dict are kept, not reset to en/patient.
+    patient = {"wbc": 6, "plt": 200, "language": "ru", "client_type": "doctor"}
+    assert client.post("/api/predict", data=json.dumps(patient), content_type="application/json").status_code == 200
+    r3 = client.post("/api/report", data=json.dumps({"patient": patient}), content_type="application/json")
+    assert r3.status_code == 200
+    assert "diagnoai-pancreas-report-ru-" in r3.headers["Content-Disposition"]
+    assert len(runs) == 1
+
+
+def test_commentary_cache_invalidation(client):
+    from services.commentary import llm_commentary_cache
+
+    llm_commentary_cache.set(("probe",), "cached text")
+    r = client.delete("/api/commentary/cache", headers={"X-Role": "admin"})
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["status"] == "cleared"
+    assert body["cleared"]["size"] >= 1
+    assert len(llm_commentary_cache) == 0
+
+
+def test_commentary_stream_sse(client):
+    payload = {
+        "patient_values": {"WBC": 6.0, "PLT": 200, "bilirubin": 15, "glucose": 5.5},
+        "probability": 0.2,
+        "prediction": 0,
+        "language": "en",
+    }
+    r = client.post("/api/commentary/stream", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+    assert r.mimetype == "text/event-stream"
+    events = [chunk for chunk in r.get_data(as_text=True).split("\n\n") if chunk]
+    assert events[-1].startswith("event: done")
+    text = "".join(json.loads(event[len("data: "):]) for event in events[:-1])
+    assert text.strip()
+
+
+def test_report_streams_from_temp_file_and_cleans_up(client, tmp_path, monkeypatch):
+    import os
+    import tempfile
+
+    # Without memfd_create the report goes to an unlinked TemporaryFile.
+    monkeypatch.delattr(os, "memfd_create", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    opened = []
+    temporary_file = tempfile.TemporaryFile
+
+    def recording_temporary_file(*args, **kwargs):
+        opened.append(temporary_file(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(tempfile, "TemporaryFile", recording_temporary_file)
+
+    payload = {"patient": {"wbc": 5.0}, "result": {"probability": 0.5}}
+    r = client.post("/api/report", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+    assert r.data.startswith(b"%PDF")
+    assert len(opened) == 1 and not opened[0].closed
+    r.close()
+    assert opened[0].closed
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_report_memfd_is_closed_with_the_response(client, monkeypatch):
+    import os
+
+    if not hasattr(os, "memfd_create"):  # pragma: no cover - not Linux
+        pytest.skip("os.memfd_create is unavailable")
+    created = []
+    memfd_create = os.memfd_create
+    monkeypatch.setattr(os, "memfd_create", lambda *a: created.append(memfd_create(*a)) or created[-1])
+
+    def is_report_memfd(fd):
+        try:
+            return "diagnoai-report" in os.readlink(f"/proc/self/fd/{fd}")
+        except OSError:
+            return False
+
+    payload = {"patient": {"wbc": 5.0}, "result": {"probability": 0.5}}
+    r = client.post("/api/report", data=json.dumps(payload), content_type="application/json")
+    assert r.status_code == 200
+    assert r.data.startswith(b"%PDF")
+    assert len(created) == 1 and is_report_memfd(created[0])
+    r.close()
+    assert not is_report_memfd(created[0])
+
+
+def test_report_trusts_only_signed_risk_level(client, monkeypatch):
+    from controllers import reporting
+
+    seen = []
+    monkeypatch.setattr(
+        reporting.diagnostic_system,
+        "write_pdf_report",
+        lambda patient, analysis, output: seen.append(analysis["risk_level"]) or output.write(b"%PDF-1.4"),
+    )
+    from core.security import sign_risk
+
+    def predict():
+        body = json.dumps({"language": "en"})
+        return client.post("/api/predict", data=body, content_type="application/json").get_json()
+
+    def report(analysis):
+        body = {"patient": analysis["patient_values"], "result": analysis}
+        assert client.post("/api/report", data=json.dumps(body), content_type="application/json").status_code == 200
+
+    # Without a key nothing is signed and every client risk level is recomputed.
+    monkeypatch.delenv("RISK_SIGNING_KEY", raising=False)
+    result = predict()
+    assert "risk_signature" not in result
+    report({**result, "risk_level": "Forged", "risk_signature": "0" * 64})
+
+    monkeypatch.setenv("RISK_SIGNING_KEY", "test-key")
+    result = predict()
+    assert result["risk_signature"] == sign_risk(result["probability"], result["risk_level"])
+    forged = {**result, "risk_level": "Forged"}
+    unsigned = {key: value for key, value in forged.items() if key != "risk_signature"}
+    signed = {**result, "risk_level": "Signed", "risk_signature": sign_risk(result["probability"], "Signed")}
+    for analysis in (forged, unsigned, signed):
+        report(analysis)
+    assert seen == [result["risk_level"]] * 3 + ["Signed"]
+
+
+def test_cors_headers_only_for_allowed_origins(client):
+    resp = client.options(
+        "/api/health",
+        headers={
+            "Origin": "http://localhost:5173",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type, X-API-Key",
+        },
+    )
+    assert resp.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
+    assert resp.headers["Access-Control-Allow-Headers"] == "X-API-Key, content-type"
+    assert "POST" in resp.headers["Access-Control-Allow-Methods"]
+    assert resp.headers["Vary"] == "Origin"
+
+    resp = client.get("/api/health", headers={"Origin": "http://evil.example"})
+    assert "Access-Control-Allow-Origin" not in resp.headers
@@ -0,0 +1,75 @@
+def test_onnx_session_matches_sklearn(tiny_forest_on_disk):
+    import pytest
+
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    import numpy as np
+
+    import export_onnx
+    from services import model_engine
+
+    model, _, X = tiny_forest_on_disk(5, label=lambda X, rng: X[:, 2] > 0)
+    export_onnx.export()
+
+    system = model_engine.MedicalDiagnosticSystem()
+    assert system.ort_session is not None
+    results = system._infer_batch(X[:10])
+    assert [pred for pred, _ in results] == model.predict(X[:10]).tolist()
+    assert np.allclose([prob for _, prob in results], model.predict_proba(X[:10])[:, 1], atol=1e-6)
+
+
+def test_treelite_predictor_matches_sklearn(tiny_forest_on_disk):
+    import pytest
+
+    pytest.importorskip("treelite")
+    pytest.importorskip("tl2cgen")
+    import numpy as np
+
+    import export_treelite
+    from services import model_engine
+
+    model, _, X = tiny_forest_on_disk(6, label=lambda X, rng: X[:, 4] > 0)
+    assert export_treelite.export()
+
+    system = model_engine.MedicalDiagnosticSystem()
+    assert system.treelite_predictor is not None and system.ort_session is None
+    results = system._infer_batch(X[:10])
+    assert [pred for pred, _ in results] == model.predict(X[:10]).tolist()
+    assert np.allclose([prob for _, prob in results], model.predict_proba(X[:10])[:, 1], atol=1e-6)
+
+
+def test_infer_batch_float32_buffer_matches_sklearn(tiny_forest_system):
+    import numpy as np
+
+    system, _ = tiny_forest_system(1, 300, loc=5, scale=3, n_estimators=20, scaled=True, explainer=False)
+    model, scaler = system.model, system.scaler
+
+    rows = np.random.default_rng(2).normal(5, 3, size=(100, 13))
+    scaled = scaler.transform(rows)
+    expected = [(int(p), float(q)) for p, q in zip(model.predict(scaled), model.predict_proba(scaled)[:, 1])]
+    assert system._infer_batch(rows) == expected
+    # The buffer is reused for smaller batches without leaking stale rows.
+    assert system._infer_batch(rows[:3]) == expected[:3]
+
+
+def test_forest_converted_to_onnx_matches_sklearn(tiny_forest_system, monkeypatch):
+    import numpy as np
+    import pytest
+
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+
+    from services import model_engine
+    from services.model_engine import _convert_onnx_session
+
+    system, _ = tiny_forest_system(3, 200, label=lambda X, rng: X[:, 1] > 0, n_estimators=10, explainer=False)
+    model = system.model
+    monkeypatch.setattr(model_engine, "MODEL_ONNX_CONVERT", False)
+    assert _convert_onnx_session(model) is None
+    monkeypatch.setattr(model_engine, "MODEL_ONNX_CONVERT", True)
+    system.ort_session = _convert_onnx_session(model)
+    assert system.ort_session is not None
+
+    rows = np.random.default_rng(4).normal(size=(20, 13))
+    predictions = [pred for pred, _ in system._infer_batch(rows)]
+    assert predictions == model.predict(rows.astype(np.float32)).tolist()
@@ -0,0 +1,210 @@
+import asyncio
+from types import SimpleNamespace
+
+
+def test_gather_llm_coroutines_caps_parallelism_and_keeps_order(monkeypatch):
+    from services import llm_client
+
+    monkeypatch.setattr(llm_client, "GROQ_MAX_PARALLEL", 2)
+    monkeypatch.setattr(llm_client, "_parallel_limit", None)
+    active, peak = [0], [0]
+
+    async def call(idx):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        if idx == 3:
+            raise ValueError("boom")
+        return idx
+
+    results = llm_client.gather_llm_coroutines([call(i) for i in range(5)])
+    assert results[:3] == [0, 1, 2] and results[4] == 4
+    assert isinstance(results[3], ValueError)
+    assert peak[0] == 2
+
+
+def test_groq_rpm_spaces_completion_starts_after_a_burst(monkeypatch):
+    from services import llm_client
+
+    monkeypatch.setattr(llm_client, "GROQ_MAX_PARALLEL", 2)
+    monkeypatch.setattr(llm_client, "GROQ_RPM", 600)
+    monkeypatch.setattr(llm_client, "_parallel_limit", None)
+    monkeypatch.setattr(llm_client, "_rate_limit", None)
+    starts = []
+
+    async def call():
+        starts.append(asyncio.get_running_loop().time())
+
+    llm_client.gather_llm_coroutines([call() for _ in range(5)])
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    # Two (GROQ_MAX_PARALLEL) start back to back, the rest 0.1 s (60 / GROQ_RPM) apart.
+    assert gaps[0] < 0.05
+    assert all(gap > 0.08 for gap in gaps[1:])
+
+
+def test_commentaries_fan_out_and_fall_back(monkeypatch):
+    from services import diagnostic_system, llm_client
+    from services.commentary import llm_commentary_cache
+
+    prompts = []
+
+    async def create(**kwargs):
+        prompts.append(kwargs["messages"][0]["content"])
+        if len(prompts) == 2:
+            raise RuntimeError("rate limited")
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="LLM commentary"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    llm_commentary_cache.clear()
+
+    features = [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]
+    cases = [
+        (prediction, probability, diagnostic_system._mock_shap_calculation(features), features)
+        for prediction, probability in ((0, 0.1), (1, 0.8), (0, 0.2))
+    ]
+    texts = diagnostic_system.generate_clinical_commentaries(cases, language="en", client_type="patient")
+    assert len(prompts) == 3
+    assert texts.count("LLM commentary") == 2 and all(texts)
+    # Successful completions are cached; only the failed case is requested again.
+    diagnostic_system.generate_clinical_commentaries(cases, language="en", client_type="patient")
+    assert len(prompts) == 4
+    llm_commentary_cache.clear()
+
+
+def test_concurrent_identical_commentaries_share_one_completion(monkeypatch):
+    import threading
+    import time
+
+    from services import diagnostic_system, llm_client
+    from services.commentary import llm_commentary_cache
+
+    prompts = []
+    release = threading.Event()
+
+    async def create(**kwargs):
+        prompts.append(kwargs["messages"][0]["content"])
+        while not release.is_set():
+            await asyncio.sleep(0.005)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="LLM commentary"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    llm_commentary_cache.clear()
+
+    features = [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]
+    shap_values = diagnostic_system._mock_shap_calculation(features)
+    texts = []
+
+    def request():
+        texts.append(diagnostic_system.generate_clinical_commentary(1, 0.8, shap_values, features, "en", "patient"))
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not prompts:
+        time.sleep(0.005)
+    time.sleep(0.05)  # the other two requests are now waiting on the first one
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(prompts) == 1
+    assert texts == ["LLM commentary"] * 3
+    llm_commentary_cache.clear()
+
+
+def _streaming_client(deltas, fail_after=None):
+    async def chunks():
+        for index, delta in enumerate(deltas):
+            if index == fail_after:
+                raise RuntimeError("connection reset")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    async def create(**kwargs):
+        assert kwargs["stream"] is True
+        return chunks()
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_streamed_commentary_repairs_lines_and_raises_mid_stream(monkeypatch):
+    import pytest
+
+    from services import diagnostic_system, llm_client
+    from services.commentary import llm_commentary_cache
+
+    features = [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]
+    shap_values = diagnostic_system._mock_shap_calculation(features)
+    llm_commentary_cache.clear()
+
+    # "café" encoded as UTF-8 and decoded as cp1252, split across two deltas.
+    mojibake = "café".encode("utf-8").decode("cp1252")
+    client = _streaming_client(["Line one ", mojibake[:4], mojibake[4:] + "\n", "tail"])
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    chunks = list(diagnostic_system.stream_clinical_commentary(1, 0.8, shap_values, features, "en", "patient"))
+    assert chunks == ["Line one café\n", "tail"]
+
+    llm_commentary_cache.clear()
+    client = _streaming_client(["First line\n", "second line\n", "third"], fail_after=2)
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    stream = diagnostic_system.stream_clinical_commentary(1, 0.8, shap_values, features, "en", "patient")
+    received = []
+    with pytest.raises(RuntimeError, match="connection reset"):
+        for chunk in stream:
+            received.append(chunk)
+    assert received == ["First line\n", "second line\n"]
+    llm_commentary_cache.clear()
+
+
+def test_streamed_russian_commentary_falls_back_when_unreadable(monkeypatch):
+    from services import diagnostic_system, llm_client
+    from services.commentary import llm_commentary_cache
+
+    features = [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]
+    shap_values = diagnostic_system._mock_shap_calculation(features)
+    llm_commentary_cache.clear()
+
+    client = _streaming_client(["This is ", "not Russian at all."])
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    chunks = list(diagnostic_system.stream_clinical_commentary(1, 0.8, shap_values, features, "ru", "patient"))
+    assert len(chunks) == 1
+    assert "not Russian" not in chunks[0]
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: None)
+    assert chunks[0] == diagnostic_system.generate_clinical_commentary(1, 0.8, shap_values, features, "ru", "patient")
+    llm_commentary_cache.clear()
+
+
+def test_cached_commentary_never_crosses_risk_bands_or_printed_values(monkeypatch):
+    import re
+
+    from services import diagnostic_system, llm_client
+    from services.commentary import llm_commentary_cache
+
+    async def create(**kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        quoted = re.findall(r"RISK PROBABILITY: (\S+)|RISK LEVEL: (\S+)|- WBC: (\S+)", prompt)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=" ".join("".join(match) for match in quoted)))]
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: client)
+    llm_commentary_cache.clear()
+
+    features = [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]
+    shap_values = diagnostic_system._mock_shap_calculation(features)
+
+    def commentary(probability, wbc=6.5):
+        patient = [wbc] + features[1:]
+        return diagnostic_system.generate_clinical_commentary(0, probability, shap_values, patient, "en", "patient")
+
+    for below, above in ((0.296, 0.304), (0.3, 0.30001), (0.7, 0.70001)):
+        low, high = commentary(below), commentary(above)
+        assert low != high
+        assert commentary(below) == low and commentary(above) == high
+    assert commentary(0.3) == "30.0% Low 6.50"
+    assert commentary(0.30001) == "30.0% Moderate 6.50"
+    assert commentary(0.3, wbc=6.54) == "30.0% Low 6.54"
+    llm_commentary_cache.clear()
@@ -73,3 +73,51 @@ def test_commentary_ru_localized(client):
     assert explanation, "No commentary explanation returned for RU"
     assert RU_PROBABILITY_LABEL in explanation
     assert _count_cyrillic(explanation) >= 20
+
+
+def test_audience_and_language_resolve_once(app_instance):
+    from services.commentary import Audience, Lang, resolve_audience, resolve_lang
+
+    assert resolve_lang("ru-RU") is Lang.RU
+    assert resolve_lang(" RU ") is Lang.RU
+    assert resolve_lang(None) is Lang.EN
+    assert resolve_audience("Clinician") is Audience.PROFESSIONAL
+    assert resolve_audience("researchers") is Audience.SCIENTIST
+    assert resolve_audience("") is Audience.PATIENT
+    assert resolve_audience(Audience.SCIENTIST) is Audience.SCIENTIST
+
+    from services import diagnostic_system
+
+    shap_values = [{"feature": "Bilirubin", "value": 0.4, "impact": "positive"}]
+    assert diagnostic_system._generate_fallback_commentary(
+        1, 0.8, shap_values, language=Lang.RU, client_type=Audience.PROFESSIONAL
+    ) == diagnostic_system._generate_fallback_commentary(1, 0.8, shap_values, language="ru", client_type="doctor")
+
+
+def test_prompt_outline_rendered_at_import(app_instance):
+    from core.constants import COMMENTARY_LOCALE
+    from services.commentary import Audience, Lang, _PROMPT_TEMPLATES, _build_llm_prompt
+
+    assert len(_PROMPT_TEMPLATES) == len(Lang) * len(Audience) * 3
+    bundle = COMMENTARY_LOCALE["ru"]["patient"]
+    header = bundle["header_template"].format(risk=COMMENTARY_LOCALE["ru"]["risk_labels"]["High"])
+    prompt = _build_llm_prompt(1, 0.9, [], [5.8] * 13, "ru", "patient")
+    assert bundle["outline_template"].format(header=header, probability_label=bundle["probability_label"]) in prompt
+
+
+def test_factor_lines_normalize_client_supplied_values(app_instance):
+    from core.constants import FEATURE_LABELS
+    from services.commentary import Audience, Lang, _AUDIENCE_BUNDLES, _format_top_factor_lines
+
+    bundle = _AUDIENCE_BUNDLES[(Lang.EN, Audience.PATIENT)]
+    terms = bundle["impact_terms"]
+    lines = _format_top_factor_lines(
+        [
+            {"feature": "bilirubin", "value": 0.25, "impact": "POSITIVE"},
+            {"feature": "some_marker", "value": "n/a", "impact": None},
+        ],
+        bundle,
+        "en",
+    )
+    assert lines[0] == f"- {FEATURE_LABELS['en']['BILIRUBIN']}: {terms['positive']} (+0.250)"
+    assert lines[1] == f"- Some Marker: {terms['neutral']} (n/a)"
@@ -0,0 +1,23 @@
+def test_queued_handler_writes_off_the_calling_thread():
+    import logging
+    import threading
+
+    from utils import log_queue
+
+    writers = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            writers.append((threading.current_thread().name, record.getMessage()))
+
+    handler = log_queue.queued_handler(Recorder())
+    handler.setFormatter(logging.Formatter("audit: %(message)s"))
+    logger = logging.getLogger("test_queued_handler")
+    logger.propagate = False
+    logger.addHandler(handler)
+    logger.warning("value %d", 7)
+    if log_queue.LOG_QUEUE:
+        log_queue._listeners.pop().stop()
+        assert writers == [(writers[0][0], "audit: value 7")]
+        assert writers[0][0] != threading.current_thread().name
+    logger.removeHandler(handler)
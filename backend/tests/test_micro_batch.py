@@ -0,0 +1,94 @@
+import threading
+
+
+def test_batch_predictor_returns_rows_in_order():
+    from services.micro_batch import BatchPredictor
+
+    calls = []
+
+    def infer(rows):
+        calls.append(len(rows))
+        return [float(row.sum()) for row in rows]
+
+    predictor = BatchPredictor(infer, max_batch=8, max_latency_ms=50)
+    results = {}
+
+    def worker(idx):
+        results[idx] = predictor.submit([idx, idx, 1.0])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == {i: 2.0 * i + 1.0 for i in range(16)}
+    assert sum(calls) == 16
+    assert max(calls) <= 8
+
+
+def test_batch_predictor_propagates_errors():
+    from services.micro_batch import BatchPredictor
+
+    def infer(rows):
+        raise RuntimeError("boom")
+
+    predictor = BatchPredictor(infer)
+    try:
+        predictor.submit([1.0, 2.0])
+    except RuntimeError as exc:
+        assert "boom" in str(exc)
+    else:  # pragma: no cover
+        raise AssertionError("expected the inference error to propagate")
+
+
+def test_batch_predictor_submit_times_out_when_worker_stalls():
+    from services.micro_batch import BatchPredictor
+
+    release = threading.Event()
+    predictor = BatchPredictor(lambda rows: release.wait(5) and [0.0] * len(rows), name="stalled-batcher")
+    try:
+        predictor.submit([1.0], timeout=0.05)
+    except TimeoutError:
+        pass
+    else:  # pragma: no cover
+        raise AssertionError("expected submit to time out")
+    finally:
+        release.set()
+
+
+def test_model_reload_reuses_batcher_threads(tiny_forest_on_disk):
+    from services.model_engine import MedicalDiagnosticSystem
+
+    _, _, X = tiny_forest_on_disk(5, 60)
+
+    system = MedicalDiagnosticSystem()
+    batchers = (system.batch_predictor, system.shap_batcher, system.fused_batcher)
+    system.predict_and_explain(list(X[0]), exact=True)
+    system.predict_cancer_risk(list(X[1]))
+    threads = threading.active_count()
+    for _ in range(5):
+        system.load_model()
+        system.predict_and_explain(list(X[0]), exact=True)
+        system.predict_cancer_risk(list(X[1]))
+    assert (system.batch_predictor, system.shap_batcher, system.fused_batcher) == batchers
+    assert threading.active_count() == threads
+
+
+def test_stalled_batchers_raise_instead_of_falling_back(tiny_forest_system):
+    import pytest
+
+    class StalledBatcher:
+        def submit(self, features):
+            raise TimeoutError("batcher produced no result within 30s")
+
+    system, X = tiny_forest_system(6)
+    system.batch_predictor = system.fused_batcher = system.shap_batcher = StalledBatcher()
+    features = list(X[0])
+    with pytest.raises(TimeoutError):
+        system.predict_cancer_risk(features)
+    with pytest.raises(TimeoutError):
+        system.predict_and_explain(features, exact=True)
+    with pytest.raises(TimeoutError):
+        system.calculate_shap_analysis(features, 1, exact=True)
+    assert len(system.prediction_cache) == 0 and len(system.shap_cache) == 0
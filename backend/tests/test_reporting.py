@@ -0,0 +1,61 @@
+def test_reports_after_startup_embed_dejavu_without_reading_font_files(app_instance, monkeypatch):
+    import builtins
+    import os
+    import re
+
+    from services.reporting import generate_pdf_report
+
+    # App startup parsed the font and built its subset program; rendering must not touch fonts/.
+    fonts_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+    real_open = builtins.open
+
+    def guarded_open(file, *args, **kwargs):
+        if isinstance(file, (str, os.PathLike)) and os.path.abspath(file).startswith(fonts_dir):
+            raise AssertionError(f"{file} read while rendering a report")
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", guarded_open)
+    analysis = {"language": "ru", "probability": 0.2, "ai_explanation": "Комментарий врача."}
+    pdf = generate_pdf_report(None, {"wbc": 6.1}, analysis).getvalue()
+    assert re.search(rb"/BaseFont /[A-Z]{6}\+DejaVuSans", pdf)
+    assert b"/FontFile2" in pdf
+
+
+def test_reports_share_prebuilt_font_program(app_instance):
+    import re
+
+    from services.reporting import generate_pdf_report
+
+    def font_program(commentary):
+        analysis = {"language": "ru", "probability": 0.4, "ai_explanation": commentary}
+        pdf = generate_pdf_report(None, {"wbc": 6.1}, analysis).getvalue()
+        match = re.search(rb"/Length1 \d+\s*>>\s*stream\n(.*?)endstream", pdf, re.S)
+        assert match is not None
+        return match.group(1)
+
+    assert font_program("Первый комментарий.") == font_program("A different note, 42%.")
+
+
+def test_replayed_font_section_matches_fresh_render(app_instance, monkeypatch):
+    import re
+    from datetime import datetime
+
+    from services import reporting
+
+    def render(commentary):
+        analysis = {"language": "en", "probability": 0.8, "ai_explanation": commentary}
+        pdf = reporting.generate_pdf_report(None, {"wbc": 6.1}, analysis).getvalue()
+        xref = pdf.rindex(b"\nxref\n")
+        for number, line in enumerate(re.findall(rb"(\d{10}) 00000 n ", pdf[xref:]), start=1):
+            assert pdf[int(line) :].startswith(b"%d 0 obj" % number)
+        return re.sub(rb"/CreationDate \(D:\d+\)", b"", pdf)
+
+    class FixedClock:
+        @staticmethod
+        def now():
+            return datetime(2024, 1, 2, 3, 4)
+
+    monkeypatch.setattr(reporting, "datetime", FixedClock)
+    reporting._report_pdf_class.cache_clear()
+    for commentary in ("Short note.", "Long paragraph of follow-up guidance.\n" * 80):
+        assert render(commentary) == render(commentary)
@@ -0,0 +1,21 @@
+def test_risk_level_for_boundaries():
+    from core.constants import risk_level_for
+
+    assert [risk_level_for(p) for p in (0.0, 0.3, 0.3001, 0.7, 0.7001, 1.0)] == [
+        "Low",
+        "Low",
+        "Moderate",
+        "Moderate",
+        "High",
+        "High",
+    ]
+
+
+def test_risk_levels_for_matches_scalar_mapping():
+    import numpy as np
+
+    from core.constants import risk_level_for, risk_levels_for
+
+    probabilities = [0.0, 0.3, np.nextafter(0.3, 1.0), 0.5, 0.7, np.nextafter(0.7, 1.0), 1.0]
+    assert risk_levels_for(probabilities) == [risk_level_for(p) for p in probabilities]
+    assert risk_levels_for([]) == []
@@ -10,3 +10,283 @@ def test_mock_shap_returns_sorted_top9():
     # Ensure sorted by importance desc
     importances = [v["importance"] for v in values]
     assert importances == sorted(importances, reverse=True)
+
+
+def test_tree_explainer_returns_sorted_top9_positive_class(tiny_forest_system):
+    system, X = tiny_forest_system(0, label=lambda X, rng: X[:, 8] + X[:, 7] > 0, max_depth=3, scaled=True)
+
+    values = system.calculate_shap_analysis(list(X[0]), 1)
+    assert len(values) == 9
+    importances = [v["importance"] for v in values]
+    assert importances == sorted(importances, reverse=True)
+
+
+def test_mock_shap_is_deterministic():
+    from services.model_engine import MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    features = [9.0, 3.9, 160, 115, 35, 11.0, 18, 0.9, 0.1, 1.5, 8.0, 40, 30]
+    assert system._mock_shap_calculation(features) == system._mock_shap_calculation(list(features))
+
+
+def test_mock_shap_rows_match_single_patient_explanations():
+    import numpy as np
+
+    from services.model_engine import _NORMAL_VALUES, MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    rows = _NORMAL_VALUES * np.random.default_rng(3).uniform(0.3, 2.5, size=(32, 13))
+    assert system._mock_shap_columns_rows(rows) == [system._mock_shap_columns(row) for row in rows]
+
+
+def test_mock_shap_kernel_matches_python_reference():
+    import numpy as np
+
+    from services.model_engine import _NORMAL_VALUES, _mock_shap_kernel
+
+    reference = getattr(_mock_shap_kernel, "py_func", _mock_shap_kernel)
+    for features in (
+        _NORMAL_VALUES,
+        np.array([9.0, 3.9, 160, 115, 35, 11.0, 18, 0.9, 0.1, 1.5, 8.0, 40, 30], dtype=np.float64),
+    ):
+        assert np.allclose(_mock_shap_kernel(features, _NORMAL_VALUES), reference(features, _NORMAL_VALUES))
+
+
+def test_top_k_indices_rows_matches_single_row():
+    import numpy as np
+
+    from services.model_engine import _top_k_indices, _top_k_indices_rows
+
+    importance = np.abs(np.random.default_rng(4).normal(size=(25, 13)))
+    rows = _top_k_indices_rows(importance, 9)
+    assert rows.shape == (25, 9)
+    for row, order in zip(importance, rows):
+        assert order.tolist() == _top_k_indices(row, 9).tolist()
+    assert _top_k_indices_rows(importance[:, :5], 9).shape == (25, 5)
+
+
+def test_top_k_kernel_matches_numpy_ranking():
+    import numpy as np
+
+    from services.model_engine import _top_k_indices_numpy, _top_k_kernel, _top_k_rows_kernel
+
+    importance = np.abs(np.random.default_rng(5).normal(size=(50, 13)))
+    for row in importance:
+        assert _top_k_kernel(row, 9).tolist() == _top_k_indices_numpy(row, 9).tolist()
+    assert _top_k_rows_kernel(importance, 20).shape == (50, 13)
+    assert _top_k_kernel(np.array([0.5, 1.0, 0.5, 1.0]), 3).tolist() == [1, 3, 0]
+
+
+def test_shap_analysis_is_memoized_per_rounded_features():
+    from services.model_engine import MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    features = [9.0, 3.9, 160, 115, 35, 11.0, 18, 0.9, 0.1, 1.5, 8.0, 40, 30]
+    first = system.calculate_shap_analysis(features, 1)
+    first[0]["value"] = "mutated"
+    second = system.calculate_shap_analysis([value + 0.001 for value in features], 1)
+    assert second == system._mock_shap_calculation(features)
+    assert system.shap_cache.stats()["hits"] == 1
+
+
+def test_mock_shap_rule_table_matches_clinical_rules():
+    import math
+
+    import numpy as np
+
+    from services.model_engine import _NORMAL_VALUES, _mock_shap_kernel
+
+    def reference(f, n):
+        impacts = [
+            (f[0] - n[0]) * 0.12,
+            (n[1] - f[1]) * 0.1,
+            (f[2] - n[2]) * 0.002,
+            (n[3] - f[3]) * 0.004,
+            (n[4] - f[4]) * 0.003,
+            (f[5] - n[5]) * (0.05 if f[5] > 10.0 else 0.01),
+            (f[6] - n[6]) * 0.02,
+            (f[7] - n[7]) * (0.3 if f[7] > 0.6 else 0.1),
+            (f[8] - n[8]) * 0.5,
+            (f[9] - n[9]) * 0.1,
+            (f[10] - n[10]) * (0.15 if f[10] > 6.5 else 0.05),
+            (f[11] - n[11]) * (0.01 if f[11] > 35 else 0.005),
+            (f[12] - n[12]) * (0.08 if f[12] > 20 else 0.03),
+        ]
+        return [value + math.sin((f[idx] + 1) * (idx + 1) * 0.37) * 0.006 for idx, value in enumerate(impacts)]
+
+    rng = np.random.default_rng(6)
+    for _ in range(20):
+        features = _NORMAL_VALUES * rng.uniform(0.5, 2.0, size=13)
+        assert np.allclose(_mock_shap_kernel(features, _NORMAL_VALUES), reference(features, _NORMAL_VALUES))
+
+
+def test_shap_surrogate_serves_approximate_unless_exact(tiny_forest_on_disk):
+    import csv
+
+    import numpy as np
+
+    import fit_shap_surrogate
+    from core.constants import FEATURE_DEFAULTS
+    from services.model_engine import MedicalDiagnosticSystem
+
+    _, scaler, X = tiny_forest_on_disk(
+        7, 120, loc=5.0, label=lambda X, rng: X[:, 12] + X[:, 10] > 10, max_depth=3, scaled=True
+    )
+    with open("rows.csv", "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow([key for key, _ in FEATURE_DEFAULTS])
+        writer.writerows(X.tolist())
+    fit_shap_surrogate.fit("rows.csv")
+
+    system = MedicalDiagnosticSystem()
+    assert system.shap_surrogate is not None
+    weights, bias = system.shap_surrogate
+    approx = system.calculate_shap_analysis(list(X[0]), 1)
+    expected = scaler.transform(X[:1])[0] @ weights + bias
+    top = max(approx, key=lambda entry: entry["importance"])
+    assert np.isclose(top["importance"], np.abs(expected).max())
+    exact = system.calculate_shap_analysis(list(X[0]), 1, exact=True)
+    assert len(exact) == 9
+    assert system.shap_cache.stats()["size"] == 2
+
+
+def test_concurrent_exact_shap_shares_explainer_calls(tiny_forest_system):
+    import threading
+
+    from services.micro_batch import BatchPredictor
+
+    system, X = tiny_forest_system(1, max_depth=3)
+    expected = [system._explain_batch(X[i : i + 1])[0] for i in range(12)]
+
+    batch_sizes = []
+
+    def explain(rows):
+        batch_sizes.append(len(rows))
+        return system._explain_columns(rows)
+
+    system.shap_batcher = BatchPredictor(explain, max_batch=8, max_latency_ms=50, name="shap-batcher")
+    results = {}
+
+    def worker(idx):
+        results[idx] = system.calculate_shap_analysis(list(X[idx]), 1, exact=True)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert [results[i] for i in range(12)] == expected
+    assert sum(batch_sizes) == 12 and max(batch_sizes) > 1
+
+
+def test_warm_up_runs_model_and_explainer_without_filling_caches(tiny_forest_system):
+    from services.model_engine import _WARMUP_FEATURES
+
+    system, _ = tiny_forest_system(2, 60, n_estimators=3, max_depth=3)
+    calls = []
+    system._explain_columns = lambda rows, exact=True: calls.append((rows.tolist(), exact)) or []
+
+    system.warm_up()
+    assert calls == [([_WARMUP_FEATURES.tolist()], True)]
+    assert len(system.shap_cache) == 0
+    assert _WARMUP_FEATURES.shape == (13,)
+
+
+def test_exact_shap_from_float32_buffer_matches_explainer(tiny_forest_system):
+    import numpy as np
+
+    from services.model_engine import _positive_class_contributions
+
+    system, X = tiny_forest_system(
+        8, 120, loc=5, scale=2, label=lambda X, rng: X[:, 3] > 5, n_estimators=8, max_depth=4, scaled=True
+    )
+    scaler, explainer = system.scaler, system.shap_explainer
+    rows = X[:4]
+    expected = _positive_class_contributions(explainer.shap_values(scaler.transform(rows), check_additivity=False))
+    for columns, contributions in zip(system._explain_columns(rows), expected):
+        assert columns["importance"][0] == np.abs(contributions).max()
+
+
+def test_predict_and_explain_matches_separate_passes(tiny_forest_system):
+    system, X = tiny_forest_system(
+        9,
+        200,
+        loc=5,
+        scale=2,
+        label=lambda X, rng: X[:, 0] + rng.normal(size=len(X)) > 5,
+        n_estimators=15,
+        scaled=True,
+        batchers=False,
+    )
+    assert system.shap_base_value is not None
+
+    for row in X[:20]:
+        features = list(row)
+        prediction, probability, shap_values = system.predict_and_explain(features, exact=True)
+        system.shap_cache.clear()
+        expected_prediction, expected_probability = system.predict_cancer_risk(features)
+        assert prediction == expected_prediction
+        assert abs(probability - expected_probability) < 1e-9
+        assert shap_values == system.calculate_shap_analysis(features, prediction, exact=True)
+    # A cached explanation is reused: only the prediction runs.
+    system.shap_explainer = None
+    assert system.predict_and_explain(list(X[19]), exact=True)[2] == shap_values
+
+
+def test_predict_and_explain_batch_matches_single_rows(tiny_forest_system):
+    system, X = tiny_forest_system(
+        10, 120, loc=5, scale=2, label=lambda X, rng: X[:, 3] > 5, n_estimators=10, batchers=False
+    )
+    for base_value in (system.shap_base_value, None):
+        system.shap_base_value = base_value
+        batch = system.predict_and_explain_batch(X[:12], exact=True)
+        for row, (prediction, probability, shap_values) in zip(X[:12], batch):
+            system.shap_cache.clear()
+            expected = system.predict_and_explain(list(row), exact=True)
+            assert (prediction, shap_values) == (expected[0], expected[2])
+            assert abs(probability - expected[1]) < 1e-9
+
+
+def test_fused_labels_match_predict_on_exact_vote_ties(tiny_forest_system):
+    import numpy as np
+
+    system, _ = tiny_forest_system(0, 400, label=lambda X, rng: X[:, 0] + rng.normal(size=len(X)) > 0, n_estimators=4)
+    model = system.model
+
+    rows = np.random.default_rng(1).normal(size=(1000, 13))
+    ties = model.predict_proba(rows)[:, 1] == 0.5
+    assert ties.any()
+    labels = [prediction for prediction, _, _ in system._predict_explain_rows(rows)]
+    assert labels == model.predict(rows).tolist()
+
+
+def test_exact_contributions_explain_repeated_rows_once(tiny_forest_system):
+    import numpy as np
+
+    system, X = tiny_forest_system(11, loc=5, scale=2, label=lambda X, rng: X[:, 3] > 5)
+    explainer = system.shap_explainer
+    explained = []
+    shap_values = explainer.shap_values
+    explainer.shap_values = lambda data, **kwargs: explained.append(len(data)) or shap_values(data, **kwargs)
+
+    rows = X[[3, 1, 3, 2, 1, 3]]
+    contributions = system._exact_contributions(rows)
+    assert explained == [3]
+    assert np.array_equal(contributions, np.vstack([system._exact_contributions(row[None, :]) for row in rows]))
+
+
+def test_shap_cache_bypass_recomputes_and_refreshes():
+    from services.model_engine import MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    features = [9.0, 3.9, 160, 115, 35, 11.0, 18, 0.9, 0.1, 1.5, 8.0, 40, 30]
+    system.calculate_shap_analysis(features, 1)
+    calls = []
+    system._compute_shap_columns = lambda feats, exact=True: calls.append(exact) or system._mock_shap_columns(feats)
+
+    system.calculate_shap_analysis(features, 1)
+    assert calls == []
+    system.calculate_shap_analysis(features, 1, use_cache=False)
+    assert calls == [True]
+    assert system.shap_cache.stats()["size"] == 1
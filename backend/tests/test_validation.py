@@ -57,3 +57,121 @@ def test_rule_based_prediction_thresholds():
     pred, prob = system._rule_based_prediction(features)
     assert 0.1 <= prob <= 0.95
     assert pred in (0, 1)
+
+
+def test_validate_medical_data_partial_payload():
+    from services.model_engine import MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    ok, errors = system.validate_medical_data({"glucose": 9.1, "unknown": 1e9})
+    assert ok is False
+    assert errors == ["GLUCOSE: 9.1 outside normal range (3.5-7.5)"]
+
+
+def test_infer_batch_matches_estimator_predict(tiny_forest_system):
+    import numpy as np
+
+    system, X = tiny_forest_system(1, 60, n_estimators=7, explainer=False)
+    model = system.model
+    results = system._infer_batch(X[:10])
+    assert [pred for pred, _ in results] == model.predict(X[:10]).tolist()
+    assert np.allclose([prob for _, prob in results], model.predict_proba(X[:10])[:, 1])
+
+
+def test_load_model_from_disk(tiny_forest_on_disk):
+    from services.model_engine import MedicalDiagnosticSystem
+
+    model, scaler, X = tiny_forest_on_disk(2, 60, label=lambda X, rng: X[:, 8] > 0, scaled=True)
+
+    system = MedicalDiagnosticSystem()
+    assert system.model is not None
+    pred, prob = system.predict_cancer_risk(list(X[0]))
+    assert pred == int(model.predict(scaler.transform(X[:1]))[0])
+    assert 0.0 <= prob <= 1.0
+    assert len(system.calculate_shap_analysis(list(X[0]), pred)) == 9
+
+
+def test_rule_based_batch_matches_single_row():
+    import numpy as np
+
+    from services.model_engine import MedicalDiagnosticSystem, _rule_based_batch
+
+    system = MedicalDiagnosticSystem()
+    rows = np.array(
+        [
+            [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12],
+            [10.0, 4.0, 400, 100, 35, 11.0, 14, 0.9, 0.03, 0.8, 7.0, 40, 25],
+            [4.0, 4.0, 170, 120, 35, 9.0, 14, 0.4, 0.03, 0.8, 6.0, 20, 16],
+            [9.0, 4.0, 350, 110, 35, 10.0, 14, 0.6, 0.03, 0.8, 6.5, 35, 20],
+        ]
+    )
+    predictions, probabilities = _rule_based_batch(rows)
+    for row, pred, prob in zip(rows, predictions, probabilities):
+        assert system._rule_based_prediction(list(row)) == (int(pred), float(prob))
+
+
+def test_predict_cancer_risk_batch_matches_single_rows():
+    import numpy as np
+
+    from services.model_engine import MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    rows = np.array(
+        [
+            [6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12],
+            [10.0, 4.0, 400, 100, 35, 11.0, 14, 0.9, 0.03, 0.8, 7.0, 40, 25],
+        ]
+    )
+    batch = system.predict_cancer_risk_batch(rows)
+    assert batch == [system.predict_cancer_risk(list(row)) for row in rows]
+
+
+def test_predict_cancer_risk_memoizes_model_results(tiny_forest_system):
+    import numpy as np
+
+    system, X = tiny_forest_system(4, 40, explainer=False, batchers=False)
+    calls = []
+    infer = system._infer_batch
+    system._infer_batch = lambda rows: calls.append(len(rows)) or infer(rows)
+
+    features = X[0].tolist()
+    first = system.predict_cancer_risk(features)
+    assert system.predict_cancer_risk(np.array(features)) == first
+    assert calls == [1]
+    system.load_model()
+    assert len(system.prediction_cache) == 0
+
+
+def test_scale_rows_matches_standard_scaler():
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+
+    from services.model_engine import MedicalDiagnosticSystem
+
+    rng = np.random.default_rng(3)
+    X = rng.normal(loc=5.0, scale=3.0, size=(40, 13))
+    system = MedicalDiagnosticSystem()
+    for scaler in (StandardScaler(), StandardScaler(with_mean=False)):
+        system.scaler = scaler.fit(X)
+        assert np.allclose(system._scale_rows(X[:5]), scaler.transform(X[:5]), rtol=0, atol=1e-12)
+
+
+def test_validate_feature_vector_matches_mapping_validation():
+    from services.model_engine import FEATURE_ORDER, MedicalDiagnosticSystem
+
+    system = MedicalDiagnosticSystem()
+    features = [6.5, 4.5, 500.0, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 9.1, 28, float("nan")]
+    ok, errors = system.validate_feature_vector(features)
+    assert ok is False
+    assert errors == system.validate_medical_data(dict(zip(FEATURE_ORDER, features)))[1]
+    assert len(errors) == 3
+    assert system.validate_feature_vector([6.5, 4.5, 250, 140, 42, 9.5, 14, 0.5, 0.03, 0.8, 5.0, 28, 12]) == (True, [])
+
+
+def test_rebuild_feature_vector_falls_back_to_defaults():
+    from core.constants import FEATURE_DEFAULTS, rebuild_feature_vector
+
+    defaults = [default for _, default in FEATURE_DEFAULTS]
+    assert rebuild_feature_vector(None).tolist() == defaults
+    vector = rebuild_feature_vector({"wbc": "7.5", "rbc": "n/a", "plt": None, "hgb": 130})
+    assert vector.tolist() == [7.5, defaults[1], defaults[2], 130.0] + defaults[4:]
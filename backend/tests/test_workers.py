@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+
+def test_run_blocking_uses_pool_thread_and_app_context(app_instance):
+    from flask import current_app
+
+    from services.workers import run_blocking
+
+    def work(value):
+        return value * 2, threading.current_thread().name, current_app.name
+
+    with app_instance.app_context():
+        result, thread_name, app_name = run_blocking(work, 21)
+
+    assert result == 42
+    assert thread_name.startswith("pipeline")
+    assert app_name == app_instance.name
+
+
+def test_run_blocking_times_out():
+    from services.workers import run_blocking
+
+    with pytest.raises(TimeoutError):
+        run_blocking(time.sleep, 0.5, timeout=0.01)
+
+
+def test_run_blocking_rejects_when_queue_full(monkeypatch):
+    from services import workers
+
+    monkeypatch.setattr(workers, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(workers, "PIPELINE_QUEUE_WAIT", 0.01)
+    release = threading.Event()
+    holder = threading.Thread(target=workers.run_blocking, args=(release.wait,))
+    holder.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(TimeoutError, match="queue is full"):
+            workers.run_blocking(int)
+    finally:
+        release.set()
+        holder.join(timeout=5)
+    # The slot is freed by the finished job's done-callback, possibly just after the holder returns.
+    monkeypatch.setattr(workers, "PIPELINE_QUEUE_WAIT", 1.0)
+    assert workers.run_blocking(int, "7") == 7
+
+
+def test_pipeline_workers_split_cores_between_processes(monkeypatch):
+    from core import concurrency
+
+    monkeypatch.setattr(concurrency, "CPU_COUNT", 8)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert concurrency.default_pipeline_workers() == 8
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert concurrency.default_pipeline_workers() == 2
+    monkeypatch.setenv("WEB_CONCURRENCY", str(concurrency.default_web_concurrency()))
+    assert concurrency.default_pipeline_workers() == 1
+
+
+def test_slow_commentary_does_not_hold_the_pipeline_pool(client, app_instance, monkeypatch):
+    import asyncio
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from types import SimpleNamespace
+
+    from services import llm_client, workers
+    from services.commentary import llm_commentary_cache
+
+    async def create(**kwargs):
+        await asyncio.sleep(0.3)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="LLM commentary"))])
+
+    groq = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "get_groq_client", lambda: groq)
+    # One pipeline thread and one queued job, as a worker of a many-process deployment gets.
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline")
+    monkeypatch.setattr(workers, "_executor", pool)
+    monkeypatch.setattr(workers, "_slots", threading.BoundedSemaphore(2))
+    llm_commentary_cache.clear()
+    statuses = []
+
+    def predict(wbc):
+        body = json.dumps({"wbc": wbc, "language": "en"})
+        response = app_instance.test_client().post("/api/predict", data=body, content_type="application/json")
+        statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=predict, args=(5.0 + i / 10,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    elapsed = time.perf_counter() - start
+    pool.shutdown(wait=False)
+    llm_commentary_cache.clear()
+
+    assert statuses == [200] * 8
+    # Serialized behind the single pool thread this would take 8 completions' worth or more.
+    assert elapsed < 8 * 0.3
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List
+
+__all__ = ["LOG_QUEUE", "queued_handler"]
+
+# "1": log records are written by a background thread instead of the request thread
+LOG_QUEUE = (os.getenv("LOG_QUEUE", "1") or "1").lower() not in {"0", "false", "no"}
+
+_listeners: List[QueueListener] = []
+
+
+def queued_handler(handler: logging.Handler) -> logging.Handler:
+    """Front ``handler`` with a queue drained by a background listener thread.
+
+    Request threads only format the record and enqueue it; the stream or file
+    write happens on the listener, which is flushed at exit. Returns ``handler``
+    itself when LOG_QUEUE is off. Give the returned handler the formatter: the
+    listener writes the already formatted message.
+    """
+    if not LOG_QUEUE:
+        return handler
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return QueueHandler(records)
+
+
+def _stop_listeners() -> None:
+    for listener in _listeners:
+        if listener._thread is not None:
+            listener.stop()
+
+
+def _restart_after_fork() -> None:
+    """The listener threads do not survive fork; each worker starts its own."""
+    for listener in _listeners:
+        listener._thread = None
+        listener.start()
+
+
+atexit.register(_stop_listeners)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
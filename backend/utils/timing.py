@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from functools import lru_cache
+
+__all__ = ["iso_timestamp", "utc_timestamp"]
+
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(bucket: int) -> str:
+    return datetime.fromtimestamp(bucket).isoformat()
+
+
+def iso_timestamp() -> str:
+    """Return the local ISO-8601 timestamp, formatted at most once per second."""
+    return _iso_timestamp(int(time.time()))
+
+
+def utc_timestamp() -> str:
+    """Return the current UTC time as ISO-8601 with millisecond precision and a ``Z`` suffix."""
+    now = time.time()
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now))}.{int(now % 1 * 1000):03d}Z"